@@ -1,6 +1,30 @@
 from django.contrib import admin
-from .models import Product, Customer, Order
+from .models import Product, Customer, Order, OrderItem
 
-admin.site.register(Product)
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 1
+    autocomplete_fields = ['product']
+
+
+class OrderAdmin(admin.ModelAdmin):
+    inlines = [OrderItemInline]
+    list_display = ['id', 'customer', 'date', 'status', 'total_amount', 'fulfillable']
+    readonly_fields = ['total_amount', 'fulfillable']
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Inline items are saved one by one, bypassing the m2m signals.
+        orders = Order.objects.filter(pk=form.instance.pk)
+        orders.snapshot_prices()
+        form.instance.refresh_totals()
+
+
+class ProductAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+
+admin.site.register(Product, ProductAdmin)
 admin.site.register(Customer)
-admin.site.register(Order)
+admin.site.register(Order, OrderAdmin)
@@ -0,0 +1,240 @@
+"""
+Order analytics from pre-aggregated rollups.
+
+``DailyRollup`` (orders, units and revenue per day and status) and
+``ProductDailyRollup`` (units and revenue per day and product) are kept per
+calendar day in ``TIME_ZONE``. Writes do not touch them: every order change
+marks its day in ``RollupDirtyDay`` (one upsert, in the transaction of the
+change), and a day is recomputed from its orders when the ``refresh_rollups``
+job runs or a report covering it is read, whichever comes first. Reports
+therefore never serve stale days, and a burst of writes to one day costs
+one recomputation. The all-time top customers have no day to roll up by;
+they are cached until an order or customer write bumps their version.
+
+``rebuild_rollups`` rebuilds every day from scratch and, with ``--verify``,
+checks the rollups against an independent aggregation of the raw rows.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache import ORDERS, get_version
+from .models import DailyRollup, Order, OrderItem, ProductDailyRollup, RollupDirtyDay
+from .routers import primary_reads
+
+ZERO = Decimal('0.00')
+
+
+def day_bounds(day):
+    """Aware start and end of ``day`` in the current time zone."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def local_day(value):
+    return timezone.localdate(value)
+
+
+def order_days(order_ids):
+    """The days the orders with ``order_ids`` were placed on."""
+    order_ids = list(order_ids)
+    days = set()
+    for start in range(0, len(order_ids), 500):
+        days.update(
+            Order.objects.filter(pk__in=order_ids[start:start + 500]).annotate(day=TruncDate('date'))
+            .order_by().values_list('day', flat=True).distinct()
+        )
+    return days
+
+
+def mark_days_dirty(days):
+    days = {day for day in days if day is not None}
+    if not days:
+        return
+    now = timezone.now()
+    RollupDirtyDay.objects.bulk_create(
+        [RollupDirtyDay(day=day, marked_at=now) for day in sorted(days)],
+        update_conflicts=True, unique_fields=['day'], update_fields=['marked_at'],
+    )
+
+
+def compute_day(day):
+    """``DailyRollup`` and ``ProductDailyRollup`` rows for ``day``, aggregated from its orders."""
+    start, end = day_bounds(day)
+    daily = [
+        DailyRollup(day=day, status=row['status'], orders=row['orders'],
+                    units=row['units'] or 0, revenue=row['revenue'] or ZERO)
+        for row in Order.objects.filter(date__gte=start, date__lt=end).order_by().values('status').annotate(
+            orders=Count('id', distinct=True),
+            units=Sum('items__quantity'),
+            revenue=Sum(F('items__quantity') * F('items__unit_price')),
+        )
+    ]
+    products = [
+        ProductDailyRollup(day=day, product_id=row['product'], units=row['units'], revenue=row['revenue'] or ZERO)
+        for row in OrderItem.objects.filter(order__date__gte=start, order__date__lt=end).order_by()
+        .values('product').annotate(units=Sum('quantity'), revenue=Sum(F('quantity') * F('unit_price')))
+    ]
+    return daily, products
+
+
+def refresh_day(day):
+    DailyRollup.objects.filter(day=day).delete()
+    ProductDailyRollup.objects.filter(day=day).delete()
+    daily, products = compute_day(day)
+    DailyRollup.objects.bulk_create(daily)
+    ProductDailyRollup.objects.bulk_create(products)
+
+
+def refresh_dirty_days(start=None, end=None):
+    """
+    Recompute the dirty days between ``start`` and ``end`` (inclusive, either
+    open), each in one transaction with clearing its mark. A mark made while
+    the day is recomputed survives, as it moved ``marked_at``.
+    """
+    marks = RollupDirtyDay.objects.order_by('day')
+    if start is not None:
+        marks = marks.filter(day__gte=start)
+    if end is not None:
+        marks = marks.filter(day__lte=end)
+    refreshed = 0
+    for mark in list(marks):
+        with transaction.atomic():
+            RollupDirtyDay.objects.filter(pk=mark.pk, marked_at=mark.marked_at).delete()
+            refresh_day(mark.day)
+        refreshed += 1
+    return refreshed
+
+
+def rebuild(start=None, end=None):
+    """Recompute every day with orders or rollups in the range; returns the number of days."""
+    orders = Order.objects.all()
+    rollups = DailyRollup.objects.all()
+    if start is not None:
+        orders = orders.filter(date__gte=day_bounds(start)[0])
+        rollups = rollups.filter(day__gte=start)
+    if end is not None:
+        orders = orders.filter(date__lt=day_bounds(end)[1])
+        rollups = rollups.filter(day__lte=end)
+    days = set(orders.annotate(day=TruncDate('date')).order_by().values_list('day', flat=True).distinct())
+    days.update(rollups.values_list('day', flat=True).distinct())
+    mark_days_dirty(days)
+    return refresh_dirty_days(start, end)
+
+
+def raw_totals(start=None, end=None):
+    """
+    The rollups' numbers aggregated in Python from every order and item in
+    the range, sharing no query with the rollup code: ``(daily, products)``
+    keyed by ``(day, status)`` and ``(day, product_id)``.
+    """
+    orders = Order.objects.order_by()
+    if start is not None:
+        orders = orders.filter(date__gte=day_bounds(start)[0])
+    if end is not None:
+        orders = orders.filter(date__lt=day_bounds(end)[1])
+
+    daily = defaultdict(lambda: [0, 0, ZERO])
+    order_keys = {}
+    for pk, date, status in orders.values_list('pk', 'date', 'status').iterator(chunk_size=2000):
+        key = (local_day(date), status)
+        order_keys[pk] = key
+        daily[key][0] += 1
+
+    products = defaultdict(lambda: [0, ZERO])
+    items = OrderItem.objects.filter(order__in=orders.values('pk')).order_by()
+    for order_id, product_id, quantity, unit_price in (
+            items.values_list('order_id', 'product_id', 'quantity', 'unit_price').iterator(chunk_size=2000)):
+        day, status = key = order_keys[order_id]
+        revenue = quantity * unit_price if unit_price is not None else ZERO
+        daily[key][1] += quantity
+        daily[key][2] += revenue
+        products[(day, product_id)][0] += quantity
+        products[(day, product_id)][1] += revenue
+    return ({key: tuple(value) for key, value in daily.items()},
+            {key: tuple(value) for key, value in products.items()})
+
+
+def parity_errors(start=None, end=None):
+    """Differences between the rollups and ``raw_totals`` over the range, as messages."""
+    daily, products = raw_totals(start, end)
+    rolled_daily = DailyRollup.objects.all()
+    rolled_products = ProductDailyRollup.objects.all()
+    if start is not None:
+        rolled_daily, rolled_products = rolled_daily.filter(day__gte=start), rolled_products.filter(day__gte=start)
+    if end is not None:
+        rolled_daily, rolled_products = rolled_daily.filter(day__lte=end), rolled_products.filter(day__lte=end)
+
+    errors = []
+    for label, raw, rolled in (
+        ('day/status', daily, {(row.day, row.status): (row.orders, row.units, row.revenue) for row in rolled_daily}),
+        ('day/product', products, {(row.day, row.product_id): (row.units, row.revenue) for row in rolled_products}),
+    ):
+        for key in sorted(set(raw) | set(rolled), key=str):
+            if raw.get(key) != rolled.get(key):
+                errors.append(f"{label} {key}: rollup {rolled.get(key)} != raw {raw.get(key)}")
+    return errors
+
+
+def money(value):
+    return '{:.2f}'.format(value or ZERO)
+
+
+def top_customers(top):
+    """
+    The ``top`` customers by lifetime value, aggregated over every order.
+    The aggregation spans all time, so it is cached under the ``ORDERS``
+    version, which order and customer writes bump, and filled from the
+    primary like other cached reads.
+    """
+    key = f'analytics-top-customers:{get_version(ORDERS)}:{top}'
+    rows = cache.get(key)
+    if rows is None:
+        with primary_reads():
+            rows = [
+                {'customer': row['customer'], 'name': row['customer__name'], 'orders': row['orders'],
+                 'lifetime_value': money(row['lifetime_value'])}
+                for row in Order.objects.order_by().values('customer', 'customer__name')
+                .annotate(orders=Count('id'), lifetime_value=Sum('total_amount'))
+                .order_by('-lifetime_value', 'customer')[:top]
+            ]
+        cache.set(key, rows, settings.API_CACHE_TIMEOUT)
+    return rows
+
+
+def report(start=None, end=None, top=10):
+    """The analytics endpoint's response, read from the rollups after refreshing dirty days."""
+    refresh_dirty_days(start, end)
+    daily = DailyRollup.objects.order_by()
+    products = ProductDailyRollup.objects.order_by()
+    if start is not None:
+        daily, products = daily.filter(day__gte=start), products.filter(day__gte=start)
+    if end is not None:
+        daily, products = daily.filter(day__lte=end), products.filter(day__lte=end)
+
+    per_day = daily.values('day').annotate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'))
+    per_status = daily.values('status').annotate(orders=Sum('orders'))
+    top_products = (products.values('product', 'product__name')
+                    .annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue', 'product')[:top])
+    return {
+        'start': start,
+        'end': end,
+        'revenue_per_day': [
+            {'day': row['day'], 'orders': row['orders'], 'units': row['units'], 'revenue': money(row['revenue'])}
+            for row in per_day.order_by('day')
+        ],
+        'orders_per_status': {row['status']: row['orders'] for row in per_status.order_by('status')},
+        'top_products': [
+            {'product': row['product'], 'name': row['product__name'], 'units': row['units'],
+             'revenue': money(row['revenue'])}
+            for row in top_products
+        ],
+        'top_customers': top_customers(top),
+    }
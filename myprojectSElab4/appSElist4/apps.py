@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class Appselist4Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appSElist4'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_recorder
+        from .search import repair_search_index
+
+        post_migrate.connect(repair_search_index, sender=self)
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,152 @@
+"""
+Async-native, read-only endpoints for products and orders.
+
+These views run on the event loop under ASGI: authentication, permission
+checks and queries are awaited (``aget``/``aiterator``) instead of holding a
+worker thread for the whole request, so slow clients cost a coroutine rather
+than a thread. Requests spend the same throttle budgets as the DRF
+viewsets of the same ``throttle_scope``; the counter store is synchronous,
+so the check runs in a worker thread. Rows are built with the same ``values()`` plans as the
+``FastListMixin`` list endpoints, so payloads match the DRF viewsets.
+"""
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.settings import api_settings
+
+from .authentication import FastJWTAuthentication
+from .fastpath import values_plan
+from .models import Product, Order
+from .pagination import IdCursorPagination
+from .permissions import IsAdminOrReadOnly
+from .renderers import dumps
+from .serializers import ProductSerializer, OrderSerializer
+
+
+@lru_cache(maxsize=None)
+def plan_for(serializer_class):
+    plan = values_plan(serializer_class(context={'request': None}))
+    if plan is None:
+        raise ImproperlyConfigured(f'{serializer_class.__name__} cannot be served from values() rows.')
+    return plan
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(dumps(data), status=status_code, content_type='application/json', headers=headers)
+
+
+class AsyncReadView(View):
+    """
+    ``GET`` a keyset-paginated list (``?after=<id>&page_size=``) or, with a
+    ``pk`` in the URL, a single object. Only authenticated users get through,
+    ``permission_classes`` are checked with their ``ahas_permission`` and
+    ``throttle_classes`` as in DRF, refusing with 429 and ``Retry-After``.
+    """
+    http_method_names = ['get', 'head', 'options']
+    model = None
+    serializer_class = None
+    authentication_class = FastJWTAuthentication
+    permission_classes = [IsAdminOrReadOnly]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = None
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = IdCursorPagination.max_page_size
+
+    async def get(self, request, pk=None):
+        authentication = self.authentication_class()
+        try:
+            result = await authentication.aauthenticate(request)
+        except APIException as exc:
+            return self.error(exc, authentication)
+        if result is None:
+            return json_response({'detail': 'Authentication credentials were not provided.'},
+                                 status.HTTP_401_UNAUTHORIZED,
+                                 {'WWW-Authenticate': authentication.authenticate_header(request)})
+        request.user, request.auth = result
+
+        for permission in self.permission_classes:
+            if not await permission().ahas_permission(request, self):
+                return json_response({'detail': 'You do not have permission to perform this action.'},
+                                     status.HTTP_403_FORBIDDEN)
+
+        try:
+            await sync_to_async(self.check_throttles)(request)
+        except Throttled as exc:
+            return self.error(exc, authentication)
+
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    def check_throttles(self, request):
+        """Raise ``Throttled`` if any throttle refuses the request, as ``APIView`` does."""
+        waits = [throttle.wait() for throttle in (cls() for cls in self.throttle_classes)
+                 if not throttle.allow_request(request, self)]
+        if waits:
+            raise Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def error(self, exc, authentication):
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        headers = {}
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            headers['WWW-Authenticate'] = authentication.authenticate_header(self.request)
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = '%d' % exc.wait
+        return json_response(detail, exc.status_code, headers)
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET['page_size'])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    async def list(self, request):
+        plan = plan_for(self.serializer_class)
+        queryset = self.get_queryset().order_by('pk')
+        after = request.GET.get('after')
+        if after:
+            try:
+                queryset = queryset.filter(pk__gt=int(after))
+            except ValueError:
+                return json_response({'after': ['A valid integer is required.']}, status.HTTP_400_BAD_REQUEST)
+
+        page_size = self.get_page_size(request)
+        rows = [row async for row in queryset.values(*plan.columns)[:page_size + 1].aiterator()]
+        next_url = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            params = request.GET.copy()
+            params['after'] = rows[-1]['id']
+            next_url = f'{request.build_absolute_uri(request.path)}?{params.urlencode()}'
+        return json_response({'next': next_url, 'results': await plan.arepresent(rows)})
+
+    async def retrieve(self, request, pk):
+        plan = plan_for(self.serializer_class)
+        try:
+            row = await self.get_queryset().values(*plan.columns).aget(pk=pk)
+        except self.model.DoesNotExist:
+            return json_response({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+        return json_response((await plan.arepresent([row]))[0])
+
+
+class AsyncProductView(AsyncReadView):
+    model = Product
+    serializer_class = ProductSerializer
+    throttle_scope = 'products'
+
+
+class AsyncOrderView(AsyncReadView):
+    model = Order
+    serializer_class = OrderSerializer
+    throttle_scope = 'orders'
@@ -0,0 +1,225 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` with ``aauthenticate`` for async views: token
+    validation is pure CPU work, and the user is loaded with ``aget``.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU mapping whose entries expire after ``ttl`` seconds
+    (or at a per-entry ``expires_at``). A ``maxsize`` of 0 disables it.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        if not self.maxsize:
+            return
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = LRUCache(getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024), getattr(settings, 'AUTH_USER_CACHE_TTL', 30))
+token_cache = LRUCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 4096))
+
+
+def _user_changed_key(user_id):
+    return f'auth:user-changed:{user_id}'
+
+
+def mark_user_changed(user_id):
+    """
+    Drop ``user_id`` from the user cache and stop trusting the claims of
+    tokens issued before now. The marker lives in Django's default cache so
+    every process sharing it sees the change.
+    """
+    user_cache.pop(user_id)
+    timeout = int(jwt_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    django_cache.set(_user_changed_key(user_id), time.time(), timeout)
+
+
+def cache_user(user, loaded_at):
+    """
+    Cache a copy of ``user`` with the time it was read, taken before the
+    query so a change marked while it ran still invalidates the entry.
+    """
+    user_cache.set(user.pk, (copy.copy(user), loaded_at))
+
+
+def add_user_claims(token, user):
+    """Claims the stateless path trusts: ``is_staff`` as of ``auth_time``."""
+    token['is_staff'] = user.is_staff
+    token['auth_time'] = time.time()
+    return token
+
+
+class FastJWTAuthentication(AsyncJWTAuthentication):
+    """
+    JWT authentication that avoids the user lookup where it safely can:
+
+    * verified tokens are cached per process by their raw bytes, so the
+      signature of a token is checked once until it expires;
+    * safe (read-only) requests whose token carries ``is_staff`` and
+      ``auth_time`` claims get a ``TokenUser`` built from the claims, unless
+      the user changed after ``auth_time``;
+    * everything else loads the user through a short-TTL LRU cache that is
+      invalidated when the user is saved or deleted: directly in the process
+      that saved it, and through the shared change marker in every other.
+
+    Cached users are handed out as copies, so requests never share one.
+    """
+
+    def authenticate(self, request):
+        validated_token = self.validate_header(request)
+        if validated_token is None:
+            return None
+        user = self.get_stateless_user(request, validated_token)
+        if user is None:
+            user = self.get_cached_user(validated_token)
+        return user, validated_token
+
+    async def aauthenticate(self, request):
+        validated_token = self.validate_header(request)
+        if validated_token is None:
+            return None
+        user = self.get_stateless_user(request, validated_token)
+        if user is None:
+            user = self.cached_user_for(validated_token)
+        if user is None:
+            loaded_at = time.time()
+            user = await self.aget_user(validated_token)
+            cache_user(user, loaded_at)
+        return user, validated_token
+
+    def validate_header(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return self.get_validated_token(raw_token)
+
+    def get_validated_token(self, raw_token):
+        validated_token = token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, validated_token, expires_at=validated_token.get('exp'))
+        return validated_token
+
+    def get_stateless_user(self, request, validated_token):
+        if request.method not in SAFE_METHODS:
+            return None
+        auth_time = validated_token.get('auth_time')
+        if 'is_staff' not in validated_token or auth_time is None:
+            return None
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return None
+        changed_at = django_cache.get(_user_changed_key(user_id))
+        if changed_at is not None and changed_at >= auth_time:
+            return None
+        return jwt_settings.TOKEN_USER_CLASS(validated_token)
+
+    def cached_user_for(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        entry = user_cache.get(user_id)
+        if entry is None:
+            return None
+        user, loaded_at = entry
+        # Another process may have changed the user since it was loaded.
+        changed_at = django_cache.get(_user_changed_key(user_id))
+        if changed_at is not None and changed_at >= loaded_at:
+            user_cache.pop(user_id)
+            return None
+        user = copy.copy(user)
+        # Re-run the active/revocation checks against the cached row.
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def get_cached_user(self, validated_token):
+        user = self.cached_user_for(validated_token)
+        if user is None:
+            loaded_at = time.time()
+            user = self.get_user(validated_token)
+            cache_user(user, loaded_at)
+        return user
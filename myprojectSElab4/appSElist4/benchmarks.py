@@ -0,0 +1,243 @@
+"""
+Latency, query-count and memory benchmarks for the REST API and model hot
+paths. ``run_suite`` expects an empty, migrated database; the
+``run_benchmarks`` management command provides one and handles JSON output
+and regression checks.
+"""
+import platform
+import queue
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from itertools import count
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import synthetic
+from .models import Product, Customer, Order
+from .placement import OrderNotPlaced, place_order
+
+DEFAULT_SCALES = (1000, 100000, 1000000)
+
+_created_names = (f'Benchmark product {i}' for i in count())
+
+
+def dataset_sizes(rows):
+    """Products and orders scale with ``rows``; there is one customer per ten orders."""
+    return {'products': rows, 'customers': max(1, rows // 10), 'orders': rows}
+
+
+class Scenario:
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+    def measure(self, repeat):
+        timings = []
+        for _ in range(repeat):
+            if self.setup:
+                self.setup()
+            start = time.perf_counter()
+            self.run()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        if self.setup:
+            self.setup()
+        with CaptureQueriesContext(connection) as captured:
+            self.run()
+        # Read the count now: the next request resets the connection's query log.
+        queries = len(captured)
+
+        if self.setup:
+            self.setup()
+        tracemalloc.start()
+        try:
+            self.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'queries': queries,
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+
+def build_scenarios():
+    user, _ = User.objects.get_or_create(username='benchmark-user')
+    admin, _ = User.objects.get_or_create(username='benchmark-admin', defaults={'is_staff': True})
+    reader = APIClient()
+    reader.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    writer = APIClient()
+    writer.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    product = Product.objects.order_by('pk').first()
+    order = Order.objects.order_by('pk').first()
+    search_term = product.name.split()[1].lower()
+
+    def get(url, params=None):
+        response = reader.get(url, params)
+        assert response.status_code == 200, response.status_code
+
+    def create_product():
+        response = writer.post(reverse('product-list'),
+                               {'name': next(_created_names), 'price': '9.99', 'available': True},
+                               format='json')
+        assert response.status_code == 201, response.status_code
+
+    def total_price():
+        Order.objects.get(pk=order.pk).total_price()
+
+    def annotated_total_price():
+        Order.objects.annotate_totals().get(pk=order.pk).total_price()
+
+    return [
+        Scenario('product_list', lambda: get(reverse('product-list')), setup=cache.clear),
+        Scenario('product_list_cached', lambda: get(reverse('product-list'))),
+        Scenario('product_retrieve', lambda: get(reverse('product-detail', args=[product.pk])),
+                 setup=cache.clear),
+        Scenario('product_search', lambda: get(reverse('product-list'), {'search': search_term}),
+                 setup=cache.clear),
+        Scenario('product_create', create_product),
+        Scenario('order_list', lambda: get(reverse('order-list'))),
+        Scenario('order_total_price', total_price),
+        Scenario('order_total_price_annotated', annotated_total_price),
+    ]
+
+
+def run_suite(scales=DEFAULT_SCALES, repeat=20, seed=0, progress=None):
+    """
+    Grow the dataset to each scale in turn and measure every scenario on it.
+    Returns ``{scale: {scenario: metrics}}`` with string keys for JSON.
+    """
+    results = {}
+    loaded = {'products': 0, 'customers': 0, 'orders': 0}
+    for scale in sorted(scales):
+        target = dataset_sizes(scale)
+        synthetic.generate(seed=seed + scale, **{name: target[name] - loaded[name] for name in target})
+        loaded = target
+        results[str(scale)] = {}
+        for scenario in build_scenarios():
+            if progress:
+                progress(f'{scale} rows: {scenario.name}')
+            results[str(scale)][scenario.name] = scenario.measure(repeat)
+    return results
+
+
+def run_contention(buyers=200, threads=8, stock=50, quantity=1, max_attempts=20):
+    """
+    ``buyers`` orders for one hot product with ``stock`` units, placed from
+    ``threads`` threads with their own connections. Lock timeouts and
+    deadlocks reported by the database are retried, up to ``max_attempts``
+    per buyer. Needs committed data, so don't run it inside a test
+    transaction.
+
+    Reports throughput and checks the outcome: exactly
+    ``stock // quantity`` buyers (or all of them) get an order, the rest are
+    told it sold out, and the stock left plus the units sold equals ``stock``.
+    """
+    customer = Customer.objects.create(name='Contention buyer', address='Hot product lane')
+    product = Product.objects.create(name=f'Contention product {time.monotonic_ns()}', price='1.00',
+                                     available=True, stock=stock)
+    pending = queue.SimpleQueue()
+    for _ in range(buyers):
+        pending.put(None)
+    outcomes = {'placed': 0, 'sold_out': 0, 'retries': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def buy():
+        for attempt in range(max_attempts):
+            try:
+                place_order(customer, [(product.pk, quantity)])
+                return 'placed', attempt
+            except OrderNotPlaced:
+                return 'sold_out', attempt
+            except OperationalError:
+                # Jittered backoff, so retries don't collide again in lockstep.
+                time.sleep(random.uniform(0, 0.001 * 2 ** min(attempt, 6)))
+        return 'failed', max_attempts - 1
+
+    def worker():
+        try:
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    return
+                outcome, retries = buy()
+                with lock:
+                    outcomes[outcome] += 1
+                    outcomes['retries'] += retries
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    product.refresh_from_db()
+    orders = Order.objects.filter(products=product).count()
+    expected = min(buyers, stock // quantity)
+    return dict(
+        outcomes,
+        buyers=buyers,
+        threads=threads,
+        stock=stock,
+        stock_left=product.stock,
+        elapsed_ms=round(elapsed * 1000, 3),
+        orders_per_second=round(buyers / elapsed, 1) if elapsed else None,
+        correct=(outcomes['placed'] == orders == expected
+                 and product.stock + outcomes['placed'] * quantity == stock),
+    )
+
+
+def metadata(repeat):
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions of ``results`` against ``baseline``: any scenario whose median
+    latency grew by more than ``threshold`` (a fraction) or that issues more
+    queries. Scenarios missing from either side are ignored.
+    """
+    regressions = []
+    for scale, scenarios in results.items():
+        for name, metrics in scenarios.items():
+            previous = baseline.get(scale, {}).get(name)
+            if previous is None:
+                continue
+            limit = previous['median_ms'] * (1 + threshold)
+            if metrics['median_ms'] > limit:
+                regressions.append(
+                    f"{scale}/{name}: median {metrics['median_ms']} ms > {limit:.3f} ms "
+                    f"(baseline {previous['median_ms']} ms)"
+                )
+            if metrics['queries'] > previous['queries']:
+                regressions.append(
+                    f"{scale}/{name}: {metrics['queries']} queries (baseline {previous['queries']})"
+                )
+    return regressions
@@ -0,0 +1,288 @@
+import itertools
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.serializers import ListSerializer
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+from .parsers import FastJSONParser, NDJSONParser
+from .tasks import bulk_write
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def item_error(index, errors):
+    if not isinstance(errors, dict):
+        errors = {api_settings.NON_FIELD_ERRORS_KEY: errors if isinstance(errors, list) else [errors]}
+    return {'index': index, 'errors': errors}
+
+
+class BulkModelMixin:
+    """
+    Adds a ``bulk/`` list route to a ModelViewSet.
+
+    ``POST`` creates, ``PATCH`` partially updates (each item carries its
+    ``id``) and ``DELETE`` removes (a list of ids) many rows from a JSON array
+    or NDJSON body. Items are validated by the viewset's serializer and written
+    with ``bulk_create``/``bulk_update`` in chunks of ``bulk_batch_size``, each
+    chunk in its own transaction. Invalid items are reported by index and
+    skipped without failing the rest. When ``bulk_upsert_fields`` is set,
+    ``POST`` updates rows that collide on those unique fields instead of
+    failing, overwriting only the fields each item sent.
+
+    With ``Prefer: respond-async`` the items are queued as a ``bulk_write``
+    job instead and the answer is 202 with the job's URL under ``jobs/``,
+    which holds the summary once a worker has run it.
+    """
+    bulk_batch_size = 500
+    bulk_upsert_fields = ()
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk',
+            parser_classes=[FastJSONParser, NDJSONParser])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items.']})
+
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            job = bulk_write.enqueue(resource=self.basename, method=request.method, items=items)
+            location = reverse('job-detail', args=[job.pk], request=request)
+            return Response({'job': job.pk, 'status': job.status, 'url': location},
+                            status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+        summary, response_status = self.run_bulk(request.method, items)
+        return Response(summary, status=response_status)
+
+    def run_bulk(self, method, items):
+        """Write ``items`` for the HTTP ``method``; returns the summary and its status code."""
+        handler = {
+            'POST': self.bulk_create_chunk,
+            'PATCH': self.bulk_update_chunk,
+            'DELETE': self.bulk_delete_chunk,
+        }[method]
+        summary = {'created': 0, 'updated': 0, 'deleted': 0, 'errors': []}
+
+        for number, chunk in enumerate(chunked(items, self.bulk_batch_size)):
+            offset = number * self.bulk_batch_size
+            try:
+                with transaction.atomic():
+                    counts, errors = handler(chunk, offset)
+            except DatabaseError as exc:
+                counts = {}
+                errors = [item_error(offset + i, [str(exc)]) for i in range(len(chunk))]
+            for key, value in counts.items():
+                summary[key] += value
+            summary['errors'].extend(errors)
+
+        written = summary['created'] + summary['updated'] + summary['deleted']
+        if not summary['errors']:
+            response_status = status.HTTP_200_OK
+        elif written:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return summary, response_status
+
+    def get_bulk_serializer(self, partial=False):
+        """
+        One serializer reused for every item of a chunk, so fields are only
+        built once.
+        """
+        serializer = self.get_serializer(partial=partial)
+        if not partial:
+            for name in self.bulk_upsert_fields:
+                field = serializer.fields[name]
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        return serializer
+
+    def preload_related(self, serializer, chunk):
+        """
+        Load every related object referenced by the chunk with one query per
+        related model, for ``PreloadedPrimaryKeyRelatedField`` to look up.
+        Relations of nested list serializers (order ``items``) are included.
+        """
+        ids = {}
+        self.collect_related_ids(serializer, chunk, ids)
+        related = {}
+        for model, (queryset, pks) in ids.items():
+            related[model] = queryset.in_bulk(pks)
+        serializer.context['related_objects'] = related
+
+    def collect_related_ids(self, serializer, items, ids):
+        for name, field in serializer.fields.items():
+            if field.read_only:
+                continue
+            values = [item.get(name) if isinstance(item, dict) else None for item in items]
+            if isinstance(field, ListSerializer):
+                nested = [value for value_list in values if isinstance(value_list, list) for value in value_list]
+                self.collect_related_ids(field.child, nested, ids)
+                continue
+            many = isinstance(field, ManyRelatedField)
+            field = field.child_relation if many else field
+            if not isinstance(field, PrimaryKeyRelatedField):
+                continue
+            queryset = field.get_queryset()
+            pks = ids.setdefault(queryset.model, (queryset, set()))[1]
+            for value in values:
+                for pk in (value if many and isinstance(value, list) else [value]):
+                    if isinstance(pk, (int, str)):
+                        pks.add(pk)
+
+    def coerce_pk(self, value):
+        try:
+            return self.get_queryset().model._meta.pk.to_python(value)
+        except DjangoValidationError:
+            return None
+
+    def validate_chunk(self, chunk, offset, instances=None):
+        """
+        Returns ``(index, instance, validated_data)`` for each valid item and
+        the errors of the others. ``instances`` maps ids to the objects being
+        updated, for partial updates.
+        """
+        serializer = self.get_bulk_serializer(partial=instances is not None)
+        self.preload_related(serializer, chunk)
+        valid, errors = [], []
+        for position, item in enumerate(chunk):
+            index = offset + position
+            if not isinstance(item, dict):
+                errors.append(item_error(index, ['Expected an object.']))
+                continue
+            instance = None
+            if instances is not None:
+                instance = instances.get(self.coerce_pk(item.get('id')))
+                if instance is None:
+                    errors.append(item_error(index, {'id': ['No object with this id.']}))
+                    continue
+            serializer.instance = instance
+            serializer.initial_data = item
+            try:
+                valid.append((index, instance, serializer.run_validation(item)))
+            except ValidationError as exc:
+                errors.append(item_error(index, exc.detail))
+        return valid, errors
+
+    def split_many_to_many(self, validated_data):
+        model = self.get_queryset().model
+        m2m = {}
+        for field in model._meta.many_to_many:
+            if field.name in validated_data:
+                m2m[field.name] = validated_data.pop(field.name)
+        return m2m
+
+    def write_many_to_many(self, objs_with_m2m):
+        model = self.get_queryset().model
+        for field in model._meta.many_to_many:
+            rows = [(obj, m2m[field.name]) for obj, m2m in objs_with_m2m if field.name in m2m]
+            if not rows:
+                continue
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            through.objects.filter(**{f'{source}__in': [obj.pk for obj, _ in rows]}).delete()
+            through.objects.bulk_create(
+                through(**{f'{source}_id': obj.pk, f'{target}_id': related.pk})
+                for obj, values in rows for related in values
+            )
+        self.after_bulk_write([obj for obj, _ in objs_with_m2m])
+
+    def after_bulk_write(self, objs):
+        """Hook for keeping derived data current after a bulk write."""
+
+    def bulk_create_chunk(self, chunk, offset):
+        valid, errors = self.validate_chunk(chunk, offset)
+        model = self.get_queryset().model
+        rows = []
+        for index, _, data in valid:
+            m2m = self.split_many_to_many(data)
+            rows.append((model(**data), m2m))
+        if not rows:
+            return {}, errors
+
+        if not self.bulk_upsert_fields:
+            model._default_manager.bulk_create([obj for obj, _ in rows])
+            self.write_many_to_many(rows)
+            return {'created': len(rows)}, errors
+
+        # Each item only overwrites the fields it sent, so rows are grouped
+        # by their sent fields and each group upserted on its own.
+        updatable = {
+            field.name: field for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in self.bulk_upsert_fields and field.editable
+        }
+        # Later items with the same key are applied over earlier ones, as
+        # they would be if they had been sent one by one.
+        keyed = {}
+        for (index, _, _), (obj, m2m) in zip(valid, rows):
+            key = tuple(getattr(obj, name) for name in self.bulk_upsert_fields)
+            sent = {name for name in chunk[index - offset] if name in updatable}
+            if key in keyed:
+                previous, previous_m2m, previous_sent = keyed[key]
+                for name in sent:
+                    attname = updatable[name].attname
+                    setattr(previous, attname, getattr(obj, attname))
+                previous_m2m.update(m2m)
+                previous_sent.update(sent)
+            else:
+                keyed[key] = (obj, m2m, sent)
+        rows = [(obj, m2m) for obj, m2m, _ in keyed.values()]
+        key_lookup = {f'{name}__in': {key[i] for key in keyed}
+                      for i, name in enumerate(self.bulk_upsert_fields)}
+        existing = set(model._default_manager.filter(**key_lookup).values_list(*self.bulk_upsert_fields))
+
+        groups = {}
+        for obj, _, sent in keyed.values():
+            groups.setdefault(frozenset(sent), []).append(obj)
+        for sent, objs in groups.items():
+            update_fields = [name for name in updatable if name in sent]
+            model._default_manager.bulk_create(
+                objs,
+                update_conflicts=bool(update_fields),
+                ignore_conflicts=not update_fields,
+                unique_fields=self.bulk_upsert_fields if update_fields else None,
+                update_fields=update_fields or None,
+            )
+        self.write_many_to_many(rows)
+        updated = len(existing.intersection(keyed))
+        return {'created': len(rows) - updated, 'updated': updated}, errors
+
+    def bulk_update_chunk(self, chunk, offset):
+        model = self.get_queryset().model
+        ids = {self.coerce_pk(item.get('id')) for item in chunk if isinstance(item, dict)}
+        instances = model._default_manager.in_bulk(ids - {None})
+        valid, errors = self.validate_chunk(chunk, offset, instances=instances)
+        objs, fields, rows = {}, set(), []
+        for index, obj, data in valid:
+            m2m = self.split_many_to_many(data)
+            for name, value in data.items():
+                setattr(obj, name, value)
+            fields.update(data)
+            objs[obj.pk] = obj
+            rows.append((obj, m2m))
+        if fields:
+            model._default_manager.bulk_update(objs.values(), sorted(fields))
+        if rows:
+            self.write_many_to_many(rows)
+        return {'updated': len(objs)}, errors
+
+    def bulk_delete_chunk(self, chunk, offset):
+        model = self.get_queryset().model
+        ids = [self.coerce_pk(item.get('id') if isinstance(item, dict) else item) for item in chunk]
+        existing = set(model._default_manager.filter(pk__in=[pk for pk in ids if pk is not None])
+                       .values_list('pk', flat=True))
+        errors = [item_error(offset + position, {'id': ['No object with this id.']})
+                  for position, pk in enumerate(ids) if pk not in existing]
+        if existing:
+            model._default_manager.filter(pk__in=existing).delete()
+        return {'deleted': len(existing)}, errors
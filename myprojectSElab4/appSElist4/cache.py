@@ -0,0 +1,92 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import primary_reads
+
+PRODUCTS = 'products'
+ORDERS = 'orders'
+
+
+def _version_key(namespace):
+    return f'api-cache-version:{namespace}'
+
+
+def get_version(namespace):
+    """
+    Current version of ``namespace``. Cached responses embed it in their key,
+    so bumping it invalidates every entry of the namespace at once.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never reuses an
+        # older number whose entries may still be cached.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """
+    Invalidate ``namespace`` once the current transaction commits (at once
+    outside one). Bumping earlier would let a concurrent read cache the
+    rows from before the commit under the new version.
+    """
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def _bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.add(_version_key(namespace), time.time_ns(), None)
+
+
+class CachedReadMixin:
+    """
+    Serve ``list`` and ``retrieve`` from Django's cache, keyed on the request
+    path and query parameters under a versioned namespace, with ETag and
+    ``If-None-Match`` support. Permission checks still run on every request.
+    Misses are filled from the primary, as a lagging replica would otherwise
+    store rows from before the write that bumped the version.
+    """
+    cache_namespace = None
+
+    def get_cache_key(self, request):
+        params = sorted(
+            (key, value) for key, values in request.query_params.lists() for value in values
+        )
+        raw = '|'.join([request.get_host(), request.path, repr(params)])
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f'api-cache:{self.cache_namespace}:{get_version(self.cache_namespace)}:{digest}'
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        key = self.get_cache_key(request)
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        headers = {'ETag': etag}
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = cache.get(key)
+        if data is None:
+            with primary_reads():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
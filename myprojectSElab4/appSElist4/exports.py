@@ -0,0 +1,137 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+
+from .models import Product, Customer, Order, OrderItem
+from .renderers import iter_render
+
+DEFAULT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def product_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    yield from queryset.values('id', 'name', 'price', 'available', 'stock').iterator(chunk_size=chunk_size)
+
+
+def customer_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    yield from queryset.values('id', 'name', 'address').iterator(chunk_size=chunk_size)
+
+
+def order_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Orders with their product ids, items and stored totals. The products and
+    items of each chunk are fetched with one extra query each while the
+    chunk is streamed.
+    """
+    queryset = queryset.prefetch_related(None).prefetch_related(
+        Prefetch('products', queryset=Product.objects.only('id').order_by('id')),
+        Prefetch('items', queryset=OrderItem.objects.only('order_id', 'product_id', 'quantity', 'unit_price')),
+    )
+    for order in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'id': order.id,
+            'customer': order.customer_id,
+            'date': order.date,
+            'status': order.status,
+            'total_amount': order.total_amount,
+            'fulfillable': order.fulfillable,
+            'products': [product.id for product in order.products.all()],
+            'items': [
+                {'product': item.product_id, 'quantity': item.quantity, 'unit_price': item.unit_price}
+                for item in order.items.all()
+            ],
+        }
+
+
+EXPORTS = {
+    'products': (Product, product_rows, ['id', 'name', 'price', 'available', 'stock']),
+    'customers': (Customer, customer_rows, ['id', 'name', 'address']),
+    'orders': (Order, order_rows,
+               ['id', 'customer', 'date', 'status', 'total_amount', 'fulfillable', 'products', 'items']),
+}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def json_chunks(rows):
+    """One JSON array, encoded in buffered chunks with the NDJSON value encoding."""
+    for chunk in iter_render(rows, default=DjangoJSONEncoder().default):
+        yield chunk.decode()
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    """
+    Lists become space-separated values and dicts their ``:``-joined values,
+    so an order's items read ``product:quantity:unit_price``.
+    """
+    if isinstance(value, list):
+        return ' '.join(str(csv_value(item)) for item in value)
+    if isinstance(value, dict):
+        return ':'.join(str(item) for item in value.values())
+    return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([csv_value(row[field]) for field in fields])
+
+
+def export_lines(name, export_format, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily encode the ``name`` export (``products``, ``customers`` or
+    ``orders``) as ``ndjson`` or ``csv`` lines or a ``json`` array, never
+    holding more than one chunk of rows in memory.
+    """
+    model, row_function, fields = EXPORTS[name]
+    if queryset is None:
+        queryset = model.objects.all()
+    rows = row_function(queryset.order_by('pk'), chunk_size=chunk_size)
+    if export_format == 'csv':
+        return csv_lines(rows, fields)
+    if export_format == 'json':
+        return json_chunks(rows)
+    return ndjson_lines(rows)
+
+
+class ExportMixin:
+    """
+    Adds an ``export/`` list route streaming every row matching the view's
+    filters as NDJSON (default) or CSV (``?export_format=csv``).
+    """
+    export_name = None
+    export_chunk_size = DEFAULT_CHUNK_SIZE
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in CONTENT_TYPES:
+            raise ValidationError({'export_format': [f'Choose one of: {", ".join(sorted(CONTENT_TYPES))}.']})
+        # Start from the plain manager so list-only annotations and prefetches
+        # are not computed for every exported row.
+        queryset = self.filter_queryset(self.get_queryset().model._default_manager.all())
+        response = StreamingHttpResponse(
+            export_lines(self.export_name, export_format, queryset, chunk_size=self.export_chunk_size),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{export_format}"'
+        return response
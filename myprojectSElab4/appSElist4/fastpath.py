@@ -0,0 +1,226 @@
+"""
+Serializer-free list responses built straight from ``.values()`` rows.
+
+``values_plan`` inspects a serializer's (possibly ``?fields=``-trimmed)
+fields once per request and maps each one onto a database column plus a
+cheap converter that reproduces the field's ``to_representation``. Fields it
+does not know how to reproduce make the plan ``None`` and the view falls
+back to the regular serializer, so output never silently changes.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a database value is the value itself.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+)
+
+
+def decimal_formatter(field):
+    """Mirror ``DecimalField.to_representation`` with string coercion."""
+    exponent = Decimal(1).scaleb(-field.decimal_places) if field.decimal_places is not None else None
+
+    def convert(value):
+        if value is None:
+            return None
+        if exponent is not None:
+            value = value.quantize(exponent, rounding=field.rounding)
+        return '{:f}'.format(value)
+    return convert
+
+
+def format_datetime(value):
+    """Mirror ``DateTimeField.to_representation`` for ISO 8601 output."""
+    if not value:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class ValuesPlan:
+    """
+    Column list and converters for one serializer. ``represent`` turns a page
+    of ``.values()`` rows into the same dicts the serializer would produce.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = ['id']
+        self.fields = []
+        self.many = {}
+        self.nested = {}
+        # Many-to-many fields read off the rows of a nested list of their
+        # through model, as ``{name: (nested name, target column)}``.
+        self.derived = {}
+
+    def add(self, name, column, convert=None):
+        if column not in self.columns:
+            self.columns.append(column)
+        self.fields.append((name, column, convert))
+
+    def related_querysets(self, ids):
+        """
+        ``(name, queryset, owner, value)`` per many-to-many field and nested
+        list: ``owner(row)`` is the pk a row belongs to, ``value(row)`` what
+        is collected for it.
+        """
+        for name, model_field in self.many.items():
+            through = model_field.remote_field.through
+            source = through._meta.get_field(model_field.m2m_field_name()).attname
+            target = through._meta.get_field(model_field.m2m_reverse_field_name()).attname
+            rows = through._default_manager.filter(**{f'{source}__in': ids}).order_by(target)
+            yield name, rows.values_list(source, target), itemgetter(0), itemgetter(1)
+        for name, (relation, child) in self.nested.items():
+            # Rows come in the related model's default ordering, as they
+            # would from ``instance.<relation>.all()``.
+            fk = relation.field.attname
+            columns = [fk, *child.columns]
+            columns += [target for nested, target in self.derived.values() if nested == name]
+            rows = relation.related_model._default_manager.filter(**{f'{fk}__in': ids})
+            yield name, rows.values(*dict.fromkeys(columns)), itemgetter(fk), None
+
+    def finish_related(self, loaded):
+        for name, (nested, target) in self.derived.items():
+            loaded[name] = {pk: sorted(row[target] for row in rows) for pk, rows in loaded[nested].items()}
+        for name, (relation, child) in self.nested.items():
+            loaded[name] = {pk: child.build(rows, {}) for pk, rows in loaded[name].items()}
+        return loaded
+
+    def load_related(self, ids):
+        """One query per many-to-many field or nested list: ``{name: {pk: [values]}}``."""
+        loaded = {}
+        for name, rows, owner, value in self.related_querysets(ids):
+            grouped = loaded[name] = defaultdict(list)
+            for row in rows:
+                grouped[owner(row)].append(value(row) if value else row)
+        return self.finish_related(loaded)
+
+    async def aload_related(self, ids):
+        """``load_related`` for async views."""
+        loaded = {}
+        for name, rows, owner, value in self.related_querysets(ids):
+            grouped = loaded[name] = defaultdict(list)
+            async for row in rows:
+                grouped[owner(row)].append(value(row) if value else row)
+        return self.finish_related(loaded)
+
+    def build(self, rows, related):
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.fields:
+                if name in related:
+                    item[name] = related[name].get(row['id'], [])
+                elif convert is None:
+                    item[name] = row[column]
+                else:
+                    item[name] = convert(row[column])
+            data.append(item)
+        return data
+
+    def represent(self, rows):
+        related = self.load_related([row['id'] for row in rows]) if (self.many or self.nested) and rows else {}
+        return self.build(rows, related)
+
+    async def arepresent(self, rows):
+        related = (await self.aload_related([row['id'] for row in rows])
+                   if (self.many or self.nested) and rows else {})
+        return self.build(rows, related)
+
+
+def values_plan(serializer):
+    """Build a ``ValuesPlan`` for ``serializer``, or None if it is not supported."""
+    model = serializer.Meta.model
+    opts = model._meta
+    plan = ValuesPlan(model)
+    for name, field in serializer.fields.items():
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, serializers.ListSerializer):
+            # Reverse foreign keys, such as an order's items, as nested rows.
+            if not model_field.one_to_many or not isinstance(field.child, serializers.ModelSerializer):
+                return None
+            child = values_plan(field.child)
+            if child is None or child.many or child.nested:
+                return None
+            plan.nested[name] = (model_field, child)
+            plan.add(name, 'id')
+        elif isinstance(field, serializers.ManyRelatedField):
+            if not isinstance(field.child_relation, serializers.PrimaryKeyRelatedField) or field.child_relation.pk_field:
+                return None
+            plan.many[name] = model_field
+            plan.add(name, 'id')
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                return None
+            plan.add(name, model_field.attname)
+        elif isinstance(field, serializers.DecimalField):
+            coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            if not coerce or field.localize or getattr(field, 'normalize_output', False):
+                return None
+            plan.add(name, model_field.attname, decimal_formatter(field))
+        elif isinstance(field, serializers.DateTimeField):
+            if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+                return None
+            plan.add(name, model_field.attname, format_datetime)
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            plan.add(name, model_field.attname)
+        else:
+            return None
+
+    for name, model_field in list(plan.many.items()):
+        through = model_field.remote_field.through
+        for nested, (relation, child) in plan.nested.items():
+            if relation.related_model is through and relation.field.name == model_field.m2m_field_name():
+                target = through._meta.get_field(model_field.m2m_reverse_field_name()).attname
+                plan.derived[name] = (nested, target)
+                del plan.many[name]
+                break
+    return plan
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from ``.values()`` rows instead of model instances and
+    ``ModelSerializer`` whenever ``values_plan`` supports the serializer.
+    Set ``fast_list = False`` on a view to always use the serializer.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        plan = values_plan(self.get_serializer()) if self.fast_list else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = list(plan.columns)
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        if get_ordering is not None:
+            # The cursor paginator reads its position from the ordering key.
+            for name in get_ordering(request, queryset, self):
+                if name.lstrip('-') not in columns:
+                    columns.append(name.lstrip('-'))
+        rows = queryset.prefetch_related(None).values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.represent(page))
+        return Response(plan.represent(list(rows)))
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class FieldFilter(BaseFilterBackend):
+    """
+    Filters on the query parameters declared in the view's ``filter_fields``,
+    a mapping of parameter name to ``(lookup, model field name)``, e.g.
+    ``{'min_price': ('price__gte', 'price')}``. Values are parsed with the
+    model field, so malformed input is a 400 rather than a database error.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        for param, (lookup, field_name) in getattr(view, 'filter_fields', {}).items():
+            raw = request.query_params.get(param)
+            if raw in (None, ''):
+                continue
+            try:
+                filters[lookup] = self.parse(queryset.model._meta.get_field(field_name), raw)
+            except DjangoValidationError as exc:
+                raise ValidationError({param: exc.messages})
+            except ValidationError as exc:
+                raise ValidationError({param: exc.detail})
+        return queryset.filter(**filters)
+
+    def parse(self, field, raw):
+        if isinstance(field, models.BooleanField):
+            # Accepts 'true'/'false' as well as Django's 'True'/'1'/...
+            return serializers.BooleanField().to_internal_value(raw)
+        if isinstance(field, models.ForeignKey):
+            return field.target_field.to_python(raw)
+        value = field.to_python(raw)
+        if field.choices:
+            field.validate(value, None)
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
@@ -0,0 +1,225 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('appSElist4.perf')
+
+# The metrics of the request being handled in the current thread or task.
+# Context variables follow async views into ``sync_to_async`` ORM calls and
+# keep concurrent requests on one event loop apart.
+_active_metrics = ContextVar('perf_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Per-request counters, filled by ``QueryInstrumentationMiddleware`` (SQL)
+    and ``InstrumentedViewMixin`` (serialization and rendering).
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.connects = 0
+        self.serialize_ms = None
+        self.render_ms = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def db_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicate_queries(self):
+        """SQL statements issued more than once; repeated lookups usually mean an N+1."""
+        return {sql: count for sql, count in Counter(sql for sql, _ in self.queries).items() if count > 1}
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute_wrapper that hands each query to the current request's
+    ``RequestMetrics``, so queries are counted without DEBUG's query log.
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection=None, **kwargs):
+    """
+    Add ``record_query`` to ``connection`` (or every connection of this
+    thread). Also connected to ``connection_created``, which reaches the
+    per-thread connections that async views' ORM calls run on, and counts
+    the connection (or pool checkout) against the current request. The
+    wrapper stays installed: it is a no-op outside an instrumented request.
+    """
+    if connection is not None:
+        metrics = _active_metrics.get()
+        if metrics is not None:
+            metrics.connects += 1
+    for connection in [connection] if connection is not None else connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+def pool_metrics():
+    """
+    Snapshot of every connection pool (``DB_POOL``), keyed by alias:
+    checkouts so far, average wait for a connection, connections in use and
+    idle, clients waiting, and saturation (in use / max size).
+    """
+    pools = {}
+    for alias in connections:
+        connection = connections[alias]
+        if not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            continue
+        pool = getattr(connection, 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        checkouts = stats.get('requests_num', 0)
+        pools[alias] = {
+            'checkouts': checkouts,
+            'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / checkouts, 2) if checkouts else 0.0,
+            'in_use': in_use,
+            'idle': stats.get('pool_available', 0),
+            'waiting': stats.get('requests_waiting', 0),
+            'saturation': round(in_use / stats['pool_max'], 2) if stats.get('pool_max') else None,
+        }
+    return pools
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the query count, database time, connections opened, duplicate
+    queries, view timings and response size of each request, plus a snapshot
+    of any connection pools (``pool_metrics``). Exposes them in a ``Server-Timing``
+    header (when ``PERF_SERVER_TIMING`` is on) and logs them as a JSON line on
+    the ``appSElist4.perf`` logger: at INFO level normally, and at WARNING
+    level with the captured SQL once the request takes longer than
+    ``PERF_SLOW_REQUEST_MS``. Works in both sync and async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token, start = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _active_metrics.reset(token)
+        self.report(request, response, metrics, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token, start = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_metrics.reset(token)
+        self.report(request, response, metrics, (time.perf_counter() - start) * 1000)
+        return response
+
+    def begin(self, request):
+        install_query_recorder()
+        metrics = request.perf_metrics = RequestMetrics()
+        return metrics, _active_metrics.set(metrics), time.perf_counter()
+
+    def report(self, request, response, metrics, total_ms):
+        pools = pool_metrics()
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = self.server_timing(metrics, total_ms, pools)
+
+        duplicates = metrics.duplicate_queries()
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(metrics.db_ms, 2),
+            'queries': metrics.query_count,
+            'db_connects': metrics.connects,
+            'duplicate_queries': sum(duplicates.values()),
+            'serialize_ms': metrics.serialize_ms and round(metrics.serialize_ms, 2),
+            'render_ms': metrics.render_ms and round(metrics.render_ms, 2),
+            'response_bytes': None if response.streaming else len(response.content),
+        }
+        if pools:
+            record['pools'] = pools
+        if total_ms >= getattr(settings, 'PERF_SLOW_REQUEST_MS', 500):
+            limit = getattr(settings, 'PERF_SLOW_QUERY_LOG_LIMIT', 20)
+            slowest = sorted(metrics.queries, key=lambda query: query[1], reverse=True)[:limit]
+            record['slow_queries'] = [{'sql': sql, 'ms': round(duration, 2)} for sql, duration in slowest]
+            record['duplicates'] = duplicates
+            logger.warning(json.dumps(record), extra={'perf': record})
+        else:
+            logger.info(json.dumps(record), extra={'perf': record})
+
+    def server_timing(self, metrics, total_ms, pools=None):
+        entries = [f'db;dur={metrics.db_ms:.2f};desc="{metrics.query_count} queries"']
+        if metrics.connects:
+            entries.append(f'connect;desc="{metrics.connects} connections opened"')
+        for alias, pool in (pools or {}).items():
+            entries.append(f'pool-{alias};desc="{pool["in_use"]} in use, {pool["waiting"]} waiting"')
+        duplicates = sum(metrics.duplicate_queries().values())
+        if duplicates:
+            entries.append(f'dupes;desc="{duplicates} duplicate queries"')
+        if metrics.serialize_ms is not None:
+            entries.append(f'serialize;dur={metrics.serialize_ms:.2f}')
+        if metrics.render_ms is not None:
+            entries.append(f'render;dur={metrics.render_ms:.2f}')
+        entries.append(f'total;dur={total_ms:.2f}')
+        return ', '.join(entries)
+
+
+class InstrumentedViewMixin:
+    """
+    Adds serialization and rendering time to the request's metrics.
+    Serialization is the time the handler spends outside the database;
+    rendering is timed by rendering the response here instead of later in
+    the request cycle.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        metrics = getattr(request._request, 'perf_metrics', None)
+        if metrics is not None:
+            self._handler_started = (time.perf_counter(), metrics.db_ms)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        metrics = getattr(request._request, 'perf_metrics', None)
+        started = getattr(self, '_handler_started', None)
+        if metrics is None:
+            return response
+        if started is not None:
+            handler_ms = (time.perf_counter() - started[0]) * 1000
+            metrics.serialize_ms = max(handler_ms - (metrics.db_ms - started[1]), 0.0)
+        if hasattr(response, 'render') and not response.is_rendered:
+            start = time.perf_counter()
+            response.render()
+            metrics.render_ms = (time.perf_counter() - start) * 1000
+        return response
@@ -0,0 +1,162 @@
+"""
+A small job queue kept in the database, for work too slow for a request.
+
+Functions decorated with ``@task`` can be queued with ``func.enqueue(**kwargs)``
+(keyword arguments must be JSON serializable) and are run by the
+``run_worker`` command on a thread or process pool. Because jobs are rows,
+enqueueing inside a transaction only queues the job if the transaction
+commits.
+
+Workers claim ready jobs, highest ``priority`` first, with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so concurrent workers never wait on
+each other's rows. SQLite has no row locks; there a conditional UPDATE does
+the claiming, which is safe since SQLite serializes writers. A job that
+raises is retried after an exponential backoff until it has been tried
+``max_attempts`` times; a worker that dies mid-job leaves it ``running``
+until its lease of ``JOB_LEASE_SECONDS`` runs out and another worker takes
+it over. ``run_worker`` renews the leases of the jobs it is still running, so
+only a dead worker's jobs expire. Jobs therefore run at least once, and tasks
+should be idempotent.
+
+SQLite locks whole tables, so pool threads writing the queue at the same time
+can get "database table is locked" instead of waiting; claims are serialized
+within the process and queue writes retried with a short backoff.
+"""
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+LOCK_RETRIES = 8
+
+_claim_lock = threading.Lock()
+
+
+def task(name=None, max_attempts=5):
+    """Register a function as a task under ``name`` (its qualified name by default)."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        TASKS[task_name] = func
+
+        def enqueue(priority=0, run_at=None, **kwargs):
+            return Job.objects.create(task=task_name, kwargs=kwargs, priority=priority,
+                                      run_at=run_at or timezone.now(), max_attempts=max_attempts)
+        func.task_name = task_name
+        func.enqueue = enqueue
+        return func
+    return register
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_locked(func, *args, **kwargs):
+    """
+    Call ``func``, retrying with a short backoff while the database reports
+    a lock conflict (SQLite's table locks; other errors are raised at once).
+    """
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or attempt == LOCK_RETRIES - 1:
+                raise
+        time.sleep(0.01 * 2 ** attempt * random.uniform(0.5, 1.0))
+
+
+def claim_jobs(limit, worker=None):
+    """Mark up to ``limit`` ready jobs as running for ``worker`` and return them."""
+    db = router.db_for_write(Job)
+    if connections[db].features.has_select_for_update_skip_locked:
+        return _claim_jobs(db, limit, worker)
+    with _claim_lock:
+        return retry_locked(_claim_jobs, db, limit, worker)
+
+
+def _claim_jobs(db, limit, worker):
+    now = timezone.now()
+    claim = f'{worker or worker_name()}:{uuid.uuid4().hex[:8]}'
+    ready = (Job.objects.using(db).filter(status=Job.QUEUED, run_at__lte=now)
+             .order_by('-priority', 'run_at', 'id'))
+    with transaction.atomic(using=db):
+        if connections[db].features.has_select_for_update_skip_locked:
+            ids = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+        else:
+            # Another worker may pick the same ids; only one UPDATE below wins each.
+            ids = list(ready.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.using(db).filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=claim, locked_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.using(db).filter(locked_by=claim, status=Job.RUNNING)
+                .order_by('-priority', 'run_at', 'id'))
+
+
+def requeue_expired(lease=None):
+    """
+    Put jobs whose worker has held them longer than the lease back in the
+    queue, or fail them if that was their last attempt.
+    """
+    lease = lease if lease is not None else settings.JOB_LEASE_SECONDS
+    now = timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=lease))
+    failed = retry_locked(expired.filter(attempts__gte=F('max_attempts')).update,
+                          status=Job.FAILED, last_error='Lease expired.', finished_at=now)
+    requeued = retry_locked(expired.update, status=Job.QUEUED, locked_by='', locked_at=None, run_at=now)
+    return requeued + failed
+
+
+def renew_leases(jobs):
+    """Restart the lease of each of ``jobs`` still held under the claim it was handed out with."""
+    claims = {job.locked_by for job in jobs}
+    return retry_locked(
+        Job.objects.filter(pk__in=[job.pk for job in jobs], locked_by__in=claims, status=Job.RUNNING).update,
+        locked_at=timezone.now(),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: about ``JOB_RETRY_DELAY * 2 ** (attempts - 1)`` seconds."""
+    delay = min(settings.JOB_RETRY_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run_job(job_id):
+    """
+    Run a claimed job and record the outcome. The result is only written
+    while the job is still held under the same claim, so a worker whose
+    lease expired cannot overwrite the outcome of the one that took over.
+    """
+    job = retry_locked(Job.objects.get, pk=job_id)
+    try:
+        func = TASKS[job.task]
+        result = func(**job.kwargs)
+    except Exception:
+        record_failure(job, traceback.format_exc())
+        return False
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+    retry_locked(owned.update, status=Job.DONE, result=result, finished_at=timezone.now())
+    return True
+
+
+def record_failure(job, error):
+    """Queue ``job`` for a retry after a backoff, or fail it if that was its last attempt."""
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+    if job.attempts < job.max_attempts:
+        retry_locked(owned.update, status=Job.QUEUED, last_error=error, locked_by='', locked_at=None,
+                     run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)))
+    else:
+        retry_locked(owned.update, status=Job.FAILED, last_error=error, finished_at=timezone.now())
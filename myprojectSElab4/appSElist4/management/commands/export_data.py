@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from appSElist4.exports import CONTENT_TYPES, DEFAULT_CHUNK_SIZE, EXPORTS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream products, customers or orders to a file as NDJSON, CSV or a JSON array."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='export_format', choices=sorted(CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--output', help="File to write to; defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **kwargs):
+        lines = export_lines(kwargs['model'], kwargs['export_format'], chunk_size=kwargs['chunk_size'])
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
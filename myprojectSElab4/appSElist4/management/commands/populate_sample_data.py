@@ -1,9 +1,31 @@
+import time
+
 from django.core.management.base import BaseCommand
+from django.db import connection
+from appSElist4 import synthetic
 from appSElist4.models import Product, Customer, Order
 
 class Command(BaseCommand):
+    help = ("Replace the data with three sample products, customers and orders, or with a "
+            "large synthetic dataset when --products/--customers/--orders are given.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=0)
+        parser.add_argument('--customers', type=int, default=0)
+        parser.add_argument('--orders', type=int, default=0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows inserted and committed per transaction.")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Processes to generate rows in parallel (not supported on SQLite).")
+        parser.add_argument('--append', action='store_true',
+                            help="Add to the existing data instead of replacing it.")
 
     def handle(self, *args, **kwargs):
+        if kwargs['products'] or kwargs['customers'] or kwargs['orders']:
+            self.generate_synthetic_data(**kwargs)
+            return
+
         Product.objects.all().delete()
         Customer.objects.all().delete()
         Order.objects.all().delete()
@@ -55,3 +77,25 @@ class Command(BaseCommand):
 
 
         self.stdout.write("Sample data created successfully.")
+
+    def generate_synthetic_data(self, **kwargs):
+        workers = kwargs['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write("SQLite allows a single writer; generating with one process.")
+            workers = 1
+        if kwargs['orders'] and not (kwargs['customers'] or Customer.objects.exists()):
+            kwargs['customers'] = max(1, kwargs['orders'] // 10)
+        if kwargs['orders'] and not (kwargs['products'] or Product.objects.exists()):
+            kwargs['products'] = max(1, kwargs['orders'] // 10)
+
+        started = time.monotonic()
+        if not kwargs['append']:
+            synthetic.clear()
+        synthetic.generate_parallel(
+            products=kwargs['products'], customers=kwargs['customers'], orders=kwargs['orders'],
+            seed=kwargs['seed'], workers=workers, batch_size=kwargs['batch_size'],
+            progress=lambda model, done: self.stdout.write(f"{model}: {done}"),
+        )
+        elapsed = time.monotonic() - started
+        total = kwargs['products'] + kwargs['customers'] + kwargs['orders']
+        self.stdout.write(f"Generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s).")
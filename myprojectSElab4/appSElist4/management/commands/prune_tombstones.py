@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from appSElist4.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete delta sync tombstones older than SYNC_TOMBSTONE_DAYS in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        # Sync tokens this old are refused, so nothing reads these rows any more.
+        cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+        deleted = 0
+        while True:
+            batch = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            deleted += Tombstone.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(f"Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}.")
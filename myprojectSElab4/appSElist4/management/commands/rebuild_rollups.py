@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from appSElist4.analytics import parity_errors, rebuild, refresh_dirty_days
+
+
+class Command(BaseCommand):
+    help = "Rebuild the order analytics rollups, or check them against the raw orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=str, help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--end', type=str, help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--verify', action='store_true',
+                            help="Only bring dirty days up to date and compare the rollups with a raw "
+                                 "aggregation; exit with an error on any difference.")
+
+    def handle(self, *args, **kwargs):
+        try:
+            start = date.fromisoformat(kwargs['start']) if kwargs['start'] else None
+            end = date.fromisoformat(kwargs['end']) if kwargs['end'] else None
+        except ValueError:
+            raise CommandError("--start and --end must be dates in YYYY-MM-DD format.")
+
+        if not kwargs['verify']:
+            days = rebuild(start, end)
+            self.stdout.write(f"Rebuilt the rollups of {days} days.")
+            return
+
+        refresh_dirty_days(start, end)
+        errors = parity_errors(start, end)
+        for error in errors[:20]:
+            self.stderr.write(error)
+        if errors:
+            raise CommandError(f"{len(errors)} rollup rows differ from the raw orders.")
+        self.stdout.write("Rollups match the raw orders.")
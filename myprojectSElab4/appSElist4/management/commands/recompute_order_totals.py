@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+from appSElist4.models import Order
+from appSElist4.tasks import recompute_order_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized Order.total_amount and Order.fulfillable columns in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--verify', action='store_true',
+                            help="Only report stale rows; exit with an error if any are found.")
+        parser.add_argument('--background', action='store_true',
+                            help="Queue the recomputation as a job for run_worker instead.")
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        verify_only = kwargs['verify']
+        if kwargs['background'] and not verify_only:
+            job = recompute_order_totals.enqueue(batch_size=batch_size)
+            self.stdout.write(f"Queued job {job.pk}.")
+            return
+        checked = stale = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                Order.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+
+            with transaction.atomic():
+                stale_ids = list(
+                    Order.objects.filter(pk__in=batch).annotate_totals()
+                    .filter(~Q(total_amount=F('annotated_total_price'))
+                            | ~Q(fulfillable=F('annotated_fulfillable')))
+                    .values_list('pk', flat=True)
+                )
+                stale += len(stale_ids)
+                if stale_ids and not verify_only:
+                    Order.objects.filter(pk__in=stale_ids).refresh_totals()
+
+        if verify_only and stale:
+            raise CommandError(f"{stale} of {checked} orders have stale totals.")
+        action = "found" if verify_only else "fixed"
+        self.stdout.write(f"Checked {checked} orders, {action} {stale} with stale totals.")
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from appSElist4.outbox import get_sink, prune_relayed, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver outbox events to the OUTBOX_SINK in batches, polling until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when no events are waiting.")
+        parser.add_argument('--once', action='store_true',
+                            help="Deliver everything waiting, then exit.")
+
+    def handle(self, *args, **kwargs):
+        sink = get_sink()
+        batch_size = kwargs['batch_size']
+        relayed = 0
+        try:
+            while True:
+                sent = relay_batch(sink, batch_size)
+                relayed += sent
+                if sent:
+                    continue
+                # Caught up: a good moment to drop old delivered events.
+                prune_relayed(settings.OUTBOX_RETENTION_DAYS)
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Relayed {relayed} events.")
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from appSElist4.benchmarks import DEFAULT_SCALES, compare, metadata, run_contention, run_suite
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the API and model hot paths on a throwaway test database. "
+            "Run with --settings=myprojectSElab4.settings_sqlite to benchmark SQLite.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default=','.join(str(scale) for scale in DEFAULT_SCALES),
+                            help="Comma-separated dataset sizes, e.g. 1000,100000,1000000.")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--baseline', help="JSON report of an earlier run to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed median latency growth over the baseline, as a fraction.")
+        parser.add_argument('--contention-buyers', type=int, default=0,
+                            help="Also place this many concurrent orders for one hot product.")
+        parser.add_argument('--contention-threads', type=int, default=8)
+        parser.add_argument('--contention-stock', type=int, default=50)
+
+    def handle(self, *args, **kwargs):
+        try:
+            scales = [int(scale) for scale in kwargs['rows'].split(',')]
+        except ValueError:
+            raise CommandError("--rows must be a comma-separated list of integers.")
+        baseline = None
+        if kwargs['baseline']:
+            with open(kwargs['baseline'], encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_suite(scales, repeat=kwargs['repeat'], seed=kwargs['seed'],
+                                progress=lambda message: self.stderr.write(message))
+            contention = None
+            if kwargs['contention_buyers']:
+                self.stderr.write('contention: order placement')
+                contention = run_contention(kwargs['contention_buyers'], threads=kwargs['contention_threads'],
+                                            stock=kwargs['contention_stock'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {'meta': metadata(kwargs['repeat']), 'results': results}
+        if contention is not None:
+            report['contention'] = contention
+        report = json.dumps(report, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as output:
+                output.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+        if baseline is not None:
+            regressions = compare(results, baseline['results'], kwargs['threshold'])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stderr.write("No regressions against the baseline.")
+        if contention is not None and not contention['correct']:
+            raise CommandError("Order placement under contention oversold or lost orders.")
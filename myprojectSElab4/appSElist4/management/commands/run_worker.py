@@ -0,0 +1,76 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from appSElist4.jobs import claim_jobs, record_failure, renew_leases, requeue_expired, worker_name
+from appSElist4.workers import execute, setup_process
+
+LEASE_CHECK_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = "Run queued jobs (appSElist4.jobs) on a thread or process pool until interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help="Threads suit jobs waiting on the database; processes suit CPU-bound jobs.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when no job is ready.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once no job is ready or running.")
+
+    def handle(self, *args, **kwargs):
+        concurrency = kwargs['concurrency']
+        if kwargs['pool'] == 'process':
+            # Spawned children set Django up themselves and open their own
+            # connections instead of inheriting the parent's.
+            executor = ProcessPoolExecutor(max_workers=concurrency, initializer=setup_process,
+                                           mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job')
+
+        worker = worker_name()
+        # Renew well before a lease could run out, so long jobs are never taken over.
+        renew_every = settings.JOB_LEASE_SECONDS / 3
+        running = {}
+        succeeded = failed = 0
+        last_lease_check = last_renewal = time.monotonic()
+        requeue_expired()
+        try:
+            with executor:
+                while True:
+                    if time.monotonic() - last_lease_check > LEASE_CHECK_SECONDS:
+                        requeue_expired()
+                        last_lease_check = time.monotonic()
+                    if running and time.monotonic() - last_renewal > renew_every:
+                        renew_leases(list(running.values()))
+                        last_renewal = time.monotonic()
+                    free = concurrency - len(running)
+                    if free:
+                        running.update((executor.submit(execute, job.pk), job) for job in claim_jobs(free, worker))
+                    if not running:
+                        if kwargs['once']:
+                            break
+                        time.sleep(kwargs['interval'])
+                        continue
+                    finished, _ = wait(running, timeout=kwargs['interval'], return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        job = running.pop(future)
+                        try:
+                            ok = future.result()
+                        except Exception as exc:
+                            # The job never got to record an outcome; retry it rather
+                            # than leave it running until its lease expires.
+                            self.stderr.write(f"Job runner crashed: {exc!r}")
+                            record_failure(job, f"Job runner crashed: {exc!r}")
+                            ok = False
+                        if ok:
+                            succeeded += 1
+                        else:
+                            failed += 1
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Ran {succeeded + failed} jobs, {failed} failed or will be retried.")
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:41
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model('appSElist4', 'Order')
+    through = Order.products.through
+    db = schema_editor.connection.alias
+    totals = (
+        through.objects.using(db).filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(total=Sum('product__price'))
+        .values('total')
+    )
+    Order.objects.using(db).update(
+        total_amount=Coalesce(Subquery(totals), Value(Decimal('0.00')),
+                              output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        fulfillable=~Exists(through.objects.using(db).filter(order=OuterRef('pk'), product__available=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appSElist4', '0018_alter_customer_name_alter_product_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='fulfillable',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_amount',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
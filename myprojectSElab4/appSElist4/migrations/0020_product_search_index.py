@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# The DDL is frozen here rather than imported from appSElist4.search, so later
+# changes to the app code cannot change what this migration does.
+SQLITE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "appSElist4_product_fts" USING fts5(
+        name, content='appSElist4_product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')"""
+
+SQLITE_TRIGGERS = {
+    'appSElist4_product_fts_ai': """
+        CREATE TRIGGER IF NOT EXISTS "appSElist4_product_fts_ai" AFTER INSERT ON "appSElist4_product" BEGIN
+            INSERT INTO "appSElist4_product_fts"(rowid, name) VALUES (new.id, new.name);
+        END""",
+    'appSElist4_product_fts_ad': """
+        CREATE TRIGGER IF NOT EXISTS "appSElist4_product_fts_ad" AFTER DELETE ON "appSElist4_product" BEGIN
+            INSERT INTO "appSElist4_product_fts"("appSElist4_product_fts", rowid, name)
+                VALUES ('delete', old.id, old.name);
+        END""",
+    'appSElist4_product_fts_au': """
+        CREATE TRIGGER IF NOT EXISTS "appSElist4_product_fts_au" AFTER UPDATE OF name ON "appSElist4_product" BEGIN
+            INSERT INTO "appSElist4_product_fts"("appSElist4_product_fts", rowid, name)
+                VALUES ('delete', old.id, old.name);
+            INSERT INTO "appSElist4_product_fts"(rowid, name) VALUES (new.id, new.name);
+        END""",
+}
+
+POSTGRES_INDEXES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON "appSElist4_product" USING gin (name gin_trgm_ops)',
+    """CREATE INDEX IF NOT EXISTS product_name_tsv_idx ON "appSElist4_product"
+        USING gin (to_tsvector('simple', name))""",
+]
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for statement in POSTGRES_INDEXES:
+            schema_editor.execute(statement)
+    elif vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+        for statement in SQLITE_TRIGGERS.values():
+            schema_editor.execute(statement)
+        schema_editor.execute("""INSERT INTO "appSElist4_product_fts"("appSElist4_product_fts") VALUES ('rebuild')""")
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS product_name_tsv_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS product_name_trgm_idx')
+    elif vendor == 'sqlite':
+        for name in SQLITE_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+        schema_editor.execute('DROP TABLE IF EXISTS "appSElist4_product_fts"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appSElist4', '0019_order_total_amount_order_fulfillable'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:33
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_order_products(apps, schema_editor):
+    # The old table has no prices, so existing lines are charged what the
+    # product costs now, which is also what their stored totals reflect.
+    Order = apps.get_model('appSElist4', 'Order')
+    OrderItem = apps.get_model('appSElist4', 'OrderItem')
+    through = Order.products.through
+    db = schema_editor.connection.alias
+    rows = through.objects.using(db).order_by('pk').values_list('order_id', 'product_id', 'product__price')
+    batch = []
+    for order_id, product_id, price in rows.iterator(chunk_size=5000):
+        batch.append(OrderItem(order_id=order_id, product_id=product_id, quantity=1, unit_price=price))
+        if len(batch) == 5000:
+            OrderItem.objects.using(db).bulk_create(batch)
+            batch = []
+    OrderItem.objects.using(db).bulk_create(batch)
+
+
+def copy_order_items_back(apps, schema_editor):
+    Order = apps.get_model('appSElist4', 'Order')
+    OrderItem = apps.get_model('appSElist4', 'OrderItem')
+    through = Order.products.through
+    db = schema_editor.connection.alias
+    through.objects.using(db).bulk_create(
+        (through(order_id=order_id, product_id=product_id)
+         for order_id, product_id in OrderItem.objects.using(db).values_list('order_id', 'product_id')
+         .iterator(chunk_size=5000)),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appSElist4', '0022_product_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='appSElist4.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='appSElist4.product')),
+            ],
+            options={
+                'ordering': ['order', 'product'],
+            },
+        ),
+        migrations.RunPython(copy_order_products, copy_order_items_back),
+        # Django can't switch an existing many-to-many to a custom through
+        # model in place; the old table goes once its rows are copied.
+        migrations.RemoveField(
+            model_name='order',
+            name='products',
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='products',
+            field=models.ManyToManyField(through='appSElist4.OrderItem', to='appSElist4.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderitem',
+            constraint=models.UniqueConstraint(fields=('order', 'product'), name='order_item_unique_product'),
+        ),
+    ]
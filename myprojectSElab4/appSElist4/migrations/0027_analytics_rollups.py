@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def mark_order_days_dirty(apps, schema_editor):
+    # The rollups of existing orders are computed on first read or by the
+    # refresh job; rebuild_rollups does it at once.
+    Order = apps.get_model('appSElist4', 'Order')
+    RollupDirtyDay = apps.get_model('appSElist4', 'RollupDirtyDay')
+    db = schema_editor.connection.alias
+    days = Order.objects.using(db).annotate(day=TruncDate('date')).order_by().values_list('day', flat=True).distinct()
+    RollupDirtyDay.objects.using(db).bulk_create([RollupDirtyDay(day=day) for day in days], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appSElist4', '0026_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='daily_rollup_unique_day_status')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='appSElist4.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='product_rollup_unique_day_product')],
+            },
+        ),
+        migrations.RunPython(mark_order_days_dirty, migrations.RunPython.noop),
+    ]
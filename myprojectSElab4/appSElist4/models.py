@@ -1,12 +1,231 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
+from django.dispatch import Signal
+from django.utils import timezone
 from decimal import Decimal
 
 
-class Product(models.Model):
+# Sent by ProductQuerySet bulk writes, which bypass post_save, with the ids of
+# the affected products, the names of the fields that were written and whether
+# the rows were all newly created.
+products_changed = Signal()
+
+# Sent by OrderQuerySet bulk writes with the ids of the affected orders, so
+# receivers keeping rollups current learn of orders changed in bulk.
+orders_changed = Signal()
+
+
+def outbox_payload(model, values):
+    """Field name to value for a row given as attname to value, as outbox events carry it."""
+    return {field.name: values[field.attname] for field in model._meta.concrete_fields}
+
+
+OUTBOX_BATCH_SIZE = 500
+
+
+def read_outbox_payloads(model, ids, using):
+    """Current payloads of the rows with ``ids``, read in batches."""
+    ids = list(ids)
+    attnames = [field.attname for field in model._meta.concrete_fields]
+    payloads = {}
+    for start in range(0, len(ids), OUTBOX_BATCH_SIZE):
+        batch = ids[start:start + OUTBOX_BATCH_SIZE]
+        for row in model._default_manager.using(using).filter(pk__in=batch).values(*attnames):
+            payloads[row[model._meta.pk.attname]] = outbox_payload(model, row)
+    return payloads
+
+
+def record_outbox_events(model, kind, payloads, previous=None, using=None):
+    """
+    Write an ``OutboxEvent`` per row in ``payloads`` (pk to payload).
+    ``previous`` maps pks to the field values before an update; rows whose
+    known fields all kept their value, ``updated_at`` aside, get no event.
+    """
+    events = []
+    for pk, payload in payloads.items():
+        before = None if previous is None else previous.get(pk)
+        if before is not None:
+            before = {name: value for name, value in before.items()
+                      if name != 'updated_at' and name in payload and payload[name] != value}
+            if not before:
+                continue
+        events.append(OutboxEvent(model=model._meta.model_name, object_id=pk, kind=kind,
+                                  payload=payload, previous=before))
+    OutboxEvent.objects.using(using).bulk_create(events)
+
+
+class TimestampedQuerySet(models.QuerySet):
+    """
+    Bulk writes skip ``save()``, so these stamp ``updated_at`` (for delta
+    sync) and write outbox events themselves, in the transaction of the
+    write. ``rows_changed`` is called there too, with the affected ids.
+
+    An event carries the whole row, so writes cost reads and inserts in
+    proportion to the rows they touch. ``update`` works through the rows
+    ``OUTBOX_BATCH_SIZE`` at a time to keep memory bounded.
+    """
+    def write_db(self):
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def rows_changed(self, ids, fields, created=False, previous=None):
+        """
+        Hook for subclasses, called after a bulk write of ``fields`` on the
+        rows with ``ids``. ``previous`` maps ids to the values the rows held
+        before the write, where they are known.
+        """
+
+    def update(self, **kwargs):
+        fields = set(kwargs)
+        kwargs.setdefault('updated_at', timezone.now())
+        db = self.write_db()
+        rows, previous = 0, {}
+        with transaction.atomic(using=db):
+            ids = list(self.using(db).order_by().values_list('pk', flat=True))
+            for start in range(0, len(ids), OUTBOX_BATCH_SIZE):
+                # The base manager's plain QuerySet, so this does not recurse.
+                batch = self.model._base_manager.using(db).filter(pk__in=ids[start:start + OUTBOX_BATCH_SIZE])
+                before = {row.pop('pk'): row for row in batch.values('pk', *fields)}
+                rows += batch.update(**kwargs)
+                record_outbox_events(self.model, 'updated', read_outbox_payloads(self.model, before, db),
+                                     previous=before, using=db)
+                previous.update(before)
+            self.rows_changed(list(previous), fields, previous=previous)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        db = self.write_db()
+        with transaction.atomic(using=db):
+            rows = super().bulk_update(objs, list({*fields, 'updated_at'}), batch_size=batch_size)
+            ids = [obj.pk for obj in objs]
+            record_outbox_events(self.model, 'updated', read_outbox_payloads(self.model, ids, db),
+                                 previous={obj.pk: obj.loaded_values() for obj in objs}, using=db)
+            self.rows_changed(ids, set(fields), previous={obj.pk: obj.loaded_values() or {} for obj in objs})
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        upsert = bool(kwargs.get('update_conflicts'))
+        if upsert and kwargs.get('update_fields'):
+            kwargs['update_fields'] = list({*kwargs['update_fields'], 'updated_at'})
+        db = self.write_db()
+        with transaction.atomic(using=db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            # Rows skipped by ignore_conflicts get no pk and were not written.
+            ids = [obj.pk for obj in objs if obj.pk is not None]
+            if upsert:
+                # Rows that already existed kept the fields not being updated.
+                payloads = read_outbox_payloads(self.model, ids, db)
+            else:
+                payloads = {obj.pk: outbox_payload(self.model, obj.__dict__) for obj in objs if obj.pk is not None}
+            record_outbox_events(self.model, 'upserted' if upsert else 'created', payloads, using=db)
+            self.rows_changed(ids, {field.name for field in self.model._meta.concrete_fields}, created=not upsert)
+        return objs
+
+
+class OutboxModel(models.Model):
+    """
+    Base for models whose writes are published through the outbox: every
+    ``save()`` writes an ``OutboxEvent`` in the same transaction, carrying
+    the saved row and, for updates, the previous values of the changed
+    fields. Deletions are recorded by ``appSElist4.signals``.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def has_changed(self, *fields):
+        """Whether any of ``fields`` differs from the value loaded from the database."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            field not in loaded or loaded[field] != getattr(self, field)
+            for field in fields
+        )
+
+    def loaded_values(self):
+        """Field name to value as loaded from the database, or None if not loaded."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return {field.name: loaded[field.attname] for field in self._meta.concrete_fields
+                if field.attname in loaded}
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        previous = None if created else self.loaded_values()
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            model = type(self)
+            if self.get_deferred_fields():
+                payloads = read_outbox_payloads(model, [self.pk], using)
+            else:
+                payloads = {self.pk: outbox_payload(model, self.__dict__)}
+            record_outbox_events(model, 'created' if created else 'updated', payloads,
+                                 previous=None if previous is None else {self.pk: previous}, using=using)
+        # Later saves compare against what this one wrote.
+        self.remember_loaded_values()
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.remember_loaded_values(fields)
+
+    def remember_loaded_values(self, fields=None):
+        """Take the current values of ``fields`` (all by default) as the ones in the database."""
+        values = {field.attname: self.__dict__[field.attname] for field in self._meta.concrete_fields
+                  if field.attname in self.__dict__ and (fields is None or field.name in fields
+                                                          or field.attname in fields)}
+        if fields is None or getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = values
+        else:
+            self._loaded_values.update(values)
+
+
+class ProductQuerySet(TimestampedQuerySet):
+    """
+    Bulk writes skip model signals, so they announce themselves through
+    ``products_changed`` for receivers that keep derived data current.
+    """
+    # Order totals use the prices snapshotted on their items, so only
+    # availability feeds back into orders.
+    order_dependent_fields = {'available'}
+
+    def rows_changed(self, ids, fields, created=False, previous=None):
+        products_changed.send(sender=self.model, product_ids=ids, fields=fields, created=created, previous=previous)
+
+
+class Product(OutboxModel):
     name = models.CharField(max_length=150, unique=True, blank=False)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2,
+                                validators=[MinValueValidator(Decimal('0.01'))])
     available = models.BooleanField(default=False)
+    # Units left to sell; null means stock is not tracked for the product.
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['price'], name='product_price_idx'),
+            # Browsing and filtering only ever shows products that are in stock.
+            models.Index(fields=['price'], condition=Q(available=True), name='product_available_price_idx'),
+            # Keyset order of the delta sync feed.
+            models.Index(fields=['updated_at', 'id'], name='product_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -19,7 +238,68 @@ class Customer(models.Model):
         return self.name
 
 
-class Order(models.Model):
+def _item_total():
+    return Sum(F('quantity') * F('unit_price'))
+
+
+def _order_total_subquery():
+    totals = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(total=_item_total())
+        .values('total')
+    )
+    return Coalesce(Subquery(totals), Value(Decimal('0.00')),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2))
+
+
+def _order_fulfillable_expression():
+    return ~Exists(OrderItem.objects.filter(order=OuterRef('pk'), product__available=False))
+
+
+class OrderQuerySet(TimestampedQuerySet):
+    def rows_changed(self, ids, fields, created=False, previous=None):
+        orders_changed.send(sender=self.model, order_ids=ids, fields=fields, created=created, previous=previous)
+
+    def annotate_totals(self):
+        """Annotate each order with its total and fulfillment flag computed in the database."""
+        return self.annotate(
+            annotated_total_price=_order_total_subquery(),
+            annotated_fulfillable=_order_fulfillable_expression(),
+        )
+
+    def with_totals(self):
+        """
+        Annotated totals plus prefetched products and items, so listing orders
+        costs a constant number of queries.
+        """
+        return self.annotate_totals().prefetch_related(
+            Prefetch('products', queryset=Product.objects.order_by('id')),
+            'items',
+        )
+
+    def snapshot_prices(self):
+        """
+        Copy the current product price onto items that have none yet, as
+        happens to items created by ``order.products.add()``.
+        """
+        return OrderItem.objects.filter(order__in=self.values('pk'), unit_price__isnull=True).update(
+            unit_price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+        )
+
+    def refresh_totals(self):
+        """
+        Recompute the stored ``total_amount`` and ``fulfillable`` columns,
+        with one UPDATE per batch of orders (see ``TimestampedQuerySet``).
+        """
+        return self.model.objects.filter(pk__in=self.values('pk')).update(
+            total_amount=_order_total_subquery(),
+            fulfillable=_order_fulfillable_expression(),
+        )
+
+
+class Order(OutboxModel):
     STATUS_CHOICES = [
         ("New", "New"),
         ("In Process", "In Process"),
@@ -27,16 +307,218 @@ class Order(models.Model):
     ]
 
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
-    products = models.ManyToManyField(Product)
+    products = models.ManyToManyField(Product, through='OrderItem')
     date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    # Bumped by every write, including the stored totals being refreshed.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from ``items``; kept current by the signal receivers in
+    # ``appSElist4.signals`` and by ``ProductQuerySet`` bulk writes.
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'),
+                                       editable=False, db_index=True)
+    fulfillable = models.BooleanField(default=True, editable=False)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date'], name='order_date_idx'),
+            models.Index(fields=['status', '-date'], name='order_status_date_idx'),
+            models.Index(fields=['customer', '-date'], name='order_customer_date_idx'),
+            models.Index(fields=['updated_at', 'id'], name='order_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} for {self.customer}"
 
     def total_price(self):
-        return sum(product.price for product in self.products.all())
+        if hasattr(self, 'annotated_total_price'):
+            return self.annotated_total_price
+        return self.items.aggregate(total=Coalesce(_item_total(), Value(Decimal('0.00'))))['total']
 
     def if_can_be_fulfilled(self):
+        if hasattr(self, 'annotated_fulfillable'):
+            return self.annotated_fulfillable
         return all(product.available for product in self.products.all())
 
+    def refresh_totals(self):
+        """Recompute the stored totals for this order and reload them onto the instance."""
+        orders = Order.objects.filter(pk=self.pk)
+        orders.refresh_totals()
+        self.total_amount, self.fulfillable = orders.values_list('total_amount', 'fulfillable').get()
+
+
+class OrderItem(models.Model):
+    """
+    A product on an order, with the quantity bought and the unit price
+    charged. ``unit_price`` is only empty until ``snapshot_prices`` runs for
+    items added through ``order.products``.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        ordering = ['order', 'product']
+        constraints = [
+            # Its index, led by ``order``, also serves the per-order totals.
+            models.UniqueConstraint(fields=['order', 'product'], name='order_item_unique_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product} on order {self.order_id}"
+
+
+def replace_order_items(lines):
+    """
+    Replace the items of each order in ``lines``, pairs of an order and its
+    ``(product, quantity)`` pairs, charging each product's current price.
+    Stored totals are left for the caller to refresh.
+    """
+    lines = list(lines)
+    if not lines:
+        return
+    OrderItem.objects.filter(order__in=[order.pk for order, _ in lines]).delete()
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=product, quantity=quantity, unit_price=product.price)
+        for order, items in lines for product, quantity in items
+    )
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted product or order, so delta sync can tell clients to
+    drop it. ``model`` is the deleted object's ``model_name``.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to a product or order, written in the transaction of the change
+    (the transactional outbox). ``kind`` is created, updated, upserted or
+    deleted; ``payload`` holds the row after the change and ``previous`` the
+    old values of the fields an update changed, when known. Events are read
+    by id through the change feed and pushed to a sink by ``relay_outbox``,
+    which sets ``relayed_at``.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    kind = models.CharField(max_length=20)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    previous = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    relayed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'id'], name='outbox_model_idx'),
+            # The relay only ever looks for events it has not delivered yet.
+            models.Index(fields=['id'], condition=Q(relayed_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.kind}"
+
+
+class Job(models.Model):
+    """
+    A queued call of a task registered in ``appSElist4.jobs``, run by the
+    ``run_worker`` command. ``attempts`` counts the runs started so far;
+    ``locked_by`` identifies the claim of the worker running it.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Higher runs first.
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=200, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claiming reads the ready queue in this order.
+            models.Index(fields=['-priority', 'run_at', 'id'], condition=Q(status='queued'),
+                         name='job_ready_idx'),
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+
+class DailyRollup(models.Model):
+    """
+    Orders and revenue per day (in ``TIME_ZONE``) and status, recomputed by
+    ``appSElist4.analytics`` for each day its orders change.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=50)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='daily_rollup_unique_day_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.orders} orders"
+
+
+class ProductDailyRollup(models.Model):
+    """Units sold and revenue per day and product, maintained with ``DailyRollup``."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='product_rollup_unique_day_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.units} units"
+
+
+class RollupDirtyDay(models.Model):
+    """
+    A day whose rollups are behind its orders. ``marked_at`` moves on every
+    mark, so a refresh only clears marks made before it read the day.
+    """
+    day = models.DateField(unique=True)
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.day} (marked {self.marked_at})"
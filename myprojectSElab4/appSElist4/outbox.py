@@ -0,0 +1,89 @@
+"""
+Delivery side of the transactional outbox.
+
+Product and order writes record ``OutboxEvent`` rows in their own
+transaction (see ``appSElist4.models``), so an event exists exactly when
+its change committed. Consumers get them in two ways:
+
+* the change feed, ``GET /api/events/?after=<id>``, read in batches by id;
+* ``relay_outbox``, which pushes undelivered events in batches to the sink
+  configured in ``OUTBOX_SINK`` and marks them relayed.
+
+Delivery is at least once: a batch sent right before a crash is sent
+again, so consumers should skip event ids they have already applied.
+"""
+import json
+import queue
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+class FileSink:
+    """Appends events to a file as NDJSON, one event per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, messages):
+        lines = ''.join(json.dumps(message, cls=DjangoJSONEncoder) + '\n' for message in messages)
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write(lines)
+            handle.flush()
+
+
+class QueueSink:
+    """Puts each batch on an in-process ``queue.Queue``; a stand-in for a message broker."""
+
+    def __init__(self, maxsize=0):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def send(self, messages):
+        self.queue.put(list(messages))
+
+
+def get_sink():
+    """Build the sink named by ``OUTBOX_SINK``: ``{'BACKEND': dotted path, 'OPTIONS': kwargs}``."""
+    config = settings.OUTBOX_SINK
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+def event_message(event):
+    return {
+        'id': event.id,
+        'model': event.model,
+        'object_id': event.object_id,
+        'kind': event.kind,
+        'payload': event.payload,
+        'previous': event.previous,
+        'created_at': event.created_at,
+    }
+
+
+def relay_batch(sink, batch_size=100):
+    """
+    Send the oldest undelivered events to ``sink`` and mark them relayed, in
+    one transaction. Rows are locked with SKIP LOCKED where the database
+    supports it, so several relays can run side by side. Returns the number
+    of events sent.
+    """
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.filter(relayed_at__isnull=True)
+            .select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if events:
+            sink.send([event_message(event) for event in events])
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(relayed_at=timezone.now())
+    return len(events)
+
+
+def prune_relayed(days):
+    """Delete events relayed more than ``days`` days ago; returns how many."""
+    cutoff = timezone.now() - timedelta(days=days)
+    return OutboxEvent.objects.filter(relayed_at__lt=cutoff).delete()[0]
@@ -0,0 +1,105 @@
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key.
+
+    Ordering on the indexed, unique ``id`` column keeps every page a single
+    range scan and stays stable when rows are inserted between requests.
+    The default page size comes from ``REST_FRAMEWORK['PAGE_SIZE']`` and
+    clients may request a smaller or larger page with ``?page_size=``.
+    Search results annotated with ``search_rank`` are paged by relevance
+    unless the client asks for an explicit ``?ordering=``; ``id`` is always
+    appended as the tie-breaker so rows sharing a sort value page stably.
+
+    DRF's cursor only records the first ordering key plus an offset among
+    rows sharing it, which skips or repeats rows when rows with that value
+    come and go between requests. Cursors here record every ordering key,
+    ``id`` included, and continue strictly after that composite position,
+    so offsets are never needed. Ordering keys must not be null.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get('ordering'):
+            return ('-search_rank', 'id')
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not {'id', '-id'} & set(ordering):
+            ordering += ('id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self.after_position(current_position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (self._get_position_from_instance(results[-1], self.ordering)
+                              if has_following_position else None)
+
+        # As in DRF: a reverse cursor reads backwards and flips the page.
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after_position(self, position, reverse):
+        """
+        Rows strictly after the composite ``position`` in the current
+        ordering (before it when reading backwards):
+        ``k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...``.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        branches = []
+        for index, key in enumerate(self.ordering):
+            name = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') != reverse else 'gt'
+            equal = [Q(**{other.lstrip('-'): value}) for other, value in zip(self.ordering[:index], values)]
+            branches.append(reduce(and_, equal, Q(**{f'{name}__{lookup}': values[index]})))
+        return reduce(or_, branches)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for key in ordering:
+            name = key.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values, separators=(',', ':'))
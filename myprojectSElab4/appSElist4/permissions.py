@@ -5,4 +5,8 @@ class IsAdminOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         return request.user.is_staff
+
+    async def ahas_permission(self, request, view):
+        """Async counterpart used by ``async_views``; needs no I/O once ``request.user`` is loaded."""
+        return self.has_permission(request, view)
 #
\ No newline at end of file
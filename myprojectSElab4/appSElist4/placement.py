@@ -0,0 +1,85 @@
+"""
+Placing an order: check that every product can be sold, take the stock and
+create the order in one transaction, so concurrent buyers of the same
+product can never oversell it.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from .models import Product, Order, replace_order_items
+
+
+class OrderNotPlaced(Exception):
+    """
+    Raised, with the transaction rolled back, when products are missing,
+    unavailable or short of stock. ``problems`` maps product ids to the reason.
+    """
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(problems)
+
+
+def merge_items(items):
+    """``{product_id: quantity}`` from ``(product_id, quantity)`` pairs, adding up repeats."""
+    quantities = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Lock the products in ``quantities`` and take their stock, or raise
+    ``OrderNotPlaced``. Must run inside a transaction.
+
+    Rows are locked with ``select_for_update`` in primary key order, so two
+    orders for overlapping products queue up instead of deadlocking. The
+    decrement is also conditional on enough stock being left, which keeps it
+    safe on backends that ignore ``FOR UPDATE`` (SQLite serializes writers
+    instead).
+    """
+    products = Product.objects.select_for_update().filter(pk__in=quantities).order_by('pk').only(
+        'id', 'price', 'available', 'stock')
+    products = {product.pk: product for product in products}
+
+    problems = {}
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            problems[product_id] = 'Product does not exist.'
+        elif not product.available:
+            problems[product_id] = 'Product is not available.'
+        elif product.stock is not None and product.stock < quantity:
+            problems[product_id] = f'Only {product.stock} left in stock.'
+    if problems:
+        raise OrderNotPlaced(problems)
+
+    tracked = {pk: quantities[pk] for pk, product in products.items() if product.stock is not None}
+    if not tracked:
+        return products
+    enough = Q()
+    for pk, quantity in tracked.items():
+        enough |= Q(pk=pk, stock__gte=quantity)
+    updated = Product.objects.filter(enough).update(
+        stock=Case(*(When(pk=pk, then=F('stock') - quantity) for pk, quantity in tracked.items()))
+    )
+    if updated != len(tracked):
+        # Another transaction took the stock between our read and write.
+        raise OrderNotPlaced({pk: 'Not enough stock left.' for pk in tracked})
+    return products
+
+
+def place_order(customer, items, status='New'):
+    """
+    Create an order for ``customer`` from ``(product_id, quantity)`` pairs,
+    reserving stock for every tracked product and charging the prices read
+    under the lock, and return it with its totals.
+    Either all of it happens or, raising ``OrderNotPlaced``, none of it does.
+    """
+    quantities = merge_items(items)
+    with transaction.atomic():
+        products = reserve_stock(quantities)
+        order = Order.objects.create(customer=customer, status=status)
+        replace_order_items([(order, [(products[pk], quantity) for pk, quantity in quantities.items()])])
+        order.refresh_totals()
+    return order
@@ -0,0 +1,84 @@
+"""
+JSON encoding for API responses, using ``orjson`` when it is installed and
+the standard library otherwise.
+
+Types JSON cannot represent natively (``Decimal``, ``datetime``, ``UUID``,
+lazy translation strings, ...) are encoded exactly as DRF's own
+``JSONEncoder`` encodes them, so switching renderers never changes a
+response body.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+BUFFER_SIZE = 64 * 1024
+
+_drf_default = encoders.JSONEncoder().default
+
+
+def dumps(data, default=_drf_default):
+    """Compact UTF-8 JSON bytes for ``data``."""
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(data, default=default, ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode()
+
+
+def loads(data):
+    """Decode JSON ``bytes`` or ``str``; raises ``ValueError`` on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode()
+    return json.loads(data, parse_constant=_reject_constant)
+
+
+def _reject_constant(name):
+    raise ValueError(f'Out of range float values are not JSON compliant: {name}')
+
+
+def iter_render(items, default=_drf_default, buffer_size=BUFFER_SIZE):
+    """
+    Encode an iterable as a JSON array, yielding ``bytes`` chunks of about
+    ``buffer_size``. Items are appended to one reused buffer, so memory stays
+    flat however many items there are.
+    """
+    buffer = bytearray(b'[')
+    for index, item in enumerate(items):
+        if index:
+            buffer += b','
+        buffer += dumps(item, default)
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in ``JSONRenderer`` that encodes compact responses with ``dumps``.
+    Indented (``; indent=``) and ASCII-only output still go through DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = dumps(data)
+        # Same escaping as JSONRenderer: U+2028/U+2029 are valid JSON but
+        # break JavaScript string literals.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,142 @@
+import hashlib
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+# Routing state of the request being handled in the current thread or task;
+# None outside requests, where every query goes to the primary.
+_state = ContextVar('replica_routing', default=None)
+_next_replica = itertools.count()
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+    @property
+    def use_primary(self):
+        return self.pinned or self.wrote
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def primary_reads():
+    """Send the current request's reads to the primary within the block."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class ReplicaRouter:
+    """
+    Sends reads of this app's models to the ``DATABASE_REPLICAS`` aliases in
+    turn and all writes to ``default``.
+
+    Only safe (GET, HEAD, OPTIONS) requests handled by
+    ``ReplicaPinningMiddleware`` are routed to replicas; other methods read
+    the rows they are about to write from the primary, so a lagging replica
+    cannot be saved over newer data. Once a request writes, the client's
+    requests for the next ``REPLICA_PIN_SECONDS`` use the primary too, so
+    clients always read their own writes despite replication lag.
+    """
+    route_app_labels = {'appSElist4'}
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.use_primary or model._meta.app_label not in self.route_app_labels:
+            return None
+        aliases = replicas()
+        if not aliases:
+            return None
+        return aliases[next(_next_replica) % len(aliases)]
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        if model._meta.app_label in self.route_app_labels:
+            # Explicit, so instances read from a replica are saved to the primary.
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def pin_key(request):
+    """Cache key identifying the client: its credentials, or its session."""
+    credential = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return 'replica-pin:' + hashlib.sha256(credential.encode()).hexdigest()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scopes ``ReplicaRouter`` to a request: starts it pinned to the primary if
+    it is not a safe method or the same client wrote within
+    ``REPLICA_PIN_SECONDS``, and records the pin when this request writes. Pins live in Django's default cache, which must
+    be shared between processes for the pin to follow a client across them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        key = pin_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and cache.get(key))
+        token = _state.set(RoutingState(pinned=pinned))
+        try:
+            response = self.get_response(request)
+            if key and _state.get().wrote:
+                cache.set(key, True, self.pin_seconds())
+        finally:
+            _state.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        key = pin_key(request)
+        pinned = request.method not in SAFE_METHODS or bool(key and await cache.aget(key))
+        token = _state.set(RoutingState(pinned=pinned))
+        try:
+            response = await self.get_response(request)
+            if key and _state.get().wrote:
+                await cache.aset(key, True, self.pin_seconds())
+        finally:
+            _state.reset(token)
+        return response
+
+    def pin_seconds(self):
+        return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
@@ -0,0 +1,125 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Product
+
+PRODUCT_TABLE = Product._meta.db_table
+FTS_TABLE = f'{PRODUCT_TABLE}_fts'
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "{PRODUCT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"(rowid, name) VALUES (new.id, new.name);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "{PRODUCT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, name) VALUES ('delete', old.id, old.name);
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE OF name ON "{PRODUCT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO "{FTS_TABLE}"(rowid, name) VALUES (new.id, new.name);
+        END""",
+}
+
+# Whether each database has the FTS table, keyed by alias and database name
+# so a connection pointed at another database (tests, settings overrides)
+# never reuses the answer. Cleared by repair_search_index after migrating.
+_fts_available = {}
+
+
+def connection_key(connection):
+    return connection.alias, connection.settings_dict['NAME']
+
+
+def repair_search_index(using='default', **kwargs):
+    """
+    post_migrate hook. Forgets whether the database has the FTS table, which
+    a migration may have created or dropped. SQLite rebuilds a table to alter
+    it, which drops its triggers, so reinstall any that are missing and
+    resync the FTS index. The table itself is created by migration 0020.
+    """
+    connection = connections[using]
+    _fts_available.pop(connection_key(connection), None)
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing.issuperset(SQLITE_TRIGGERS):
+            return
+        for statement in SQLITE_TRIGGERS.values():
+            cursor.execute(statement)
+        cursor.execute(f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""")
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Ranked, index-backed product name search.
+
+    Every whitespace-separated term must match the start of a word in the
+    name. Matching rows are annotated with ``search_rank`` (higher is more
+    relevant), which IdCursorPagination uses to order the results. Uses a
+    tsvector/trigram GIN index on PostgreSQL and an FTS5 table on SQLite, and
+    falls back to ``icontains`` elsewhere.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_terms(self, request):
+        return re.findall(r'\w+', request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            return self.postgresql_search(queryset, terms)
+        if connection.vendor == 'sqlite' and self.has_fts_table(connection):
+            return self.sqlite_search(queryset, terms)
+        return self.fallback_search(queryset, terms)
+
+    def has_fts_table(self, connection):
+        key = connection_key(connection)
+        if key not in _fts_available:
+            _fts_available[key] = FTS_TABLE in connection.introspection.table_names()
+        return _fts_available[key]
+
+    def sqlite_search(self, queryset, terms):
+        match = ' '.join('"%s"*' % term for term in terms)
+        matching_ids = RawSQL(f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s', [match])
+        # bm25 ``rank`` is lower for better matches, so negate it.
+        rank = RawSQL(
+            f'SELECT -rank FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s '
+            f'AND rowid = "{PRODUCT_TABLE}"."id"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matching_ids).annotate(search_rank=rank)
+
+    def postgresql_search(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        text = ' '.join(terms)
+        name = f'"{PRODUCT_TABLE}"."name"'
+        matches = RawSQL(
+            f"(to_tsvector('simple', {name}) @@ to_tsquery('simple', %s) OR {name} %% %s)",
+            [tsquery, text],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"GREATEST(ts_rank(to_tsvector('simple', {name}), to_tsquery('simple', %s)), similarity({name}, %s))",
+            [tsquery, text],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    def fallback_search(self, queryset, terms):
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term)
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
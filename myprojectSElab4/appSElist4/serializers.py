@@ -1,18 +1,179 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Product, Customer, Order
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import add_user_claims
+from .models import Product, Customer, Order, OrderItem, Job, OutboxEvent, replace_order_items
 
-class ProductSerializer(serializers.ModelSerializer):
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves ids from ``context['related_objects']`` when bulk validation has
+    preloaded them, instead of running one query per id.
+    """
+    def to_internal_value(self, data):
+        preloaded = self.context.get('related_objects', {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return preloaded[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+def requested_fields(request):
+    """
+    Field names asked for with ``?fields=a,b`` on a safe request, or None
+    when the full representation should be returned.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return [name.strip() for name in raw.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Drops every field not listed in ``?fields=`` from read responses.
+    Writes always use the full serializer.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is None:
+            return
+        unknown = sorted(set(fields) - set(self.fields))
+        if unknown:
+            raise serializers.ValidationError({'fields': [f'Unknown field: {name}' for name in unknown]})
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
 
-class OrderSerializer(serializers.ModelSerializer):
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
+    class Meta:
+        model = OrderItem
+        fields = ('product', 'quantity', 'unit_price')
+        read_only_fields = ('unit_price',)
+
+
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Orders are written with either ``products`` (one of each) or ``items``
+    with quantities. Items are charged the product's price at the time.
+    """
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+    products = PreloadedPrimaryKeyRelatedField(many=True, queryset=Product.objects.all(), required=False,
+                                               allow_empty=False)
+    items = OrderItemSerializer(many=True, required=False, allow_empty=False)
+
     class Meta:
         model = Order
         fields = '__all__'
-#
\ No newline at end of file
+
+    def validate_items(self, items):
+        merged = {}
+        for item in items:
+            product = item['product']
+            merged[product] = merged.get(product, 0) + item.get('quantity', 1)
+        return [{'product': product, 'quantity': quantity} for product, quantity in merged.items()]
+
+    def validate(self, attrs):
+        if 'products' in attrs and 'items' in attrs:
+            raise serializers.ValidationError({'items': ['Give either products or items, not both.']})
+        if self.instance is None and not self.partial and 'products' not in attrs and 'items' not in attrs:
+            raise serializers.ValidationError({'products': ['This field is required.']})
+        return attrs
+
+    def create(self, validated_data):
+        lines = self.pop_lines(validated_data)
+        order = Order.objects.create(**validated_data)
+        self.write_lines(order, lines)
+        return order
+
+    def update(self, instance, validated_data):
+        lines = self.pop_lines(validated_data)
+        instance = super().update(instance, validated_data)
+        if lines is not None:
+            self.write_lines(instance, lines)
+        return instance
+
+    @staticmethod
+    def pop_lines(validated_data):
+        """``[(product, quantity), ...]`` from ``products`` or ``items``, or None if neither was given."""
+        if 'items' in validated_data:
+            return [(item['product'], item['quantity']) for item in validated_data.pop('items')]
+        if 'products' in validated_data:
+            return [(product, 1) for product in validated_data.pop('products')]
+        return None
+
+    @staticmethod
+    def write_lines(order, lines):
+        replace_order_items([(order, lines)])
+        order.refresh_totals()
+        # Drop relations prefetched before the write.
+        getattr(order, '_prefetched_objects_cache', {}).clear()
+
+
+class PlacementItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class OrderPlacementSerializer(serializers.Serializer):
+    """Input of ``orders/place/``; stock and availability are checked while placing."""
+    customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all())
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, default='New')
+    items = PlacementItemSerializer(many=True, allow_empty=False)
+
+
+class OutboxEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutboxEvent
+        fields = ('id', 'model', 'object_id', 'kind', 'payload', 'previous', 'created_at')
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'task', 'status', 'priority', 'attempts', 'max_attempts', 'run_at',
+                  'created_at', 'finished_at', 'result', 'last_error')
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Query parameters of ``analytics/``; the date range is inclusive."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': ['Must not be before start.']})
+        return attrs
+
+
+class StaffClaimTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issues tokens carrying the claims ``FastJWTAuthentication`` reads."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import cache
+from .analytics import local_day, mark_days_dirty, order_days
+from .authentication import mark_user_changed, user_cache
+from .models import Customer, Order, OutboxEvent, Product, ProductQuerySet, Tombstone, orders_changed, products_changed
+from .tasks import refresh_order_totals_for_products, schedule_rollup_refresh
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def refresh_order_totals_on_products_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Items added this way get no price from the caller; charge the current one.
+    if not reverse:
+        if action == 'post_add':
+            Order.objects.filter(pk=instance.pk).snapshot_prices()
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.refresh_totals()
+        return
+
+    # ``instance`` is a Product and ``pk_set`` holds order ids.
+    if action == 'pre_clear':
+        instance._cleared_order_ids = list(instance.order_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        orders = Order.objects.filter(pk__in=pk_set)
+        if action == 'post_add':
+            orders.snapshot_prices()
+        orders.refresh_totals()
+    elif action == 'post_clear':
+        Order.objects.filter(pk__in=instance.__dict__.pop('_cleared_order_ids', [])).refresh_totals()
+
+
+@receiver(post_save, sender=Product)
+def refresh_order_totals_on_product_save(sender, instance, created, update_fields, **kwargs):
+    tracked = ProductQuerySet.order_dependent_fields
+    if created or (update_fields is not None and not tracked.intersection(update_fields)):
+        return
+    if instance.has_changed(*tracked):
+        Order.objects.filter(products=instance).distinct().refresh_totals()
+
+
+@receiver(pre_delete, sender=Product)
+def remember_orders_of_deleted_product(sender, instance, **kwargs):
+    instance._affected_order_ids = list(instance.order_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Product)
+def refresh_order_totals_on_product_delete(sender, instance, **kwargs):
+    Order.objects.filter(pk__in=instance.__dict__.pop('_affected_order_ids', [])).refresh_totals()
+
+
+@receiver(products_changed, sender=Product)
+def refresh_order_totals_on_bulk_product_change(sender, product_ids, fields, created=False, **kwargs):
+    # Newly created products cannot belong to an order yet.
+    if created or not ProductQuerySet.order_dependent_fields.intersection(fields):
+        return
+    if len(product_ids) > settings.ORDER_TOTALS_INLINE_LIMIT:
+        # Too many orders to refresh within the request; totals catch up shortly.
+        refresh_order_totals_for_products.enqueue(product_ids=list(product_ids), priority=10)
+        return
+    refresh_order_totals_for_products(product_ids)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def record_deletion(sender, instance, using, **kwargs):
+    # Deletions run these receivers inside their transaction. Delta sync
+    # reports them from tombstones, the change feed from outbox events.
+    model_name = sender._meta.model_name
+    Tombstone.objects.using(using).create(model=model_name, object_id=instance.pk)
+    OutboxEvent.objects.using(using).create(model=model_name, object_id=instance.pk, kind='deleted',
+                                            payload={'id': instance.pk})
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_rollups_on_order_write(sender, instance, **kwargs):
+    # Saves run this before the loaded values are replaced, so an order
+    # moved to another day marks the day it left as well.
+    loaded = instance.loaded_values() or {}
+    mark_days_dirty([local_day(date) for date in (instance.date, loaded.get('date')) if date is not None])
+    schedule_rollup_refresh()
+
+
+@receiver(orders_changed, sender=Order)
+def mark_rollups_on_bulk_order_change(sender, order_ids, previous=None, **kwargs):
+    # Item changes end in a refresh of the order totals, so they land here too.
+    if order_ids:
+        days = order_days(order_ids)
+        days.update(local_day(values['date']) for values in (previous or {}).values() if values.get('date'))
+        mark_days_dirty(days)
+        schedule_rollup_refresh()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(products_changed, sender=Product)
+def invalidate_product_cache(sender, **kwargs):
+    cache.bump_version(cache.PRODUCTS)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(orders_changed, sender=Order)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_order_cache(sender, **kwargs):
+    # Customer names appear in the cached top customers of the analytics report.
+    cache.bump_version(cache.ORDERS)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, created=False, **kwargs):
+    # A new user has no tokens yet, but may reuse the id of a deleted one.
+    # Any other write may change is_staff or is_active, so also stop
+    # trusting claims issued before now.
+    if created:
+        user_cache.pop(instance.pk)
+    else:
+        mark_user_changed(instance.pk)
@@ -0,0 +1,162 @@
+"""
+Delta sync: ``GET <endpoint>/changes/`` returns only what changed since the
+client's last sync instead of the whole collection.
+
+Rows are read in ``(updated_at, id)`` order from the position stored in an
+opaque ``sync_token``, and deletions come from ``Tombstone`` rows the same
+way, so a sync costs as much as the churn since the previous one. A new
+token is handed out with every page; clients keep paging while ``has_more``
+and store the last token for the next sync.
+
+Timestamps are taken when a write happens, not when it commits, so feeds
+only read rows older than ``now - SYNC_SAFETY_SECONDS`` and the token never
+moves past that: a transaction that commits late still lands after it.
+Rows in that margin are left for a later sync.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .fastpath import values_plan
+from .models import Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+def to_micros(value):
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def encode_token(changed, deleted):
+    """Pack the ``(micros, id)`` positions of both feeds into a URL-safe token."""
+    raw = json.dumps({'c': changed, 'd': deleted}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        changed, deleted = tuple(data['c']), tuple(data['d'])
+        if not all(isinstance(value, int) for value in changed + deleted) or len(changed) != 2 or len(deleted) != 2:
+            raise ValueError
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValidationError({'since': ['Invalid sync token.']})
+    return changed, deleted
+
+
+def after(queryset, field, position):
+    """Rows strictly after ``(micros, id)`` in ``(field, id)`` order."""
+    micros, pk = position
+    moment = from_micros(micros)
+    return queryset.filter(Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'pk__gt': pk}))
+
+
+class SyncMixin:
+    """
+    Adds ``GET changes/`` to a model viewset. Takes ``?since=<sync_token>``,
+    or ``?changed_since=<ISO 8601 datetime>`` for a first sync from a known
+    point (neither means everything), plus ``?page_size=``. Filters and
+    ``?fields=`` do not apply: the feed always carries whole rows.
+
+    Answers ``{"results", "deleted", "sync_token", "has_more"}`` with the new
+    token as ETag. Answers 304 when nothing changed since a token that is
+    also sent as ``If-None-Match`` (the ETag still carries the advanced
+    token), and 410 when the token is older than the kept tombstones, in
+    which case the client has to start over with a full sync.
+    """
+
+    def sync_position(self, request):
+        token = request.query_params.get('since')
+        if token:
+            return decode_token(token)
+        raw = request.query_params.get('changed_since')
+        if raw:
+            moment = parse_datetime(raw)
+            if moment is None:
+                raise ValidationError({'changed_since': ['Enter a valid ISO 8601 date/time.']})
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment, dt_timezone.utc)
+            position = (to_micros(moment), 0)
+            return position, position
+        return (0, 0), (0, 0)
+
+    def sync_page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'page_size': ['A valid integer is required.']})
+        return max(1, min(size, MAX_PAGE_SIZE))
+
+    def sync_rows(self, ids):
+        """Render the changed rows with the fast path when it supports the serializer."""
+        queryset = self.get_queryset().filter(pk__in=ids)
+        plan = values_plan(self.get_serializer())
+        if plan is None:
+            objs = {obj.pk: obj for obj in queryset}
+            return self.get_serializer([objs[pk] for pk in ids if pk in objs], many=True).data
+        data = {item['id']: item for item in plan.represent(list(queryset.prefetch_related(None).values(*plan.columns)))}
+        return [data[pk] for pk in ids if pk in data]
+
+    @staticmethod
+    def read_feed(queryset, field, position, cap, limit):
+        """
+        Up to ``limit`` rows after ``position`` and before ``cap``, the
+        position to resume from and whether more rows are waiting. Once the
+        feed is drained the position moves on to ``cap``.
+        """
+        rows = list(after(queryset, field, position).filter(**{f'{field}__lt': from_micros(cap[0])})
+                    .order_by(field, 'pk')[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, (to_micros(getattr(rows[-1], field)), rows[-1].pk), True
+        return rows, max(position, cap), False
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        changed_from, deleted_from = self.sync_position(request)
+        limit = self.sync_page_size(request)
+        model_name = self.get_queryset().model._meta.model_name
+        horizon = timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_SAFETY_SECONDS', 5))
+
+        retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+        if deleted_from != (0, 0) and from_micros(deleted_from[0]) < horizon - retention:
+            return Response({'detail': 'Sync token expired; start a full sync.'}, status=status.HTTP_410_GONE)
+
+        cap = (to_micros(horizon), 0)
+        base = self.get_queryset().model._default_manager.only('pk', 'updated_at')
+        changed, changed_to, more_changed = self.read_feed(base, 'updated_at', changed_from, cap, limit)
+        tombstones, deleted_to, more_deleted = self.read_feed(
+            Tombstone.objects.filter(model=model_name), 'deleted_at', deleted_from, cap, limit)
+
+        token = encode_token(list(changed_to), list(deleted_to))
+        headers = {'ETag': quote_etag(token)}
+        since = request.query_params.get('since')
+        if (not changed and not tombstones and since
+                and quote_etag(since) in parse_etags(request.headers.get('If-None-Match', ''))):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response({
+            'results': self.sync_rows([obj.pk for obj in changed]) if changed else [],
+            'deleted': [tombstone.object_id for tombstone in tombstones],
+            'sync_token': token,
+            'has_more': more_changed or more_deleted,
+        }, headers=headers)
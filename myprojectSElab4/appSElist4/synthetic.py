@@ -0,0 +1,204 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.db.models.functions import Right
+from django.utils import timezone
+
+from . import cache
+from .models import (Product, Customer, Order, OrderItem, DailyRollup, ProductDailyRollup, RollupDirtyDay,
+                     OutboxEvent, Tombstone)
+
+ADJECTIVES = [
+    'Classic', 'Compact', 'Deluxe', 'Digital', 'Electric', 'Ergonomic', 'Portable', 'Premium',
+    'Smart', 'Wireless', 'Vintage', 'Rugged', 'Silent', 'Modular', 'Solar', 'Turbo', 'Foldable',
+    'Heated', 'Waterproof', 'Magnetic', 'Cordless', 'Mini', 'Pro', 'Ultra',
+]
+NOUNS = [
+    'Speaker', 'Keyboard', 'Monitor', 'Lamp', 'Chair', 'Desk', 'Camera', 'Console', 'Headset',
+    'Router', 'Kettle', 'Drone', 'Backpack', 'Watch', 'Charger', 'Tablet', 'Blender', 'Projector',
+    'Mouse', 'Microphone', 'Toaster', 'Scooter', 'Thermostat', 'Vacuum', 'Printer', 'Fan',
+]
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay', 'Soylent']
+FIRST_NAMES = [
+    'Lando', 'Carlos', 'Oscar', 'Charles', 'Max', 'Lewis', 'George', 'Daniel', 'Fernando',
+    'Esteban', 'Pierre', 'Yuki', 'Alex', 'Valtteri', 'Kevin', 'Nico', 'Lance', 'Sergio',
+]
+LAST_NAMES = [
+    'Norris', 'Sainz', 'Piastri', 'Leclerc', 'Verstappen', 'Hamilton', 'Russell', 'Ricciardo',
+    'Alonso', 'Ocon', 'Gasly', 'Tsunoda', 'Albon', 'Bottas', 'Magnussen', 'Hulkenberg',
+]
+STREETS = ['Monaco Street', 'Barcelona Street', 'Melbourne Street', 'Silverstone Road', 'Monza Avenue',
+           'Suzuka Lane', 'Spa Boulevard', 'Interlagos Way', 'Zandvoort Drive']
+CITIES = ['Monaco', 'Barcelona', 'Melbourne', 'London', 'Milan', 'Tokyo', 'Brussels', 'Sao Paulo']
+# Most orders have moved on from "New" by the time anyone looks at them.
+STATUS_WEIGHTS = {'New': 2, 'In Process': 3, 'Sent': 5}
+# Most lines are for a single unit.
+QUANTITIES = (1, 2, 3, 5)
+QUANTITY_WEIGHTS = (80, 12, 5, 3)
+
+
+def product_name(index, rng):
+    # The index keeps names unique across batches, workers and runs.
+    return f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index:07d}'
+
+
+def product_price(rng):
+    # Log-normal prices: mostly tens to hundreds, with a long tail.
+    return Decimal(str(round(min(max(rng.lognormvariate(4, 1.2), 0.99), 99999.99), 2)))
+
+
+def next_product_index():
+    """
+    One past the highest index in an existing synthetic product name, so new
+    names never repeat one even after products were deleted.
+    """
+    highest = (Product.objects.filter(name__regex=r' [0-9]{7}$')
+               .aggregate(highest=Max(Right('name', 7)))['highest'])
+    return int(highest) + 1 if highest else 0
+
+
+def customer_address(index, rng):
+    return f'{rng.randint(1, 250)} {rng.choice(STREETS)}, {rng.randint(10000, 99999)} {rng.choice(CITIES)}'
+
+
+def clear():
+    """
+    Empty the product, customer and order tables without per-row signals,
+    along with the rollups, outbox events and tombstones derived from them.
+    """
+    models = [ProductDailyRollup, DailyRollup, RollupDirtyDay, OutboxEvent, Tombstone,
+              OrderItem, Order, Customer, Product]
+    tables = [model._meta.db_table for model in models]
+    with transaction.atomic():
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+    cache.bump_version(cache.PRODUCTS)
+    cache.bump_version(cache.ORDERS)
+
+
+def backdate_orders(orders, now, days, rng):
+    """
+    ``Order.date`` is auto_now_add, so spread it over the last ``days`` days
+    after the insert with one parameterized UPDATE per batch.
+    """
+    ops = connection.ops
+    sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+        ops.quote_name(Order._meta.db_table), ops.quote_name('date'), ops.quote_name('id'),
+    )
+    params = [
+        (ops.adapt_datetimefield_value(now - timedelta(seconds=rng.randint(0, days * 86400))), order.pk)
+        for order in orders
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def generate(products=0, customers=0, orders=0, seed=0, batch_size=5000, max_products_per_order=5,
+             days=365, product_offset=None, customer_offset=None, progress=None):
+    """
+    Append synthetic products, customers and orders with ``bulk_create``,
+    including the order items, committing once per batch. Numbering
+    continues from ``product_offset``/``customer_offset`` (by default past
+    the highest synthetic product index and the customers already present),
+    so repeated calls grow the same dataset. Orders draw from every existing product and customer and are
+    spread over the last ``days`` days.
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda model, done: None)
+
+    if product_offset is None:
+        product_offset = next_product_index()
+    for start in range(0, products, batch_size):
+        stop = min(start + batch_size, products)
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                Product(name=product_name(product_offset + i, rng), price=product_price(rng),
+                        available=rng.random() < 0.8)
+                for i in range(start, stop)
+            )
+        report('products', stop)
+
+    if customer_offset is None:
+        customer_offset = Customer.objects.count()
+    for start in range(0, customers, batch_size):
+        stop = min(start + batch_size, customers)
+        with transaction.atomic():
+            Customer.objects.bulk_create(
+                Customer(name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                         address=customer_address(customer_offset + i, rng))
+                for i in range(start, stop)
+            )
+        report('customers', stop)
+
+    if not orders:
+        return
+    prices = dict(Product.objects.values_list('pk', 'price'))
+    product_ids = list(prices)
+    customer_ids = list(Customer.objects.values_list('pk', flat=True))
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    now = timezone.now()
+    for start in range(0, orders, batch_size):
+        stop = min(start + batch_size, orders)
+        with transaction.atomic():
+            created = Order.objects.bulk_create(
+                Order(customer_id=rng.choice(customer_ids), status=rng.choices(statuses, weights)[0])
+                for _ in range(start, stop)
+            )
+            backdate_orders(created, now, days, rng)
+            OrderItem.objects.bulk_create(
+                OrderItem(order_id=order.pk, product_id=product_id, unit_price=prices[product_id],
+                          quantity=rng.choices(QUANTITIES, QUANTITY_WEIGHTS)[0])
+                for order in created
+                for product_id in rng.sample(product_ids, min(len(product_ids),
+                                                              rng.randint(1, max_products_per_order)))
+            )
+            Order.objects.filter(pk__gte=created[0].pk, pk__lte=created[-1].pk).refresh_totals()
+        report('orders', stop)
+
+
+def _generate_in_worker(kwargs):
+    import django
+    django.setup()
+    try:
+        generate(**kwargs)
+    finally:
+        connections.close_all()
+
+
+def _split(total, workers):
+    share, remainder = divmod(total, workers)
+    return [share + (1 if worker < remainder else 0) for worker in range(workers)]
+
+
+def generate_parallel(products=0, customers=0, orders=0, seed=0, workers=1, **kwargs):
+    """
+    Like ``generate`` but splits the rows across ``workers`` processes, each
+    with its own seed and name range. Products and customers are created
+    before any orders so every worker can reference all of them.
+    """
+    if workers <= 1:
+        generate(products, customers, orders, seed=seed, **kwargs)
+        return
+    kwargs.pop('progress', None)
+
+    product_offset = next_product_index()
+    customer_offset = Customer.objects.count()
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        first_phase = []
+        for worker, (product_count, customer_count) in enumerate(
+                zip(_split(products, workers), _split(customers, workers))):
+            first_phase.append(dict(
+                kwargs, products=product_count, customers=customer_count, seed=seed + worker,
+                product_offset=product_offset + sum(_split(products, workers)[:worker]),
+                customer_offset=customer_offset + sum(_split(customers, workers)[:worker]),
+            ))
+        list(pool.map(_generate_in_worker, first_phase))
+        second_phase = [dict(kwargs, orders=order_count, seed=seed + workers + worker)
+                        for worker, order_count in enumerate(_split(orders, workers))]
+        list(pool.map(_generate_in_worker, second_phase))
@@ -0,0 +1,51 @@
+"""Tasks run by ``run_worker``; see ``appSElist4.jobs``."""
+from io import StringIO
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from .analytics import refresh_dirty_days
+from .jobs import task
+from .models import Job, Order
+
+
+@task(name='refresh_order_totals_for_products')
+def refresh_order_totals_for_products(product_ids):
+    """Refresh the stored totals of the orders holding any of ``product_ids``."""
+    for start in range(0, len(product_ids), 500):
+        batch = product_ids[start:start + 500]
+        Order.objects.filter(products__in=batch).distinct().refresh_totals()
+
+
+@task(name='recompute_order_totals')
+def recompute_order_totals(batch_size=1000):
+    out = StringIO()
+    call_command('recompute_order_totals', batch_size=batch_size, stdout=out)
+    return out.getvalue().strip()
+
+
+@task(name='bulk_write', max_attempts=1)
+def bulk_write(resource, method, items):
+    """
+    Run a ``bulk/`` request queued with ``Prefer: respond-async`` and return
+    its summary. Not retried, as a failure may come after some chunks were
+    committed.
+    """
+    from .views import BULK_VIEWSETS
+    view = BULK_VIEWSETS[resource](request=None, format_kwarg=None, action='bulk', kwargs={})
+    summary, _ = view.run_bulk(method, items)
+    return summary
+
+
+@task(name='refresh_rollups')
+def refresh_rollups():
+    return refresh_dirty_days()
+
+
+def schedule_rollup_refresh():
+    """Queue ``refresh_rollups`` ``ROLLUP_REFRESH_DELAY`` seconds out, unless one is already waiting."""
+    if not Job.objects.filter(task=refresh_rollups.task_name, status=Job.QUEUED).exists():
+        refresh_rollups.enqueue(run_at=timezone.now() + timedelta(seconds=settings.ROLLUP_REFRESH_DELAY))
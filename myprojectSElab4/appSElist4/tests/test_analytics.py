@@ -0,0 +1,152 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.analytics import parity_errors, refresh_dirty_days, top_customers
+from appSElist4.models import Product, Customer, Order, DailyRollup, ProductDailyRollup, RollupDirtyDay, Job
+from appSElist4.serializers import OrderSerializer
+
+
+class RollupTest(TestCase):
+
+    def setUp(self):
+        self.console = Product.objects.create(name='Xbox series s', price='999.00', available=True)
+        self.pad = Product.objects.create(name='Controller', price='50.00', available=True)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco')
+        self.today = timezone.localdate()
+
+    def place(self, items, status='New'):
+        serializer = OrderSerializer(data={'customer': self.customer.pk, 'status': status, 'items': items})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_writes_mark_days_and_refresh_recomputes_them(self):
+        order = self.place([{'product': self.console.pk, 'quantity': 2}])
+        self.place([{'product': self.pad.pk, 'quantity': 3}], status='Sent')
+        self.assertTrue(RollupDirtyDay.objects.filter(day=self.today).exists())
+        self.assertEqual(Job.objects.filter(task='refresh_rollups', status=Job.QUEUED).count(), 1)
+
+        self.assertEqual(refresh_dirty_days(), 1)
+        self.assertFalse(RollupDirtyDay.objects.exists())
+        rows = {row.status: (row.orders, row.units, row.revenue) for row in DailyRollup.objects.all()}
+        self.assertEqual(rows, {'New': (1, 2, Decimal('1998.00')), 'Sent': (1, 3, Decimal('150.00'))})
+
+        order.status = 'Sent'
+        order.save()
+        Order.objects.filter(pk=order.pk).update(status='In Process')
+        order.products.add(self.pad)
+        refresh_dirty_days()
+        rows = {row.status: (row.orders, row.units) for row in DailyRollup.objects.all()}
+        self.assertEqual(rows, {'In Process': (1, 3), 'Sent': (1, 3)})
+        self.assertEqual(ProductDailyRollup.objects.get(product=self.pad).units, 4)
+        self.assertEqual(parity_errors(), [])
+
+        order.delete()
+        refresh_dirty_days()
+        self.assertEqual(list(DailyRollup.objects.values_list('status', 'orders')), [('Sent', 1)])
+        self.assertEqual(parity_errors(), [])
+
+    def test_moving_an_order_refreshes_both_days(self):
+        order = self.place([{'product': self.console.pk, 'quantity': 1}])
+        refresh_dirty_days()
+        yesterday = self.today - timedelta(days=1)
+
+        Order.objects.filter(pk=order.pk).update(date=timezone.now() - timedelta(days=1))
+        refresh_dirty_days()
+        self.assertEqual(list(DailyRollup.objects.values_list('day', 'orders')), [(yesterday, 1)])
+
+        order.refresh_from_db()
+        order.date = timezone.now()
+        order.save()
+        refresh_dirty_days()
+        self.assertEqual(list(DailyRollup.objects.values_list('day', 'orders')), [(self.today, 1)])
+        self.assertEqual(parity_errors(), [])
+
+    def test_verify_reports_drift_until_rebuilt(self):
+        self.place([{'product': self.console.pk, 'quantity': 1}])
+        refresh_dirty_days()
+        DailyRollup.objects.update(revenue=Decimal('1.00'))
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+        out = io.StringIO()
+        call_command('rebuild_rollups', start=str(self.today), end=str(self.today), stdout=out)
+        self.assertIn('Rebuilt the rollups of 1 days', out.getvalue())
+        out = io.StringIO()
+        call_command('rebuild_rollups', verify=True, stdout=out)
+        self.assertIn('Rollups match', out.getvalue())
+
+
+class AnalyticsEndpointTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.console = Product.objects.create(name='Xbox series s', price='999.00', available=True)
+        self.pad = Product.objects.create(name='Controller', price='50.00', available=True)
+        self.lando = Customer.objects.create(name='Lando Norris', address='Monaco')
+        self.oscar = Customer.objects.create(name='Oscar Piastri', address='Melbourne')
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+        old = Order.objects.create(customer=self.oscar, status='Sent')
+        old.products.add(self.console)
+        Order.objects.filter(pk=old.pk).update(date=timezone.now() - timedelta(days=1))
+        new = Order.objects.create(customer=self.lando, status='New')
+        new.products.add(self.pad)
+
+        admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    def test_report_over_a_date_range(self):
+        data = self.client.get(reverse('analytics-list')).data
+        self.assertEqual([(row['day'], row['revenue']) for row in data['revenue_per_day']],
+                         [(self.yesterday, '999.00'), (self.today, '50.00')])
+        self.assertEqual(data['orders_per_status'], {'New': 1, 'Sent': 1})
+        self.assertEqual([row['name'] for row in data['top_products']], ['Xbox series s', 'Controller'])
+        self.assertEqual(data['top_customers'][0]['name'], 'Oscar Piastri')
+
+        data = self.client.get(reverse('analytics-list'), {'start': str(self.today), 'top': 1}).data
+        self.assertEqual([row['day'] for row in data['revenue_per_day']], [self.today])
+        self.assertEqual(data['orders_per_status'], {'New': 1})
+        self.assertEqual([row['name'] for row in data['top_products']], ['Controller'])
+        self.assertEqual(len(data['top_customers']), 1)
+
+    def test_report_includes_writes_not_yet_refreshed(self):
+        order = Order.objects.create(customer=self.lando, status='New')
+        order.products.add(self.console)
+        data = self.client.get(reverse('analytics-list'), {'start': str(self.today)}).data
+        self.assertEqual(data['revenue_per_day'][0]['revenue'], '1049.00')
+        self.assertEqual(data['orders_per_status'], {'New': 2})
+
+    def test_top_customers_are_cached_until_orders_or_customers_change(self):
+        self.assertEqual([row['name'] for row in top_customers(2)], ['Oscar Piastri', 'Lando Norris'])
+        with self.assertNumQueries(0):
+            top_customers(2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.lando, status='New')
+            order.products.add(self.console)
+        self.assertEqual([row['name'] for row in top_customers(2)], ['Lando Norris', 'Oscar Piastri'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lando.name = 'Lando N.'
+            self.lando.save()
+        self.assertEqual(top_customers(1)[0]['name'], 'Lando N.')
+
+    def test_invalid_range_and_non_staff_are_rejected(self):
+        response = self.client.get(reverse('analytics-list'), {'start': str(self.today), 'end': str(self.yesterday)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.client.get(reverse('analytics-list')).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,100 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from appSElist4.authentication import token_cache, user_cache
+from appSElist4.models import Product, Customer, Order
+
+
+class AsyncReadViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        token_cache.clear()
+        self.products = [
+            Product.objects.create(name=f'Async product {i}', price=f'{i}.50', available=i % 2 == 0)
+            for i in range(5)
+        ]
+        customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        self.order = Order.objects.create(customer=customer, status='New')
+        self.order.products.add(*self.products[:3])
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = str(AccessToken.for_user(user))
+        self.async_client = AsyncClient()
+
+    async def get(self, path, data=None, token=None):
+        return await self.async_client.get(path, data, headers={'Authorization': f'Bearer {token or self.token}'})
+
+    def sync_results(self, name):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return client.get(reverse(name)).json()['results']
+
+    def test_payloads_match_the_drf_viewsets(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        for async_name, name in (('async-product-list', 'product-list'), ('async-order-list', 'order-list')):
+            response = client.get(reverse(async_name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], self.sync_results(name))
+
+    async def test_keyset_pagination(self):
+        response = await self.get(reverse('async-product-list'), {'page_size': 2})
+        page = response.json()
+        self.assertEqual([p['id'] for p in page['results']], [p.id for p in self.products[:2]])
+        seen = [p['id'] for p in page['results']]
+        while page['next']:
+            page = (await self.get(page['next'])).json()
+            seen += [p['id'] for p in page['results']]
+        self.assertEqual(seen, [p.id for p in self.products])
+
+        response = await self.get(reverse('async-product-list'), {'after': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_retrieve(self):
+        response = await self.get(reverse('async-order-detail', kwargs={'pk': self.order.id}))
+        self.assertEqual(response.json()['products'], [p.id for p in self.products[:3]])
+        self.assertEqual(response.json()['total_amount'], '4.50')
+        response = await self.get(reverse('async-product-detail', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_authentication_is_required(self):
+        response = await AsyncClient().get(reverse('async-product-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        response = await self.get(reverse('async-product-list'), token='nonsense')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+    async def test_read_only(self):
+        response = await self.async_client.post(reverse('async-product-list'), {},
+                                                headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 405)
+
+    async def test_concurrent_requests_are_instrumented_separately(self):
+        # Load the user into the authentication cache first, so no gathered
+        # request's count depends on whether another one got there before it.
+        await self.get(reverse('async-order-list'))
+        responses = await asyncio.gather(*[
+            self.get(reverse('async-order-list')) for _ in range(5)
+        ])
+        for response in responses:
+            self.assertEqual(response.status_code, 200, response.content)
+            # Orders page and their product ids.
+            self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK,
+                                       'DEFAULT_THROTTLE_RATES': {'user': '100/min', 'products': '3/min'}})
+    async def test_requests_spend_the_endpoint_throttle_budget(self):
+        for _ in range(3):
+            self.assertEqual((await self.get(reverse('async-product-list'))).status_code, 200)
+        response = await self.get(reverse('async-product-list'))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual((await self.get(reverse('async-order-list'))).status_code, 200)
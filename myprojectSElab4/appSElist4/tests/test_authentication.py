@@ -0,0 +1,122 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from appSElist4.authentication import FastJWTAuthentication, LRUCache, mark_user_changed, token_cache, user_cache
+from appSElist4.models import Customer
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class FastJWTAuthenticationTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        token_cache.clear()
+        Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+
+    def login(self, username):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': 'testpassword'})
+        token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return AccessToken(token)
+
+    def test_obtained_tokens_carry_staff_claims(self):
+        self.assertTrue(self.login('testadmin')['is_staff'])
+        token = self.login('testuser')
+        self.assertFalse(token['is_staff'])
+        self.assertIn('auth_time', token)
+
+    def test_reads_need_no_user_lookup(self):
+        self.login('testuser')
+        # Only the customer page.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('customer-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_still_check_the_user_row(self):
+        self.login('testuser')
+        response = self.client.post(reverse('customer-list'), {'name': 'Oscar', 'address': 'Street 2'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.login('testadmin')
+        response = self.client.post(reverse('customer-list'), {'name': 'Oscar', 'address': 'Street 2'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_tokens_without_claims_fall_back_to_the_user_row(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        with self.assertNumQueries(2):
+            self.client.get(reverse('customer-list'))
+        # ...which is then cached.
+        with self.assertNumQueries(1):
+            self.client.get(reverse('customer-list'))
+
+    def test_user_changes_invalidate_claims_and_cached_rows(self):
+        self.login('testadmin')
+        self.client.post(reverse('customer-list'), {'name': 'Oscar', 'address': 'Street 2'})
+
+        self.admin.is_staff = False
+        self.admin.save()
+        response = self.client.post(reverse('customer-list'), {'name': 'Max', 'address': 'Street 3'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.admin.is_active = False
+        self.admin.save()
+        response = self.client.get(reverse('customer-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changes_marked_by_other_processes_drop_cached_users(self):
+        self.login('testadmin')
+        self.client.post(reverse('customer-list'), {'name': 'Oscar', 'address': 'Street 2'})
+        # Another process demotes the admin: only the shared marker is set
+        # here, while this process's cached row still has is_staff.
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        with mock.patch('appSElist4.authentication.user_cache.pop'):
+            mark_user_changed(self.admin.pk)
+        response = self.client.post(reverse('customer-list'), {'name': 'Carlos', 'address': 'Street 3'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cached_users_are_not_shared_between_requests(self):
+        token = AccessToken.for_user(self.user)
+        authentication = FastJWTAuthentication()
+        first = authentication.get_cached_user(token)
+        second = authentication.get_cached_user(token)
+        self.assertEqual(first.pk, second.pk)
+        self.assertIsNot(first, second)
+
+    def test_token_signatures_are_verified_once(self):
+        self.login('testuser')
+        with mock.patch.object(JWTAuthentication, 'get_validated_token',
+                               wraps=JWTAuthentication().get_validated_token) as verify:
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('customer-list')).status_code, status.HTTP_200_OK)
+        self.assertEqual(verify.call_count, 1)
+
+
+class LRUCacheTest(SimpleTestCase):
+
+    def test_eviction_and_expiry(self):
+        lru = LRUCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+        lru.set('old', 4, expires_at=0)
+        self.assertIsNone(lru.get('old'))
+        with mock.patch('appSElist4.authentication.time.time', return_value=10 ** 12):
+            self.assertIsNone(lru.get('a'))
+
+    def test_zero_size_disables_the_cache(self):
+        lru = LRUCache(maxsize=0)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
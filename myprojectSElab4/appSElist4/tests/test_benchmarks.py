@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+from appSElist4.benchmarks import compare, run_suite
+from appSElist4.models import Product, Customer, Order
+
+
+class BenchmarkSuiteTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_suite_grows_dataset_and_reports_every_scenario(self):
+        results = run_suite(scales=(10, 30), repeat=2)
+
+        self.assertEqual(set(results), {'10', '30'})
+        self.assertEqual(Order.objects.count(), 30)
+        self.assertEqual(Customer.objects.count(), 3)
+        # Products created by the product_create scenario come on top of the dataset.
+        self.assertGreaterEqual(Product.objects.count(), 30)
+        for metrics in results['30'].values():
+            self.assertEqual(set(metrics), {'median_ms', 'p95_ms', 'queries', 'peak_kib'})
+        self.assertEqual(results['10']['order_list']['queries'], results['30']['order_list']['queries'])
+
+    def test_compare_flags_slower_and_chattier_scenarios(self):
+        baseline = {'1000': {
+            'product_list': {'median_ms': 10.0, 'queries': 2},
+            'order_list': {'median_ms': 10.0, 'queries': 3},
+        }}
+        results = {'1000': {
+            'product_list': {'median_ms': 11.0, 'queries': 2},
+            'order_list': {'median_ms': 13.0, 'queries': 4},
+            'product_search': {'median_ms': 50.0, 'queries': 2},
+        }}
+
+        regressions = compare(results, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('1000/order_list') for line in regressions))
@@ -0,0 +1,130 @@
+import json
+from decimal import Decimal
+
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from appSElist4.models import Product, Customer, Order
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class BulkApiTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        self.product_bulk_url = reverse('product-bulk')
+        self.customer_bulk_url = reverse('customer-bulk')
+        self.order_bulk_url = reverse('order-bulk')
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def test_bulk_create_upserts_products_by_name(self):
+        data = [
+            {'name': 'Xbox series s', 'price': '899.00', 'available': False},
+            {'name': 'PlayStation 5 pro', 'price': '889.00', 'available': True},
+        ]
+        response = self.client.post(self.product_bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('899.00'))
+        self.assertFalse(self.product.available)
+        self.assertTrue(Product.objects.filter(name='PlayStation 5 pro').exists())
+
+    def test_bulk_upsert_only_overwrites_fields_each_item_sent(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=7)
+        data = [
+            {'name': 'Xbox series s', 'price': '6.00'},
+            {'name': 'PlayStation 5 pro', 'price': '889.00', 'available': True, 'stock': 3},
+            {'name': 'Switch 2', 'price': '449.00', 'stock': 5},
+            {'name': 'Switch 2', 'price': '429.00'},
+        ]
+        response = self.client.post(self.product_bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual((response.data['created'], response.data['updated']), (2, 1))
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.price, self.product.available, self.product.stock),
+                         (Decimal('6.00'), True, 7))
+        self.assertEqual(Product.objects.get(name='PlayStation 5 pro').stock, 3)
+        switch = Product.objects.get(name='Switch 2')
+        self.assertEqual((switch.price, switch.stock), (Decimal('429.00'), 5))
+
+    def test_bulk_create_reports_errors_per_item(self):
+        data = [
+            {'name': 'Valid product', 'price': '1.00'},
+            {'name': '', 'price': '-1.00'},
+            'not an object',
+        ]
+        response = self.client.post(self.product_bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('name', response.data['errors'][0]['errors'])
+        self.assertIn('price', response.data['errors'][0]['errors'])
+
+    def test_bulk_create_accepts_ndjson(self):
+        body = '\n'.join(json.dumps({'name': f'NDJSON product {i}', 'price': '2.50'}) for i in range(3))
+        response = self.client.post(self.product_bulk_url, body + '\n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Product.objects.filter(name__startswith='NDJSON').count(), 3)
+
+    def test_bulk_create_validates_in_a_constant_number_of_queries(self):
+        def post(count):
+            data = [{'customer': self.customer.pk, 'products': [self.product.pk], 'status': 'New'}
+                    for _ in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.order_bulk_url, data, format='json')
+            self.assertEqual(response.data['created'], count)
+            return len(queries)
+
+        post(1)  # Warm the authenticated user cache.
+        self.assertEqual(post(2), post(20))
+        self.assertEqual(Order.objects.filter(products=self.product).count(), 23)
+        self.assertEqual(Order.objects.first().total_amount, Decimal('999.00'))
+
+    def test_bulk_create_orders_with_items(self):
+        other = Product.objects.create(name='PlayStation 5 pro', price=889.00, available=True)
+        data = [{'customer': self.customer.pk, 'status': 'New',
+                 'items': [{'product': self.product.pk, 'quantity': 2}, {'product': other.pk}]}
+                for _ in range(3)]
+        response = self.client.post(self.order_bulk_url, data, format='json')
+        self.assertEqual(response.data['created'], 3)
+        for order in Order.objects.all():
+            self.assertEqual(order.total_amount, Decimal('2887.00'))
+            self.assertEqual(sorted(order.items.values_list('quantity', flat=True)), [1, 2])
+
+    def test_bulk_update_products_refreshes_order_fulfillable(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.product)
+        data = [{'id': self.product.pk, 'price': '10.00', 'available': False}, {'id': 99999, 'price': '1.00'}]
+        response = self.client.patch(self.product_bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+        order.refresh_from_db()
+        # The order keeps the price it was placed at.
+        self.assertEqual(order.total_amount, Decimal('999.00'))
+        self.assertFalse(order.fulfillable)
+
+    def test_bulk_delete_customers(self):
+        other = Customer.objects.create(name='Oscar Piastri', address='Melbourne Street 3')
+        response = self.client.delete(self.customer_bulk_url, [self.customer.pk, other.pk], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertFalse(Customer.objects.exists())
+
+    def test_bulk_endpoints_require_admin(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        response = self.client.post(self.product_bulk_url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,93 @@
+import json
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from appSElist4.instrumentation import QueryInstrumentationMiddleware, pool_metrics
+from appSElist4.models import Product
+from myprojectSElab4.dbconfig import database_config, replica_configs
+
+
+class DatabaseConfigTest(SimpleTestCase):
+
+    def test_defaults_use_persistent_checked_connections(self):
+        config = database_config({})
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['HOST'], config['PORT']), ('localhost', '5433'))
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('OPTIONS', config)
+
+    def test_environment_overrides(self):
+        config = database_config({
+            'DB_HOST': 'db.internal', 'DB_NAME': 'shop', 'DB_CONN_MAX_AGE': '0',
+            'DB_CONN_HEALTH_CHECKS': 'false',
+        })
+        self.assertEqual((config['HOST'], config['NAME'], config['CONN_MAX_AGE']), ('db.internal', 'shop', 0))
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+        config = database_config({'DB_ENGINE': 'sqlite3'}, default_sqlite_name='/tmp/x.sqlite3')
+        self.assertEqual((config['ENGINE'], config['NAME']), ('django.db.backends.sqlite3', '/tmp/x.sqlite3'))
+
+    def test_pool(self):
+        with mock.patch('myprojectSElab4.dbconfig.pool_available', return_value=True):
+            config = database_config({'DB_POOL': 'on', 'DB_POOL_MAX_SIZE': '20', 'DB_POOL_TIMEOUT': '2.5'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 2.5, 'max_idle': 300.0})
+
+        with mock.patch('myprojectSElab4.dbconfig.pool_available', return_value=False), \
+                self.assertRaisesMessage(ImproperlyConfigured, 'psycopg[binary,pool]'):
+            database_config({'DB_POOL': 'on'})
+
+    def test_replicas_copy_the_primary(self):
+        primary = database_config({'DB_NAME': 'shop'})
+        replicas = replica_configs(primary, {'DB_REPLICA_HOSTS': 'r1.internal, r2.internal:6432'})
+        self.assertEqual(list(replicas), ['replica1', 'replica2'])
+        self.assertEqual((replicas['replica1']['HOST'], replicas['replica1']['PORT']), ('r1.internal', '5433'))
+        self.assertEqual((replicas['replica2']['HOST'], replicas['replica2']['PORT']), ('r2.internal', '6432'))
+        self.assertEqual(replicas['replica2']['NAME'], 'shop')
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(replica_configs(primary, {}), {})
+
+    def test_invalid_values(self):
+        for env in ({'DB_POOL': 'maybe'}, {'DB_CONN_MAX_AGE': 'forever'}, {'DB_ENGINE': 'oracle'},
+                    {'DB_ENGINE': 'sqlite3', 'DB_POOL': '1'}):
+            with self.assertRaises(ImproperlyConfigured, msg=env):
+                database_config(env)
+
+
+class FakePool:
+    def get_stats(self):
+        return {'pool_min': 2, 'pool_max': 10, 'pool_size': 6, 'pool_available': 1,
+                'requests_waiting': 3, 'requests_num': 40, 'requests_wait_ms': 100}
+
+
+class ConnectionMetricsTest(TestCase):
+
+    def reconnecting_view(self, request):
+        # Closing the in-memory test database would drop it; announce a new
+        # connection (or pool checkout) the way connect() does instead.
+        connection_created.send(sender=type(connection), connection=connection)
+        Product.objects.count()
+        return HttpResponse('ok')
+
+    def test_connections_opened_during_a_request_are_counted(self):
+        with self.assertLogs('appSElist4.perf', level='INFO') as logs:
+            response = QueryInstrumentationMiddleware(self.reconnecting_view)(RequestFactory().get('/'))
+        self.assertEqual(json.loads(logs.records[0].getMessage())['db_connects'], 1)
+        self.assertIn('connect;desc="1 connections opened"', response['Server-Timing'])
+
+    def test_pool_metrics(self):
+        settings_dict = dict(connection.settings_dict, OPTIONS={'pool': {'max_size': 10}})
+        with mock.patch.object(connection, 'settings_dict', settings_dict), \
+                mock.patch.object(connection, 'pool', FakePool(), create=True):
+            self.assertEqual(pool_metrics(), {'default': {
+                'checkouts': 40, 'avg_wait_ms': 2.5, 'in_use': 5, 'idle': 1, 'waiting': 3, 'saturation': 0.5,
+            }})
+            with self.assertLogs('appSElist4.perf', level='INFO'):
+                response = QueryInstrumentationMiddleware(lambda request: HttpResponse('ok'))(RequestFactory().get('/'))
+            self.assertIn('pool-default;desc="5 in use, 3 waiting"', response['Server-Timing'])
+        self.assertEqual(pool_metrics(), {})
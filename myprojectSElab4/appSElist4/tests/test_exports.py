@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.management import call_command
+from django.urls import reverse
+from appSElist4.models import Product, Customer, Order
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class ExportTest(APITestCase):
+
+    def setUp(self):
+        self.product1 = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        self.product2 = Product.objects.create(name='PlayStation 5 pro', price=889.00, available=False)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product1, self.product2)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def read_stream(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_order_export_inlines_products_and_totals(self):
+        response = self.client.get(reverse('order-export'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read_stream(response).splitlines()]
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['products'], [self.product1.id, self.product2.id])
+        self.assertEqual(Decimal(rows[0]['total_amount']), Decimal('1888.00'))
+        self.assertFalse(rows[0]['fulfillable'])
+
+    def test_json_export_matches_ndjson_rows(self):
+        ndjson = [json.loads(line) for line in self.read_stream(self.client.get(reverse('product-export'))).splitlines()]
+        response = self.client.get(reverse('product-export'), {'export_format': 'json'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(self.read_stream(response)), ndjson)
+
+    def test_product_export_as_csv_honours_filters(self):
+        response = self.client.get(reverse('product-export'), {'export_format': 'csv', 'available': 'true'})
+        rows = list(csv.DictReader(io.StringIO(self.read_stream(response))))
+        self.assertEqual(rows, [{'id': str(self.product1.id), 'name': 'Xbox series s',
+                                 'price': '999.00', 'available': 'True', 'stock': ''}])
+
+    def test_unknown_export_format_is_rejected(self):
+        response = self.client.get(reverse('customer-export'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command_streams_in_chunks(self):
+        for i in range(5):
+            Customer.objects.create(name=f'Customer {i}', address=f'Street {i}')
+        stdout = io.StringIO()
+        call_command('export_data', 'customers', '--chunk-size', '2', stdout=stdout)
+        names = [json.loads(line)['name'] for line in stdout.getvalue().splitlines()]
+        self.assertEqual(names, ['Lando Norris'] + [f'Customer {i}' for i in range(5)])
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase, APIClient
+from django.core.cache import cache
+from django.urls import reverse
+from appSElist4.models import Product, Customer, Order
+from appSElist4.views import ProductViewSet, CustomerViewSet, OrderViewSet
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class FastListParityTest(APITestCase):
+    """The values() list path must render byte-for-byte what the serializers render."""
+
+    def setUp(self):
+        prices = ['1.99', '0.10', '1000.00', '12.5', '7']
+        self.products = [
+            Product.objects.create(name=f'Parity product {i}', price=price, available=i % 2 == 0)
+            for i, price in enumerate(prices)
+        ]
+        customers = [
+            Customer.objects.create(name='Ada', address='Line 1\nLine 2'),
+            Customer.objects.create(name='Zoë "Z" Ünicode', address=''),
+        ]
+        for i, status in enumerate(['New', 'In Process', 'Sent', 'New']):
+            order = Order.objects.create(customer=customers[i % 2], status=status)
+            # Added out of id order; both paths must list related ids ascending.
+            order.products.add(*reversed(self.products[i:i + 3]))
+        Order.objects.create(customer=customers[0], status='New')
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def assert_parity(self, viewset, name, **params):
+        cache.clear()
+        fast = self.client.get(reverse(name), params)
+        cache.clear()
+        with mock.patch.object(viewset, 'fast_list', False):
+            slow = self.client.get(reverse(name), params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_products(self):
+        response = self.assert_parity(ProductViewSet, 'product-list')
+        self.assertEqual(response.data['results'][3]['price'], '12.50')
+        self.assert_parity(ProductViewSet, 'product-list', ordering='-price', page_size=2)
+        self.assert_parity(ProductViewSet, 'product-list', search='parity', fields='name,price')
+
+    def test_customers(self):
+        self.assert_parity(CustomerViewSet, 'customer-list')
+        self.assert_parity(CustomerViewSet, 'customer-list', fields='address')
+
+    def test_orders(self):
+        response = self.assert_parity(OrderViewSet, 'order-list')
+        self.assertEqual(response.data['results'][0]['products'], [p.id for p in self.products[:3]])
+        self.assert_parity(OrderViewSet, 'order-list', ordering='-date', fields='date,products,customer')
+        self.assert_parity(OrderViewSet, 'order-list', status='New', ordering='total_amount')
+
+    def test_next_page_cursor_parity(self):
+        first = self.assert_parity(OrderViewSet, 'order-list', page_size=2, ordering='status')
+        fast = self.client.get(first.data['next'])
+        with mock.patch.object(OrderViewSet, 'fast_list', False):
+            slow = self.client.get(first.data['next'])
+        self.assertEqual(len(fast.data['results']), 2)
+        self.assertEqual(fast.content, slow.content)
@@ -0,0 +1,94 @@
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.urls import reverse
+from appSElist4.models import Product, Customer, Order
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class FilterOrderingFieldsTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cheap = Product.objects.create(name='Cheap mouse', price=5.00, available=True)
+        self.mid = Product.objects.create(name='Average keyboard', price=50.00, available=False)
+        self.dear = Product.objects.create(name='Big monitor', price=500.00, available=True)
+        self.alice = Customer.objects.create(name='Alice', address='First Street 1')
+        self.bob = Customer.objects.create(name='Bob', address='Second Street 2')
+        self.new = Order.objects.create(customer=self.alice, status='New')
+        self.new.products.add(self.dear)
+        self.sent = Order.objects.create(customer=self.bob, status='Sent')
+        self.sent.products.add(self.cheap)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data['results']
+
+    def test_order_filters(self):
+        self.assertEqual([o['id'] for o in self.get('order-list', status='Sent')], [self.sent.id])
+        self.assertEqual([o['id'] for o in self.get('order-list', customer=self.alice.id)], [self.new.id])
+        self.assertEqual([o['id'] for o in self.get('order-list', min_total='100')], [self.new.id])
+        self.assertEqual(len(self.get('order-list', date_from='2000-01-01')), 2)
+        self.assertEqual(self.get('order-list', date_to='2000-01-01'), [])
+
+    def test_invalid_filter_values_are_rejected(self):
+        for params in ({'status': 'Lost'}, {'customer': 'abc'}, {'date_from': 'yesterday'}):
+            response = self.client.get(reverse('order-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+        response = self.client.get(reverse('product-list'), {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_is_whitelisted_and_paginated(self):
+        names = [p['name'] for p in self.get('product-list', ordering='-price')]
+        self.assertEqual(names, ['Big monitor', 'Average keyboard', 'Cheap mouse'])
+
+        response = self.client.get(reverse('product-list'), {'ordering': 'price', 'page_size': 2})
+        self.assertEqual([p['name'] for p in response.data['results']], ['Cheap mouse', 'Average keyboard'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['name'] for p in response.data['results']], ['Big monitor'])
+
+        # Fields outside ``ordering_fields`` are ignored, leaving the default id order.
+        names = [p['name'] for p in self.get('product-list', ordering='available')]
+        self.assertEqual(names, ['Cheap mouse', 'Average keyboard', 'Big monitor'])
+
+    def test_cursors_stay_stable_across_equal_sort_values(self):
+        Product.objects.all().delete()
+        ids = [Product.objects.create(name=f'Same price {i}', price=10.00, available=True).pk for i in range(4)]
+        response = self.client.get(reverse('product-list'), {'ordering': 'price', 'page_size': 2})
+        seen = [p['id'] for p in response.data['results']]
+        self.assertEqual(seen, ids[:2])
+
+        # A row sharing the sort value lands before the cursor; with an
+        # offset-based cursor the next page would repeat a row.
+        Product.objects.filter(pk=ids[0]).delete()
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += [p['id'] for p in response.data['results']]
+        self.assertEqual(seen, ids)
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([p['id'] for p in response.data['results']], ids[1:2])
+
+    def test_sparse_fieldsets(self):
+        products = self.get('product-list', fields='id,name', ordering='-price')
+        self.assertEqual(products[0], {'id': self.dear.id, 'name': 'Big monitor'})
+
+        response = self.client.get(reverse('product-list'), {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fieldsets_skip_unrequested_columns_and_relations(self):
+        # Authenticated user and the order page; no product ids.
+        with self.assertNumQueries(2) as queries:
+            orders = self.get('order-list', fields='id,status')
+        self.assertEqual(orders, [{'id': self.new.id, 'status': 'New'}, {'id': self.sent.id, 'status': 'Sent'}])
+        self.assertNotIn('"customer_id"', queries.captured_queries[-1]['sql'])
+
+        # The user row is cached now: the order page and its product ids.
+        with self.assertNumQueries(2):
+            orders = self.get('order-list', fields='id,products')
+        self.assertEqual(orders[0]['products'], [self.dear.id])
@@ -0,0 +1,65 @@
+import json
+
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from appSElist4.instrumentation import QueryInstrumentationMiddleware
+from appSElist4.models import Product, Customer, Order
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class QueryInstrumentationTest(APITestCase):
+
+    def setUp(self):
+        customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        product = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        for _ in range(3):
+            Order.objects.create(customer=customer, status='New').products.add(product)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def n_plus_one_view(self, request):
+        for order in Order.objects.all():
+            list(order.products.all())
+        return HttpResponse('ok')
+
+    def test_server_timing_header_reports_queries_and_phases(self):
+        response = self.client.get(reverse('order-list'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_structured_log_line_per_request(self):
+        with self.assertLogs('appSElist4.perf', level='INFO') as logs:
+            response = self.client.get(reverse('order-list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('order-list'))
+        self.assertEqual(record['queries'], 3)
+        self.assertEqual(record['duplicate_queries'], 0)
+        self.assertEqual(record['response_bytes'], len(response.content))
+
+    def test_duplicate_queries_are_detected(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one_view)
+        with self.assertLogs('appSElist4.perf', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/orders/'))
+        self.assertIn('dupes;desc="3 duplicate queries"', response['Server-Timing'])
+        self.assertEqual(logs.records[0].perf['duplicate_queries'], 3)
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_requests_log_their_sql(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one_view)
+        with self.assertLogs('appSElist4.perf', level='WARNING') as logs:
+            middleware(RequestFactory().get('/orders/'))
+        record = logs.records[0].perf
+        self.assertEqual(len(record['slow_queries']), 4)
+        self.assertTrue(any('appSElist4_orderitem' in sql for sql in record['duplicates']))
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_server_timing_header_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('order-list')))
@@ -0,0 +1,154 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.jobs import claim_jobs, renew_leases, requeue_expired, run_job, task
+from appSElist4.models import Product, Customer, Order, Job
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+    return value
+
+
+@task(name='tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_claims_by_priority_and_runs(self):
+        low = record.enqueue(value='low')
+        high = record.enqueue(value='high', priority=5)
+        record.enqueue(value='later', run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = claim_jobs(5, worker='test')
+        self.assertEqual([job.pk for job in claimed], [high.pk, low.pk])
+        self.assertEqual(claim_jobs(5, worker='other'), [])
+
+        for job in claimed:
+            self.assertTrue(run_job(job.pk))
+        self.assertEqual(calls, ['high', 'low'])
+        high.refresh_from_db()
+        self.assertEqual((high.status, high.result, high.attempts), (Job.DONE, 'high', 1))
+
+    @override_settings(JOB_RETRY_DELAY=60)
+    def test_failures_back_off_then_fail(self):
+        job = fail.enqueue()
+        self.assertFalse(run_job(claim_jobs(1)[0].pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=29))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertFalse(run_job(claim_jobs(1)[0].pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_expired_leases_are_requeued(self):
+        job = record.enqueue(value='lost')
+        claim_jobs(1)
+        self.assertEqual(requeue_expired(lease=3600), 0)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_expired(lease=3600), 1)
+        self.assertEqual([claimed.pk for claimed in claim_jobs(1)], [job.pk])
+
+    def test_renewed_leases_do_not_expire(self):
+        job = record.enqueue(value='long')
+        claimed = claim_jobs(1)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(renew_leases(claimed), 1)
+        self.assertEqual(requeue_expired(lease=3600), 0)
+
+        # A claim that was taken over is not renewed.
+        Job.objects.filter(pk=job.pk).update(locked_by='other')
+        self.assertEqual(renew_leases(claimed), 0)
+
+
+class BackgroundWorkTest(APITestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    def run_queued(self):
+        for job in claim_jobs(10):
+            run_job(job.pk)
+
+    def test_bulk_import_runs_as_a_job(self):
+        data = [{'name': f'Queued product {i}', 'price': '2.50'} for i in range(3)] + [{'name': ''}]
+        response = self.client.post(reverse('product-bulk'), data, format='json', HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Product.objects.filter(name__startswith='Queued').exists())
+
+        self.run_queued()
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], Job.DONE)
+        self.assertEqual(job['result']['created'], 3)
+        self.assertEqual([error['index'] for error in job['result']['errors']], [3])
+        self.assertEqual(Product.objects.filter(name__startswith='Queued').count(), 3)
+
+    @override_settings(ORDER_TOTALS_INLINE_LIMIT=0)
+    def test_large_product_changes_refresh_totals_in_a_job(self):
+        order = Order.objects.create(customer=Customer.objects.create(name='Lando Norris', address='Monaco'),
+                                     status='New')
+        order.products.add(self.product)
+        Product.objects.filter(pk=self.product.pk).update(available=False)
+        order.refresh_from_db()
+        self.assertTrue(order.fulfillable)
+
+        self.run_queued()
+        order.refresh_from_db()
+        self.assertFalse(order.fulfillable)
+        self.assertEqual(order.total_amount, Decimal('999.00'))
+
+    def test_jobs_require_staff(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.client.get(reverse('job-list')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class WorkerCommandTest(TransactionTestCase):
+
+    def test_thread_pool_drains_the_queue(self):
+        calls.clear()
+        for value in range(6):
+            record.enqueue(value=value)
+        fail.enqueue()
+        out = io.StringIO()
+        with override_settings(JOB_RETRY_DELAY=0):
+            call_command('run_worker', once=True, concurrency=3, interval=0.05, stdout=out)
+
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 6)
+        self.assertEqual(Job.objects.get(task='tests.fail').status, Job.FAILED)
+        self.assertIn('Ran 8 jobs, 2 failed', out.getvalue())
+
+    @override_settings(JOB_RETRY_DELAY=60)
+    def test_crashed_runs_are_requeued(self):
+        job = record.enqueue(value='crash')
+        with mock.patch('appSElist4.management.commands.run_worker.execute', side_effect=RuntimeError('pool died')):
+            call_command('run_worker', once=True, interval=0.05, stdout=io.StringIO(), stderr=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, 1, ''))
+        self.assertIn('pool died', job.last_error)
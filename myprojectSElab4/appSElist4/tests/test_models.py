@@ -1,6 +1,10 @@
 from django.test import TestCase
-from appSElist4.models import Product, Customer, Order
+from appSElist4.models import Product, Customer, Order, OrderItem
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from decimal import Decimal
+from io import StringIO
 
 class ProductModelTest(TestCase):
     def test_create_product_with_valid_data(self):
@@ -156,3 +160,90 @@ class OrderModelTest(TestCase):
         order.products.add(self.product1, self.product2)
         self.assertFalse(order.if_can_be_fulfilled())
 
+
+    def test_annotated_totals_match_python_computation(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.product1, self.product2)
+        empty_order = Order.objects.create(customer=self.customer, status='New')
+        expected_total = order.total_price()
+
+        orders = {o.pk: o for o in Order.objects.with_totals()}
+        with self.assertNumQueries(0):
+            self.assertEqual(orders[order.pk].total_price(), expected_total)
+            self.assertFalse(orders[order.pk].if_can_be_fulfilled())
+            self.assertEqual(orders[empty_order.pk].total_price(), 0)
+            self.assertTrue(orders[empty_order.pk].if_can_be_fulfilled())
+
+
+class OrderStoredTotalsTest(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Daniel Riccardo', address='Melbourne Blvd')
+        self.product1 = Product.objects.create(name='Product 1', price=Decimal('10.00'), available=True)
+        self.product2 = Product.objects.create(name='Product 2', price=Decimal('20.00'), available=True)
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product1, self.product2)
+
+    def assertStoredTotals(self, total, fulfillable):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal(total))
+        self.assertEqual(self.order.fulfillable, fulfillable)
+
+    def test_products_add_and_remove_update_stored_totals(self):
+        self.assertEqual(self.order.total_amount, Decimal('30.00'))
+        self.order.products.remove(self.product2)
+        self.assertStoredTotals('10.00', True)
+        self.order.products.clear()
+        self.assertStoredTotals('0.00', True)
+
+    def test_reverse_side_changes_update_stored_totals(self):
+        self.product2.order_set.remove(self.order)
+        self.assertStoredTotals('10.00', True)
+        self.product1.order_set.clear()
+        self.assertStoredTotals('0.00', True)
+
+    def test_product_save_keeps_prices_and_updates_fulfillable(self):
+        self.product1.price = Decimal('15.00')
+        self.product1.save()
+        self.assertStoredTotals('30.00', True)
+
+        product = Product.objects.get(pk=self.product2.pk)
+        product.available = False
+        product.save()
+        self.assertStoredTotals('30.00', False)
+
+    def test_bulk_product_updates_keep_prices_and_update_fulfillable(self):
+        Product.objects.filter(pk=self.product1.pk).update(price=Decimal('1.00'))
+        self.assertStoredTotals('30.00', True)
+
+        self.product2.available = False
+        Product.objects.bulk_update([self.product2], ['available'])
+        self.assertStoredTotals('30.00', False)
+
+    def test_items_snapshot_price_and_quantity(self):
+        OrderItem.objects.filter(order=self.order, product=self.product2).update(quantity=3)
+        self.product2.price = Decimal('99.00')
+        self.product2.save()
+        self.order.products.add(self.product2)  # Already on the order: nothing changes.
+        self.order.refresh_totals()
+        self.assertStoredTotals('70.00', True)
+        self.assertEqual(self.order.total_price(), Decimal('70.00'))
+        self.assertEqual(Order.objects.annotate_totals().get(pk=self.order.pk).total_price(), Decimal('70.00'))
+
+        product3 = Product.objects.create(name='Product 3', price=Decimal('5.00'), available=True)
+        self.order.products.add(product3)
+        self.assertStoredTotals('75.00', True)
+        self.assertEqual(OrderItem.objects.get(order=self.order, product=product3).unit_price, Decimal('5.00'))
+
+    def test_product_delete_updates_stored_totals(self):
+        self.product2.delete()
+        self.assertStoredTotals('10.00', True)
+
+    def test_recompute_command_verifies_and_fixes_stale_totals(self):
+        Order.objects.filter(pk=self.order.pk).update(total_amount=Decimal('0.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_order_totals', '--verify', stdout=StringIO())
+        call_command('recompute_order_totals', '--batch-size', '1', stdout=StringIO())
+        call_command('recompute_order_totals', '--verify', stdout=StringIO())
+        self.assertStoredTotals('30.00', True)
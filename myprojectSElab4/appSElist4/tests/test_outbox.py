@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.models import Product, Customer, Order, OutboxEvent, products_changed
+from appSElist4.outbox import QueueSink, relay_batch
+
+
+class OutboxRecordingTest(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+
+    def events(self, model='order'):
+        return list(OutboxEvent.objects.filter(model=model).order_by('id').values_list('kind', 'previous'))
+
+    def test_saves_record_created_and_status_transitions(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'In Process'
+        order.save()
+        order.save()  # Nothing changed, so no event.
+
+        self.assertEqual(self.events(), [('created', None), ('updated', {'status': 'New'})])
+        event = OutboxEvent.objects.latest('id')
+        self.assertEqual((event.object_id, event.payload['status']), (order.pk, 'In Process'))
+
+    def test_events_roll_back_with_the_write(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Order.objects.create(customer=self.customer, status='New')
+            raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.filter(model='order').exists())
+
+    def test_bulk_writes_and_deletes(self):
+        other = Product.objects.create(name='PlayStation 5 pro', price=889.00, available=False)
+        OutboxEvent.objects.all().delete()
+
+        Product.objects.all().update(available=False)
+        Product.objects.bulk_create([Product(name='Xbox controller', price=59.00)])
+        product_id = self.product.pk
+        self.product.delete()
+
+        self.assertEqual(self.events('product'), [
+            # ``other`` was already unavailable.
+            ('updated', {'available': True}),
+            ('created', None),
+            ('deleted', None),
+        ])
+        self.assertEqual(OutboxEvent.objects.filter(model='product').first().object_id, product_id)
+        self.assertFalse(OutboxEvent.objects.filter(object_id=other.pk).exists())
+
+
+    def test_updates_are_written_in_batches(self):
+        Product.objects.bulk_create([Product(name=f'Batch product {i}', price=i + 1) for i in range(5)])
+        OutboxEvent.objects.all().delete()
+        received = []
+        handler = lambda sender, product_ids, **kwargs: received.append(sorted(product_ids))
+        products_changed.connect(handler, sender=Product, weak=False)
+        self.addCleanup(products_changed.disconnect, handler, sender=Product)
+
+        with mock.patch('appSElist4.models.OUTBOX_BATCH_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            rows = Product.objects.filter(name__startswith='Batch').update(stock=3)
+        self.assertEqual(rows, 5)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "appSElist4_product"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(OutboxEvent.objects.filter(model='product', kind='updated').count(), 5)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(len(received[0]), 5)
+
+
+@override_settings(SYNC_SAFETY_SECONDS=0)
+class OutboxDeliveryTest(APITestCase):
+
+    def setUp(self):
+        customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        for state in ('New', 'In Process', 'Sent'):
+            Order.objects.create(customer=customer, status=state)
+        Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        admin = User.objects.create_user(username='admin', password='adminpassword', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    def test_feed_is_read_in_batches_by_cursor(self):
+        seen, params = [], {'model': 'order', 'limit': 2}
+        while True:
+            response = self.client.get(reverse('event-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [event['payload']['status'] for event in response.data['results']]
+            params['after'] = response.data['next_after']
+            if not response.data['has_more']:
+                break
+        self.assertEqual(seen, ['New', 'In Process', 'Sent'])
+
+    @override_settings(SYNC_SAFETY_SECONDS=60)
+    def test_feed_holds_back_events_that_may_not_have_committed(self):
+        response = self.client.get(reverse('event-list'))
+        self.assertEqual((response.data['results'], response.data['next_after']), ([], 0))
+
+    def test_feed_requires_staff(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.client.get(reverse('event-list')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_relay_delivers_each_event_once(self):
+        sink = QueueSink()
+        self.assertEqual(relay_batch(sink, batch_size=3), 3)
+        self.assertEqual(relay_batch(sink, batch_size=3), 1)
+        self.assertEqual(relay_batch(sink, batch_size=3), 0)
+        batches = [sink.queue.get_nowait() for _ in range(2)]
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertFalse(OutboxEvent.objects.filter(relayed_at__isnull=True).exists())
+
+    def test_relay_command_writes_ndjson(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.ndjson')
+            sink = {'BACKEND': 'appSElist4.outbox.FileSink', 'OPTIONS': {'path': path}}
+            with override_settings(OUTBOX_SINK=sink):
+                call_command('relay_outbox', once=True, stdout=io.StringIO())
+            with open(path, encoding='utf-8') as events_file:
+                messages = [json.loads(line) for line in events_file]
+        self.assertEqual([(message['model'], message['kind']) for message in messages],
+                         [('order', 'created')] * 3 + [('product', 'created')])
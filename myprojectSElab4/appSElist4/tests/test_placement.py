@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.benchmarks import run_contention
+from appSElist4.models import Product, Customer, Order
+
+
+class OrderPlacementTest(APITestCase):
+
+    def setUp(self):
+        self.console = Product.objects.create(name='Xbox series s', price=999.00, available=True, stock=3)
+        self.controller = Product.objects.create(name='Xbox controller', price=59.00, available=True, stock=1)
+        self.game = Product.objects.create(name='Forza Horizon 5', price=69.00, available=True)
+        self.retired = Product.objects.create(name='Xbox One', price=299.00, available=False)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        admin = User.objects.create_user(username='admin', password='adminpassword', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    def place(self, *items, **extra):
+        data = {'customer': self.customer.pk, 'items': [{'product': p.pk, 'quantity': q} for p, q in items]}
+        data.update(extra)
+        return self.client.post(reverse('order-place'), data, format='json')
+
+    def test_place_order_takes_stock_and_creates_order(self):
+        response = self.place((self.console, 2), (self.game, 5), (self.console, 1), status='In Process')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'In Process')
+        self.assertEqual(sorted(response.data['products']), [self.console.pk, self.game.pk])
+        self.assertEqual(response.data['items'], [
+            {'product': self.console.pk, 'quantity': 3, 'unit_price': '999.00'},
+            {'product': self.game.pk, 'quantity': 5, 'unit_price': '69.00'},
+        ])
+        self.assertEqual(Decimal(response.data['total_amount']), Decimal('3342.00'))
+        self.console.refresh_from_db()
+        self.game.refresh_from_db()
+        self.assertEqual(self.console.stock, 0)
+        self.assertIsNone(self.game.stock)
+
+    def test_short_stock_rolls_back_the_whole_order(self):
+        response = self.place((self.console, 1), (self.controller, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['items'], {str(self.controller.pk): 'Only 1 left in stock.'})
+        self.assertFalse(Order.objects.exists())
+        self.console.refresh_from_db()
+        self.assertEqual(self.console.stock, 3)
+
+    def test_unavailable_and_missing_products_are_rejected(self):
+        response = self.client.post(reverse('order-place'), {
+            'customer': self.customer.pk,
+            'items': [{'product': self.retired.pk}, {'product': 999999}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['items'], {str(self.retired.pk): 'Product is not available.',
+                                                  '999999': 'Product does not exist.'})
+
+    def test_invalid_input_is_a_bad_request(self):
+        self.assertEqual(self.place().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.place((self.console, 0)).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_regular_users_cannot_place_orders(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.place((self.game, 1)).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrderPlacementContentionTest(TransactionTestCase):
+
+    def test_concurrent_buyers_never_oversell(self):
+        result = run_contention(buyers=20, threads=4, stock=5)
+
+        self.assertTrue(result['correct'], result)
+        self.assertEqual(result['placed'], 5)
+        self.assertEqual(result['stock_left'], 0)
@@ -0,0 +1,73 @@
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+from appSElist4 import synthetic
+from appSElist4.models import Product, Customer, Order
+
+
+def sequential_scans(queryset):
+    """
+    Tables the database plans to read in full for ``queryset``. Sequential
+    scans are disabled on PostgreSQL while planning, so one that remains
+    means no usable index exists.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return re.findall(r'Seq Scan on "?(\w+)"?', queryset.explain())
+        if connection.vendor == 'sqlite':
+            return re.findall(r'\bSCAN (\w+)(?! USING)\s*$', queryset.explain(), re.MULTILINE)
+    return []
+
+
+class QueryPlanTest(TestCase):
+    """Key viewset and dashboard queries must stay index-backed at scale."""
+
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(products=2000, customers=200, orders=2000, seed=1, batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.customer = Customer.objects.order_by('pk')[10]
+        cls.since = timezone.now() - timedelta(days=30)
+
+    def assertIndexed(self, queryset):
+        self.assertEqual(sequential_scans(queryset), [], queryset.explain())
+
+    def test_product_list_next_page(self):
+        self.assertIndexed(Product.objects.filter(pk__gt=500).order_by('pk')[:101])
+
+    def test_available_products_by_price_range(self):
+        self.assertIndexed(
+            Product.objects.filter(available=True, price__gte=Decimal('10'), price__lte=Decimal('20'))
+            .order_by('price')[:101]
+        )
+
+    def test_products_by_price_range(self):
+        self.assertIndexed(Product.objects.filter(price__lte=Decimal('5')).order_by('price')[:101])
+
+    def test_orders_by_status_newest_first(self):
+        self.assertIndexed(Order.objects.filter(status='Sent').order_by('-date')[:100])
+
+    def test_orders_in_date_range(self):
+        self.assertIndexed(Order.objects.filter(date__gte=self.since).order_by('-date')[:100])
+
+    def test_customer_order_history(self):
+        self.assertIndexed(Order.objects.filter(customer=self.customer).order_by('-date')[:100])
+
+    def test_orders_by_stored_total(self):
+        self.assertIndexed(Order.objects.filter(total_amount__gte=Decimal('1000')).order_by('-total_amount')[:100])
+
+    def test_order_list_page_with_totals(self):
+        self.assertIndexed(Order.objects.annotate_totals().filter(pk__gt=500).order_by('pk')[:100])
+
+    def test_harness_reports_unindexed_scans(self):
+        self.assertEqual(
+            sequential_scans(Customer.objects.filter(address__contains='Monza')),
+            ['appSElist4_customer'],
+        )
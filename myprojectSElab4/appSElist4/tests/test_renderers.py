@@ -0,0 +1,78 @@
+import json
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework_simplejwt.tokens import AccessToken
+from appSElist4 import renderers
+from appSElist4.models import Product
+from appSElist4.parsers import FastJSONParser
+from appSElist4.renderers import FastJSONRenderer, iter_render
+
+
+SAMPLE = ReturnDict({
+    'price': '1.99',
+    'raw_price': Decimal('12.50'),
+    'date': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'name': 'Zoë "quoted" \u2028 line',
+    'nested': [{'id': 1, 'available': True, 'missing': None}, 2.5],
+    7: 'int key',
+}, serializer=None)
+
+
+class FastJSONRendererTest(SimpleTestCase):
+
+    def test_output_matches_drf_renderer(self):
+        expected = JSONRenderer().render(SAMPLE)
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(SAMPLE), expected)
+
+    def test_indented_output_falls_back_to_drf(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_iter_render_streams_in_buffered_chunks(self):
+        items = [{'id': i, 'price': Decimal('1.50')} for i in range(1000)]
+        chunks = list(iter_render(items, buffer_size=1024))
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(chunk) < 1100 for chunk in chunks))
+        self.assertEqual(json.loads(b''.join(chunks)), [{'id': i, 'price': 1.5} for i in range(1000)])
+        self.assertEqual(b''.join(iter_render([])), b'[]')
+
+    def test_parser_rejects_malformed_and_non_finite_json(self):
+        parser = FastJSONParser()
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                parser.parse(mock.Mock(read=lambda body=body: body))
+            with mock.patch.object(renderers, 'orjson', None), self.assertRaises(ParseError):
+                parser.parse(mock.Mock(read=lambda body=body: body))
+
+
+class FastJSONApiTest(APITestCase):
+
+    def setUp(self):
+        admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+    def test_round_trip_through_api(self):
+        response = self.client.post(reverse('product-list'), data=b'{"name": "Kettle \xc3\xa9", "price": "1.99", '
+                                    b'"available": true}', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['price'], '1.99')
+        self.assertIn('"name":"Kettle é"', response.content.decode())
+        self.assertEqual(Product.objects.get().name, 'Kettle é')
+
+        response = self.client.post(reverse('product-list'), data=b'{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,77 @@
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from appSElist4.models import Customer, Product
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTest(APITestCase):
+    databases = {'default', 'replica1', 'replica2'}
+
+    def setUp(self):
+        cache.clear()
+        Customer.objects.create(name='On primary', address='Primary Street 1')
+        for alias in ('replica1', 'replica2'):
+            Customer.objects.using(alias).create(name=f'On {alias}', address='Replica Street 1')
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = self.client_for(self.admin)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def names(self, client=None):
+        response = (client or self.client).get(reverse('customer-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [customer['name'] for customer in response.data['results']]
+
+    def test_reads_rotate_over_replicas(self):
+        served = {tuple(self.names()) for _ in range(4)}
+        self.assertEqual(served, {('On replica1',), ('On replica2',)})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_use_the_primary(self):
+        self.assertEqual(self.names(), ['On primary'])
+
+    def test_queries_outside_requests_use_the_primary(self):
+        self.assertEqual(list(Customer.objects.values_list('name', flat=True)), ['On primary'])
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        response = self.client.post(reverse('customer-list'), {'name': 'New', 'address': 'Street 2'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Customer.objects.filter(name='New').exists())
+        self.assertFalse(Customer.objects.using('replica1').filter(name='New').exists())
+
+        # Read-your-writes for the writing client...
+        self.assertEqual(self.names(), ['On primary', 'New'])
+        # ...while other clients keep reading from replicas.
+        other = self.client_for(User.objects.create_user(username='other', password='testpassword'))
+        self.assertIn(self.names(other), (['On replica1'], ['On replica2']))
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post(reverse('customer-list'), {'name': 'New', 'address': 'Street 2'})
+        self.assertIn(self.names(), (['On replica1'], ['On replica2']))
+
+    def test_writes_read_the_row_from_the_primary(self):
+        product = Product.objects.create(name='Kettle', price='10.00', available=True, stock=7)
+        # Lagging replicas still hold an older version of the row.
+        for alias in ('replica1', 'replica2'):
+            Product.objects.using(alias).create(id=product.id, name='Kettle', price='9.00', available=False, stock=1)
+        response = self.client.patch(reverse('product-detail', kwargs={'pk': product.id}), {'price': '12.00'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertEqual((str(product.price), product.available, product.stock), ('12.00', True, 7))
+
+    def test_cached_responses_are_filled_from_the_primary(self):
+        product = Product.objects.create(name='Kettle', price='12.00', available=True)
+        for alias in ('replica1', 'replica2'):
+            Product.objects.using(alias).create(id=product.id, name='Kettle', price='10.00', available=True)
+        other = self.client_for(User.objects.create_user(username='other', password='testpassword'))
+        response = other.get(reverse('product-list'))
+        self.assertEqual([item['price'] for item in response.data['results']], ['12.00'])
@@ -0,0 +1,79 @@
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from appSElist4 import search
+from appSElist4.models import Product
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class ProductSearchTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        Product.objects.create(name='PlayStation 5 pro', price=889.00, available=True)
+        Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        Product.objects.create(name='Nintendo Switch Plus', price=799.99, available=False)
+        Product.objects.create(name='Red chair', price=50.00, available=True)
+        Product.objects.create(name='Red red red', price=60.00, available=True)
+        self.product_list_url = reverse('product-list')
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def search(self, **params):
+        response = self.client.get(self.product_list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+
+    def test_search_matches_word_prefixes(self):
+        self.assertEqual(self.search(search='play'), ['PlayStation 5 pro'])
+        self.assertEqual(self.search(search='NINTENDO sw'), ['Nintendo Switch Plus'])
+        self.assertEqual(self.search(search='playstation xbox'), [])
+
+    def test_search_results_are_ranked(self):
+        self.assertEqual(self.search(search='red'), ['Red red red', 'Red chair'])
+
+    def test_search_combines_with_price_and_availability_filters(self):
+        self.assertEqual(self.search(search='s', min_price='800'), ['Xbox series s'])
+        self.assertEqual(self.search(search='s', available='false'), ['Nintendo Switch Plus'])
+        self.assertEqual(self.search(max_price='55'), ['Red chair'])
+
+    def test_index_follows_renames_and_deletes(self):
+        product = Product.objects.get(name='Xbox series s')
+        product.name = 'Xbox series x'
+        product.save()
+        self.assertEqual(self.search(search='x'), ['Xbox series x'])
+
+        product.delete()
+        self.assertEqual(self.search(search='xbox'), [])
+
+    def test_ranked_results_paginate_without_duplicates(self):
+        Product.objects.bulk_create(Product(name=f'Red lamp {i}', price=10.00) for i in range(5))
+        expected = self.search(search='red', page_size=100)
+
+        names = []
+        response = self.client.get(self.product_list_url, {'search': 'red', 'page_size': 2})
+        while True:
+            names.extend(item['name'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(names, expected)
+
+    def test_invalid_filter_value_is_rejected(self):
+        response = self.client.get(self.product_list_url, {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_migrate_forgets_whether_the_fts_table_exists(self):
+        key = search.connection_key(connection)
+        search._fts_available[key] = False
+        self.assertEqual(self.search(search='red'), ['Red chair', 'Red red red'])
+
+        search.repair_search_index(using=connection.alias)
+        cache.clear()
+        self.assertNotIn(key, search._fts_available)
+        self.assertEqual(self.search(search='red'), ['Red red red', 'Red chair'])
+        self.assertTrue(search._fts_available[key])
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.models import Product, Customer, Order, Tombstone
+from appSElist4.sync import decode_token, to_micros
+
+
+@override_settings(SYNC_SAFETY_SECONDS=0)
+class DeltaSyncTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.console = Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        self.game = Product.objects.create(name='Forza Horizon 5', price=69.00, available=True)
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def sync(self, url_name='product-changes', **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_sync_returns_only_changes_since_the_token(self):
+        first = self.sync()
+        self.assertEqual([item['name'] for item in first['results']], ['Xbox series s', 'Forza Horizon 5'])
+        self.assertFalse(first['has_more'])
+
+        self.game.price = 59.00
+        self.game.save()
+        Product.objects.filter(pk=self.console.pk).update(available=False)
+        retired = Product.objects.create(name='Xbox One', price=299.00, available=False)
+        retired_id = retired.pk
+        retired.delete()
+
+        second = self.sync(since=first['sync_token'])
+        self.assertEqual([item['id'] for item in second['results']], [self.game.pk, self.console.pk])
+        self.assertEqual(second['results'][0]['price'], '59.00')
+        self.assertEqual(second['deleted'], [retired_id])
+
+        third = self.sync(since=second['sync_token'])
+        self.assertEqual((third['results'], third['deleted']), ([], []))
+
+    def test_pages_follow_the_keyset(self):
+        seen = []
+        params = {'page_size': 1}
+        while True:
+            page = self.sync(**params)
+            seen += [item['id'] for item in page['results']]
+            params['since'] = page['sync_token']
+            if not page['has_more']:
+                break
+        self.assertEqual(seen, [self.console.pk, self.game.pk])
+
+    def test_orders_sync_with_items_and_bulk_total_refreshes(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.console)
+        token = self.sync('order-changes')['sync_token']
+
+        Product.objects.filter(pk=self.console.pk).update(available=False)
+        changes = self.sync('order-changes', since=token)
+        self.assertEqual(len(changes['results']), 1)
+        self.assertFalse(changes['results'][0]['fulfillable'])
+        self.assertEqual(changes['results'][0]['items'],
+                         [{'product': self.console.pk, 'quantity': 1, 'unit_price': '999.00'}])
+
+        order_id = order.pk
+        self.customer.delete()
+        self.assertEqual(self.sync('order-changes', since=changes['sync_token'])['deleted'], [order_id])
+
+    def test_unchanged_feed_answers_not_modified(self):
+        token = self.sync()['sync_token']
+        response = self.client.get(reverse('product-changes'), {'since': token}, HTTP_IF_NONE_MATCH=f'"{token}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertTrue(response['ETag'])
+
+    def test_changed_since_datetime_and_bad_input(self):
+        later = timezone.now() + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.game.save()
+        with mock.patch('django.utils.timezone.now', return_value=later + timedelta(seconds=1)):
+            data = self.sync(changed_since=(later - timedelta(microseconds=1)).isoformat())
+        self.assertEqual([item['id'] for item in data['results']], [self.game.pk])
+
+        for params in ({'since': 'not-a-token'}, {'changed_since': 'yesterday'}):
+            response = self.client.get(reverse('product-changes'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tokens_older_than_the_tombstones_are_gone(self):
+        old = (timezone.now() - timedelta(days=31)).isoformat()
+        response = self.client.get(reverse('product-changes'), {'changed_since': old})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        Tombstone.objects.create(model='product', object_id=1, deleted_at=timezone.now() - timedelta(days=31))
+        call_command('prune_tombstones', stdout=mock.MagicMock())
+        self.assertFalse(Tombstone.objects.exists())
+
+    @override_settings(SYNC_SAFETY_SECONDS=60)
+    def test_full_pages_stop_at_the_safety_horizon(self):
+        Product.objects.filter(pk=self.console.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        page = self.sync(page_size=1)
+        # The game was written within the margin, so it waits for a later sync.
+        self.assertEqual([item['id'] for item in page['results']], [self.console.pk])
+        self.assertFalse(page['has_more'])
+        self.assertLessEqual(decode_token(page['sync_token'])[0][0],
+                             to_micros(timezone.now() - timedelta(seconds=60)))
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=61)):
+            page = self.sync(since=page['sync_token'])
+        self.assertEqual([item['id'] for item in page['results']], [self.game.pk])
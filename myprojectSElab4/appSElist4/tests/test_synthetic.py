@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from appSElist4 import synthetic
+from appSElist4.analytics import refresh_dirty_days
+from appSElist4.models import Product, Customer, Order, DailyRollup, ProductDailyRollup, OutboxEvent
+
+
+class PopulateSampleDataTest(TestCase):
+
+    def populate(self, *args):
+        call_command('populate_sample_data', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_default_creates_the_three_sample_orders(self):
+        self.populate()
+        self.assertEqual(Product.objects.count(), 3)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_generates_requested_volumes_in_batches(self):
+        self.populate('--products', '50', '--customers', '7', '--orders', '40', '--batch-size', '16')
+
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertEqual(Customer.objects.count(), 7)
+        self.assertEqual(Order.objects.count(), 40)
+        self.assertFalse(Order.objects.filter(products=None).exists())
+        for order in Order.objects.annotate_totals():
+            self.assertEqual(order.total_amount, order.annotated_total_price)
+
+    def test_same_seed_generates_the_same_catalog(self):
+        self.populate('--products', '20', '--seed', '7')
+        first = list(Product.objects.order_by('pk').values_list('name', 'price', 'available'))
+        self.populate('--products', '20', '--seed', '7')
+        second = list(Product.objects.order_by('pk').values_list('name', 'price', 'available'))
+        self.assertEqual(first, second)
+
+    def test_append_keeps_existing_rows_and_unique_names(self):
+        self.populate()
+        self.populate('--products', '10', '--orders', '5', '--append')
+        self.assertEqual(Product.objects.count(), 13)
+        self.assertEqual(Order.objects.count(), 8)
+
+    def test_append_after_deletes_continues_past_the_highest_index(self):
+        self.populate('--products', '3')
+        Product.objects.order_by('pk').first().delete()
+        self.populate('--products', '2', '--append')
+        names = list(Product.objects.values_list('name', flat=True))
+        self.assertEqual(len(set(names)), 4)
+        self.assertEqual(sorted(name[-7:] for name in names), ['0000001', '0000002', '0000003', '0000004'])
+
+    def test_clear_removes_derived_rows(self):
+        self.populate('--products', '5', '--customers', '2', '--orders', '4')
+        refresh_dirty_days()
+        self.assertTrue(ProductDailyRollup.objects.exists())
+
+        synthetic.clear()
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(DailyRollup.objects.exists())
+        self.assertFalse(ProductDailyRollup.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_split_distributes_the_remainder(self):
+        self.assertEqual(synthetic._split(10, 3), [4, 3, 3])
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appSElist4.models import Product
+from appSElist4.throttling import CostRateThrottle, LocalCounterStore, _local_store
+
+RATES = {'user': '100/min', 'products': '20/min', 'customers': '20/min', 'orders': '20/min'}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': RATES})
+class ThrottlingApiTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        _local_store.clear()
+        Product.objects.create(name='Xbox series s', price=999.00, available=True)
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def exhaust_search(self):
+        for _ in range(4):
+            response = self.client.get(reverse('product-list'), {'search': 'xbox'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return self.client.get(reverse('product-list'), {'search': 'xbox'})
+
+    def test_searches_spend_the_endpoint_budget_faster_than_reads(self):
+        response = self.exhaust_search()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Refused requests are not charged, and other endpoints have their own budget.
+        self.assertEqual(self.client.get(reverse('order-list')).status_code, status.HTTP_200_OK)
+
+    def test_writes_cost_more_than_reads(self):
+        for index in range(2):
+            response = self.client.post(reverse('product-list'),
+                                        {'name': f'Controller {index}', 'price': '59.00'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(reverse('product-list')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_clients_have_separate_budgets(self):
+        self.assertEqual(self.exhaust_search().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(self.client.get(reverse('product-list'), {'search': 'xbox'}).status_code,
+                         status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_CACHE=None)
+    def test_in_process_store(self):
+        self.assertEqual(self.exhaust_search().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        cache.clear()
+        # The counters are not in the cache.
+        self.assertEqual(self.client.get(reverse('product-list'), {'search': 'xbox'}).status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'test': '10/min'}},
+                   THROTTLE_CACHE=None)
+class SlidingWindowTest(SimpleTestCase):
+
+    def setUp(self):
+        self.store = LocalCounterStore()
+        self.throttle = CostRateThrottle()
+        self.throttle.scope = 'test'
+        self.request = APIRequestFactory().get('/')
+        self.request.user = None
+        self.request.query_params = {}
+
+    def allow_at(self, now):
+        with mock.patch('appSElist4.throttling.time.time', return_value=now), \
+                mock.patch('appSElist4.throttling.counter_store', return_value=self.store):
+            return self.throttle.allow_request(self.request, None)
+
+    def test_previous_window_decays_as_the_window_slides(self):
+        self.assertTrue(all(self.allow_at(60 + i) for i in range(10)))
+        self.assertFalse(self.allow_at(75))
+        # A quarter into the next window 7.5 of the 10 still count.
+        self.assertTrue(self.allow_at(135))
+        self.assertTrue(self.allow_at(135))
+        self.assertFalse(self.allow_at(135))
+        # Another 0.3 of the previous window has to pass: 7 + 3 fits.
+        self.assertAlmostEqual(self.throttle.wait(), 3, places=5)
+        self.assertTrue(self.allow_at(138))
@@ -1,14 +1,19 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
-from appSElist4.models import Product
+from appSElist4.models import Product, Customer, Order
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import AccessToken
+from django.core.cache import cache
+from appSElist4 import cache as cache_module
+from django.test import override_settings
+import tempfile
 
 
 class ProductApiTest(APITestCase):
 
     def setUp(self):
+        cache.clear()
         self.product = Product.objects.create(name='Temporary product', price=1.99, available=True)
         self.product_list_url = reverse('product-list')
         self.product_detail_url = reverse('product-detail', kwargs={'pk': self.product.id})
@@ -32,20 +37,20 @@ class ProductApiTest(APITestCase):
 
         response = self.client.get(self.product_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Temporary product')
-        self.assertEqual(response.data[0]['price'], '1.99')
-        self.assertTrue(response.data[0]['available'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Temporary product')
+        self.assertEqual(response.data['results'][0]['price'], '1.99')
+        self.assertTrue(response.data['results'][0]['available'])
 
     def test_get_all_products_as_admin(self):
         self.authenticate_admin_user()
 
         response = self.client.get(self.product_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Temporary product')
-        self.assertEqual(response.data[0]['price'], '1.99')
-        self.assertTrue(response.data[0]['available'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Temporary product')
+        self.assertEqual(response.data['results'][0]['price'], '1.99')
+        self.assertTrue(response.data['results'][0]['available'])
 
     def test_get_single_product_as_regular_user(self):
         self.authenticate_regular_user()
@@ -123,3 +128,164 @@ class ProductApiTest(APITestCase):
     def test_invalid_url(self):
         response = self.client.get('/invalid-url/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_product_list_is_cursor_paginated(self):
+        self.authenticate_regular_user()
+        Product.objects.bulk_create(
+            Product(name=f'Paged product {i}', price=1.00, available=True) for i in range(4)
+        )
+
+        response = self.client.get(self.product_list_url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+        seen = [item['id'] for item in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(item['id'] for item in response.data['results'])
+            next_url = response.data['next']
+        self.assertEqual(seen, sorted(Product.objects.values_list('id', flat=True)))
+
+    def test_cursor_is_stable_under_concurrent_inserts(self):
+        self.authenticate_regular_user()
+        Product.objects.create(name='Second product', price=2.00, available=True)
+
+        first_page = self.client.get(self.product_list_url, {'page_size': 1})
+        Product.objects.create(name='Inserted later', price=3.00, available=True)
+        second_page = self.client.get(first_page.data['next'])
+
+        self.assertEqual(second_page.data['results'][0]['name'], 'Second product')
+
+
+class ProductCacheTest(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Cached product', price=1.99, available=True)
+        self.product_list_url = reverse('product-list')
+        self.product_detail_url = reverse('product-detail', kwargs={'pk': self.product.id})
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.client.get(self.product_list_url, {'search': 'Cached'})
+        # The page and the authenticated user both come from caches.
+        with self.assertNumQueries(0):
+            response = self.client.get(self.product_list_url, {'search': 'Cached'})
+        self.assertEqual(response.data['results'][0]['name'], 'Cached product')
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get(self.product_detail_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.product_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.product.available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response = self.client.get(self.product_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['available'])
+
+    def test_writes_through_the_api_invalidate_cached_reads(self):
+        self.client.get(self.product_detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.product_detail_url, {'name': 'Renamed product'}, format='json')
+
+        response = self.client.get(self.product_detail_url)
+        self.assertEqual(response.data['name'], 'Renamed product')
+
+    def test_bulk_orm_writes_invalidate_cached_reads(self):
+        self.client.get(self.product_list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.product.pk).update(price=5)
+
+        response = self.client.get(self.product_list_url)
+        self.assertEqual(response.data['results'][0]['price'], '5.00')
+
+    def test_reads_before_a_write_commits_are_not_cached_under_the_new_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.product.pk).update(price=5)
+            # Until the commit the version is unchanged, so nothing read
+            # meanwhile can outlive it.
+            version = cache_module.get_version(cache_module.PRODUCTS)
+        self.assertNotEqual(cache_module.get_version(cache_module.PRODUCTS), version)
+
+    def test_missing_products_are_not_cached(self):
+        missing_url = reverse('product-detail', kwargs={'pk': 99999})
+        self.assertEqual(self.client.get(missing_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', self.client.get(missing_url))
+
+    def test_file_based_cache_backend(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+        }):
+            first = self.client.get(self.product_list_url)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.product.delete()
+            second = self.client.get(self.product_list_url)
+        self.assertEqual(len(first.data['results']), 1)
+        self.assertEqual(len(second.data['results']), 0)
+
+
+class OrderApiTest(APITestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Lando Norris', address='Monaco Street 1')
+        self.products = [
+            Product.objects.create(name=f'Order product {i}', price=10.00, available=True)
+            for i in range(3)
+        ]
+        self.order_list_url = reverse('order-list')
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(customer=self.customer, status='New')
+            order.products.add(*self.products)
+
+    def test_admin_writes_orders_with_items_or_products(self):
+        admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+        first, second, _ = self.products
+        response = self.client.post(self.order_list_url, {
+            'customer': self.customer.pk, 'status': 'New',
+            'items': [{'product': first.pk, 'quantity': 2}, {'product': second.pk}, {'product': first.pk}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['items'], [
+            {'product': first.pk, 'quantity': 3, 'unit_price': '10.00'},
+            {'product': second.pk, 'quantity': 1, 'unit_price': '10.00'},
+        ])
+        self.assertEqual(response.data['total_amount'], '40.00')
+
+        url = reverse('order-detail', args=[response.data['id']])
+        response = self.client.patch(url, {'products': [second.pk]}, format='json')
+        self.assertEqual(response.data['items'], [{'product': second.pk, 'quantity': 1, 'unit_price': '10.00'}])
+        self.assertEqual(response.data['total_amount'], '10.00')
+
+        response = self.client.post(self.order_list_url, {'customer': self.customer.pk, 'status': 'New'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('products', response.data)
+
+    def test_order_list_query_count_does_not_grow_with_orders(self):
+        self.create_orders(2)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.order_list_url)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_orders(10)
+        # The user row is cached after the first request: orders and product ids.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.order_list_url)
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(response.data['results'][0]['products'], [p.id for p in self.products])
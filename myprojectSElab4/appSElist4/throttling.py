@@ -0,0 +1,207 @@
+"""
+Cost-weighted rate limits for the API viewsets.
+
+Each request spends tokens from a budget that refills at the configured
+rate (``'1000/min'`` allows 1000 tokens per minute): reads cost
+``THROTTLE_COSTS['read']``, ``?search=`` requests ``['search']`` and writes
+``['write']``. Budgets are enforced with a sliding-window counter: two
+per-window totals per key, the previous one weighted by how much of it still
+overlaps the window ending now. That smooths bursts at window boundaries like
+a token bucket, but needs only one counter increment per request, so it can
+live in a shared cache with atomic ``incr``.
+
+Counters are kept in the Django cache named by ``THROTTLE_CACHE``, which
+must be shared (e.g. Redis or Memcached) for limits to hold across
+processes, or in process memory when it is None.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_COSTS = {'read': 1, 'search': 5, 'write': 10}
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'1000/min'`` -> ``(1000, 60)``, accepting DRF's rate strings."""
+    tokens, period = rate.split('/')
+    return int(tokens), DURATIONS[period[0]]
+
+
+class LocalCounterStore:
+    """
+    Per-process counters: a dict of ``[window, current, previous, duration]``
+    behind one lock, pruned of idle keys every ``prune_every`` hits.
+    """
+    prune_every = 10000
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def incr(self, key, window, cost, duration):
+        """Add ``cost`` to ``key``'s count in ``window``; return it and the previous window's count."""
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter[0] < window - 1:
+                counter = self._counters[key] = [window, 0, 0, duration]
+            elif counter[0] == window - 1:
+                counter[:3] = [window, 0, counter[1]]
+            counter[1] += cost
+            self._hits += 1
+            if self._hits % self.prune_every == 0:
+                self._prune(time.time())
+            return counter[1], counter[2]
+
+    def decr(self, key, window, cost):
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == window:
+                counter[1] -= cost
+
+    def _prune(self, now):
+        # A key idle for two whole windows no longer affects any decision.
+        stale = [key for key, (window, _, _, duration) in self._counters.items()
+                 if (window + 2) * duration <= now]
+        for key in stale:
+            del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheCounterStore:
+    """Counters in a Django cache, one key per window, expiring after two windows."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def incr(self, key, window, cost, duration):
+        current_key = f'throttle:{key}:{window}'
+        previous = self.cache.get(f'throttle:{key}:{window - 1}', 0)
+        try:
+            current = self.cache.incr(current_key, cost)
+        except ValueError:
+            # First hit of the window: create the key. Another process may
+            # have done so in between, in which case add() fails and we incr.
+            if self.cache.add(current_key, cost, duration * 2):
+                current = cost
+            else:
+                current = self.cache.incr(current_key, cost)
+        return current, previous
+
+    def decr(self, key, window, cost):
+        try:
+            self.cache.decr(f'throttle:{key}:{window}', cost)
+        except ValueError:
+            pass
+
+    def clear(self):
+        # Entries expire on their own; nothing to do for a shared cache.
+        pass
+
+
+_local_store = LocalCounterStore()
+
+
+def counter_store():
+    alias = getattr(settings, 'THROTTLE_CACHE', 'default')
+    if alias is None:
+        return _local_store
+    return CacheCounterStore(alias)
+
+
+def request_cost(request, view):
+    costs = {**DEFAULT_COSTS, **getattr(settings, 'THROTTLE_COSTS', {})}
+    if request.method not in SAFE_METHODS:
+        return costs['write']
+    # The async views pass a plain Django request, which has no query_params.
+    if getattr(request, 'query_params', request.GET).get(api_settings.SEARCH_PARAM):
+        return costs['search']
+    return costs['read']
+
+
+class CostRateThrottle(BaseThrottle):
+    """
+    Admits a request while its client's weighted usage over the last
+    ``duration`` seconds, including this request's cost, stays within the
+    rate for ``get_scope(view)`` in ``DEFAULT_THROTTLE_RATES``. Requests
+    that would exceed it are refused without being charged.
+    """
+    scope = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_rate(self, view):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.get_scope(view))
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+        limit, duration = parse_rate(rate)
+        cost = request_cost(request, view)
+        key = f'{self.get_scope(view)}:{self.get_client(request)}'
+
+        now = time.time()
+        window, elapsed = divmod(now, duration)
+        window = int(window)
+        store = counter_store()
+        current, previous = store.incr(key, window, cost, duration)
+        weight = 1 - elapsed / duration
+        if previous * weight + current <= limit:
+            return True
+
+        store.decr(key, window, cost)
+        self.wait_seconds = self.retry_after(limit, duration, elapsed, current - cost, previous, cost)
+        return False
+
+    @staticmethod
+    def retry_after(limit, duration, elapsed, current, previous, cost):
+        """Seconds until ``cost`` more fits, assuming no other requests meanwhile."""
+        if cost > limit:
+            return None
+        if previous and current + cost <= limit:
+            # The previous window's share has to decay far enough first.
+            fraction = 1 - (limit - current - cost) / previous
+            return max(0.0, fraction * duration - elapsed)
+        # Wait for the next window, where the current count becomes the
+        # previous one and decays in turn.
+        until_next = duration - elapsed
+        if not current:
+            return until_next
+        fraction = max(0.0, 1 - (limit - cost) / current)
+        return until_next + fraction * duration
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserRateThrottle(CostRateThrottle):
+    """Budget per client across every endpoint (rate ``user``)."""
+    scope = 'user'
+
+
+class EndpointRateThrottle(CostRateThrottle):
+    """
+    Budget per client and endpoint, keyed by the view's ``throttle_scope``
+    (e.g. ``products``), so one client flooding an endpoint runs out there
+    before it starves everyone else of it.
+    """
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
@@ -17,7 +17,8 @@
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, CustomerViewSet, OrderViewSet
+from .views import ProductViewSet, CustomerViewSet, OrderViewSet, EventViewSet, JobViewSet, AnalyticsViewSet
+from .async_views import AsyncProductView, AsyncOrderView
 
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -38,10 +39,17 @@ router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'customers', CustomerViewSet, basename='customer')
 router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'events', EventViewSet, basename='event')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/async/products/', AsyncProductView.as_view(), name='async-product-list'),
+    path('api/async/products/<int:pk>/', AsyncProductView.as_view(), name='async-product-detail'),
+    path('api/async/orders/', AsyncOrderView.as_view(), name='async-order-list'),
+    path('api/async/orders/<int:pk>/', AsyncOrderView.as_view(), name='async-order-detail'),
     path('api/', include(router.urls)),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
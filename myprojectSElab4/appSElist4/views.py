@@ -1,25 +1,218 @@
-from rest_framework import viewsets
-from .models import Product, Customer, Order
-from .serializers import ProductSerializer, CustomerSerializer, OrderSerializer
-from rest_framework.permissions import IsAuthenticated
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from .models import Product, Customer, Order, Job, OutboxEvent, replace_order_items
+from .serializers import (ProductSerializer, CustomerSerializer, OrderSerializer, OrderPlacementSerializer,
+                          AnalyticsQuerySerializer, JobSerializer, OutboxEventSerializer, requested_fields)
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from .permissions import IsAdminOrReadOnly
-from rest_framework.filters import SearchFilter
+from .analytics import report
+from .bulk import BulkModelMixin
+from .exports import ExportMixin
+from .fastpath import FastListMixin
+from .cache import CachedReadMixin, PRODUCTS
+from .filters import FieldFilter
+from .instrumentation import InstrumentedViewMixin
+from .placement import OrderNotPlaced, place_order
+from .search import ProductSearchFilter
+from .sync import SyncMixin
+
+
+class SparseQuerysetMixin:
+    """
+    Loads only the columns a ``?fields=`` request will serialize (plus ``id``
+    and any ``?ordering=`` keys the paginator reads), and skips prefetching
+    many-to-many relations that were not asked for.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = requested_fields(self.request)
+        if fields is None:
+            return queryset
+        opts = queryset.model._meta
+        ordering = [name.strip().lstrip('-') for name in self.request.query_params.get('ordering', '').split(',')]
+        columns = {field.name for field in opts.concrete_fields} & (set(fields) | set(ordering))
+        queryset = queryset.only('id', *columns)
+        if not {field.name for field in opts.many_to_many} & set(fields):
+            queryset = queryset.prefetch_related(None)
+        return queryset
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(InstrumentedViewMixin, CachedReadMixin, BulkModelMixin, ExportMixin, SyncMixin, FastListMixin,
+                     SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
-    filter_backends = (SearchFilter,)
-    search_fields = ['name']
+    filter_backends = (ProductSearchFilter, FieldFilter, OrderingFilter)
+    filter_fields = {
+        'min_price': ('price__gte', 'price'),
+        'max_price': ('price__lte', 'price'),
+        'available': ('available', 'available'),
+    }
+    ordering_fields = ('id', 'name', 'price')
+    cache_namespace = PRODUCTS
+    throttle_scope = 'products'
+    bulk_upsert_fields = ('name',)
+    export_name = 'products'
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(InstrumentedViewMixin, BulkModelMixin, ExportMixin, FastListMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    filter_backends = (FieldFilter, OrderingFilter)
+    filter_fields = {
+        'name': ('name__istartswith', 'name'),
+    }
+    ordering_fields = ('id', 'name')
+    throttle_scope = 'customers'
+    export_name = 'customers'
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all()
+
+class OrderViewSet(InstrumentedViewMixin, BulkModelMixin, ExportMixin, SyncMixin, FastListMixin, SparseQuerysetMixin,
+                   viewsets.ModelViewSet):
+    queryset = Order.objects.with_totals()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    filter_backends = (FieldFilter, OrderingFilter)
+    filter_fields = {
+        'status': ('status', 'status'),
+        'customer': ('customer_id', 'customer'),
+        'date_from': ('date__gte', 'date'),
+        'date_to': ('date__lte', 'date'),
+        'min_total': ('total_amount__gte', 'total_amount'),
+        'max_total': ('total_amount__lte', 'total_amount'),
+    }
+    ordering_fields = ('id', 'date', 'status', 'total_amount')
+    throttle_scope = 'orders'
+    export_name = 'orders'
+
+    def split_many_to_many(self, validated_data):
+        m2m = super().split_many_to_many(validated_data)
+        if 'items' in validated_data:
+            m2m['items'] = validated_data.pop('items')
+        return m2m
+
+    def write_many_to_many(self, objs_with_m2m):
+        replace_order_items(
+            (obj, [(item['product'], item['quantity']) for item in m2m.pop('items')])
+            for obj, m2m in objs_with_m2m if 'items' in m2m
+        )
+        super().write_many_to_many(objs_with_m2m)
+
+    def after_bulk_write(self, objs):
+        orders = Order.objects.filter(pk__in=[obj.pk for obj in objs])
+        orders.snapshot_prices()
+        orders.refresh_totals()
+
+    @action(detail=False, methods=['post'], url_path='place')
+    def place(self, request):
+        """
+        Create an order from ``{"customer", "status", "items": [{"product",
+        "quantity"}]}``, taking stock from every product that tracks it.
+        Answers 409 with the reason per product when it cannot be fulfilled.
+        """
+        serializer = OrderPlacementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            order = place_order(data['customer'],
+                                [(item['product'], item['quantity']) for item in data['items']],
+                                status=data['status'])
+        except OrderNotPlaced as exc:
+            return Response({'items': {str(pk): reason for pk, reason in exc.problems.items()}},
+                            status=status.HTTP_409_CONFLICT)
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
+
+
+# Viewsets whose ``bulk/`` requests may run as ``bulk_write`` jobs, by basename.
+BULK_VIEWSETS = {
+    'product': ProductViewSet,
+    'customer': CustomerViewSet,
+    'order': OrderViewSet,
+}
+
+
+class JobViewSet(InstrumentedViewMixin, viewsets.ReadOnlyModelViewSet):
+    """Status and outcome of queued jobs, newest first, for staff."""
+    queryset = Job.objects.order_by('-id')
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    filter_backends = (FieldFilter,)
+    filter_fields = {
+        'status': ('status', 'status'),
+        'task': ('task', 'task'),
+    }
+    throttle_scope = 'jobs'
+
+
+class EventViewSet(InstrumentedViewMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Outbox change feed: events after ``?after=<id>`` (default 0) in id
+    order, at most ``?limit=`` of them, optionally only for
+    ``?model=product|order``.
+    Answers ``{"results", "next_after", "has_more"}``; clients pass
+    ``next_after`` back to continue. The feed stops at events younger than
+    ``SYNC_SAFETY_SECONDS``, since transactions still in flight may yet
+    commit events with lower ids. That only covers transactions that commit
+    within ``SYNC_SAFETY_SECONDS`` of writing their events: events of a
+    slower one can land below a ``next_after`` already handed out, and
+    clients that only read this feed miss them (``relay_outbox`` does not).
+    """
+    queryset = OutboxEvent.objects.all()
+    serializer_class = OutboxEventSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    throttle_scope = 'events'
+    pagination_class = None
+
+    def integer_param(self, request, name, default):
+        try:
+            return int(request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: ['A valid integer is required.']})
+
+    def list(self, request, *args, **kwargs):
+        after = self.integer_param(request, 'after', 0)
+        limit = max(1, min(self.integer_param(request, 'limit', 500), 5000))
+        horizon = timezone.now() - timedelta(seconds=settings.SYNC_SAFETY_SECONDS)
+
+        queryset = self.get_queryset().filter(pk__gt=after)
+        model = request.query_params.get('model')
+        if model:
+            queryset = queryset.filter(model=model)
+        events = list(queryset.order_by('id')[:limit + 1])
+        has_more = len(events) > limit
+        events = events[:limit]
+        for position, event in enumerate(events):
+            if event.created_at > horizon:
+                # Stop at the first held-back event rather than skip past it.
+                events, has_more = events[:position], False
+                break
+        return Response({
+            'results': self.get_serializer(events, many=True).data,
+            'next_after': events[-1].pk if events else after,
+            'has_more': has_more,
+        })
+
+
+class AnalyticsViewSet(InstrumentedViewMixin, viewsets.ViewSet):
+    """
+    Revenue per day, orders per status and top products between
+    ``?start=`` and ``?end=`` (dates, inclusive; all time when left out),
+    served from the rollup tables, plus the ``?top=`` customers by lifetime
+    value. Staff only.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    throttle_scope = 'analytics'
+
+    def list(self, request):
+        params = AnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(report(**params.validated_data))
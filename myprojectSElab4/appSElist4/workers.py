@@ -0,0 +1,21 @@
+"""
+Job entry points for ``run_worker`` pools. Importable before Django is set
+up, as process-pool children import this module to find them.
+"""
+
+
+def setup_process():
+    """Initializer of process-pool children, which start without Django set up."""
+    import django
+    django.setup()
+
+
+def execute(job_id):
+    from django.db import close_old_connections
+    from .jobs import run_job
+    try:
+        return run_job(job_id)
+    finally:
+        # Pool threads and processes keep their connections between jobs;
+        # drop them once they outlive CONN_MAX_AGE or break.
+        close_old_connections()
@@ -0,0 +1,121 @@
+"""
+Builds the ``DATABASES`` entries from environment variables.
+
+    DB_ENGINE              postgresql (default) or sqlite3
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE        seconds to keep a connection open between requests
+                           (default 60; 0 closes it after every request)
+    DB_CONN_HEALTH_CHECKS  ping persistent connections before reusing them
+                           (default true)
+    DB_POOL                use a psycopg 3 connection pool instead of
+                           persistent connections (default false; needs
+                           ``psycopg[binary,pool]``, which requirements.txt
+                           does not install)
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE
+    DB_REPLICA_HOSTS       comma-separated ``host[:port]`` of read replicas,
+                           configured like the primary otherwise
+    DB_REPLICA_PIN_SECONDS how long a client reads from the primary after
+                           writing (default 5)
+"""
+import os
+from importlib.util import find_spec
+
+from django.core.exceptions import ImproperlyConfigured
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off', ''}
+
+POSTGRES_DEFAULTS = {
+    'NAME': 'myDatabase',
+    'USER': 'myuser',
+    'PASSWORD': 'Password123456f1',
+    'HOST': 'localhost',
+    'PORT': '5433',
+}
+
+
+def env_bool(env, name, default):
+    value = env.get(name)
+    if value is None:
+        return default
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ImproperlyConfigured(f'{name} must be a boolean, got {value!r}.')
+
+
+def env_number(env, name, default, cast=int):
+    value = env.get(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} must be a number, got {value!r}.')
+
+
+def pool_available():
+    """Whether psycopg 3 and its pool package, which ``DB_POOL`` needs, are installed."""
+    return find_spec('psycopg') is not None and find_spec('psycopg_pool') is not None
+
+
+def database_config(env=None, prefix='DB_', default_sqlite_name=None):
+    """
+    One ``DATABASES`` entry from the ``<prefix>*`` variables in ``env``
+    (``os.environ`` by default).
+    """
+    env = os.environ if env is None else env
+
+    def get(name, default=None):
+        return env.get(prefix + name, default)
+
+    engine = get('ENGINE', 'postgresql')
+    if engine in ('sqlite', 'sqlite3'):
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': get('NAME', default_sqlite_name),
+        }
+    elif engine in ('postgres', 'postgresql'):
+        config = {'ENGINE': 'django.db.backends.postgresql'}
+        config.update({key: get(key, default) for key, default in POSTGRES_DEFAULTS.items()})
+    else:
+        raise ImproperlyConfigured(f'{prefix}ENGINE must be postgresql or sqlite3, got {engine!r}.')
+
+    config['CONN_HEALTH_CHECKS'] = env_bool(env, prefix + 'CONN_HEALTH_CHECKS', True)
+    if env_bool(env, prefix + 'POOL', False):
+        if config['ENGINE'] != 'django.db.backends.postgresql':
+            raise ImproperlyConfigured(f'{prefix}POOL is only supported with PostgreSQL.')
+        if not pool_available():
+            raise ImproperlyConfigured(f'{prefix}POOL needs psycopg 3 with its pool: pip install "psycopg[binary,pool]".')
+        # Django's pool replaces persistent connections; the two can't be combined.
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS'] = {'pool': {
+            'min_size': env_number(env, prefix + 'POOL_MIN_SIZE', 2),
+            'max_size': env_number(env, prefix + 'POOL_MAX_SIZE', 10),
+            'timeout': env_number(env, prefix + 'POOL_TIMEOUT', 10.0, float),
+            'max_idle': env_number(env, prefix + 'POOL_MAX_IDLE', 300.0, float),
+        }}
+    else:
+        config['CONN_MAX_AGE'] = env_number(env, prefix + 'CONN_MAX_AGE', 60)
+    return config
+
+
+def replica_configs(primary, env=None, prefix='DB_'):
+    """
+    ``{'replica1': {...}, ...}`` for each host in ``<prefix>REPLICA_HOSTS``,
+    copying every other setting from ``primary``. Under test the replicas
+    mirror ``default`` instead of getting test databases of their own.
+    """
+    env = os.environ if env is None else env
+    hosts = [host.strip() for host in env.get(prefix + 'REPLICA_HOSTS', '').split(',') if host.strip()]
+    if hosts and primary['ENGINE'] != 'django.db.backends.postgresql':
+        raise ImproperlyConfigured(f'{prefix}REPLICA_HOSTS is only supported with PostgreSQL.')
+    configs = {}
+    for number, host in enumerate(hosts, start=1):
+        config = dict(primary, HOST=host, TEST={'MIRROR': 'default'})
+        if ':' in host:
+            config['HOST'], config['PORT'] = host.rsplit(':', 1)
+        configs[f'replica{number}'] = config
+    return configs
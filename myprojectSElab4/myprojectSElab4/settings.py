@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .dbconfig import database_config, env_number, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'appSElist4.instrumentation.QueryInstrumentationMiddleware',
+    'appSElist4.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,27 +81,140 @@ WSGI_APPLICATION = 'myprojectSElab4.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Configured from DB_* environment variables; see dbconfig.py.
 
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'myDatabase',
-        'USER': 'myuser',
-        'PASSWORD': 'Password123456f1',
-        'HOST': 'localhost',
-        'PORT': '5433',
-    }
+    'default': database_config(default_sqlite_name=BASE_DIR / 'db.sqlite3'),
 }
+DATABASES.update(replica_configs(DATABASES['default']))
+
+# Reads of appSElist4 models during requests go to these aliases; see
+# appSElist4.routers.ReplicaRouter.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['appSElist4.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = env_number(os.environ, 'DB_REPLICA_PIN_SECONDS', 5)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'appSElist4.authentication.FastJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'appSElist4.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+    'DEFAULT_RENDERER_CLASSES': [
+        'appSElist4.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'appSElist4.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'appSElist4.throttling.UserRateThrottle',
+        'appSElist4.throttling.EndpointRateThrottle',
+    ],
+    # Tokens per period; each request costs THROTTLE_COSTS tokens. ``user``
+    # is a client's overall budget, the others its budget per endpoint.
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '6000/min',
+        'products': '3000/min',
+        'customers': '3000/min',
+        'orders': '3000/min',
+        'events': '3000/min',
+        'jobs': '3000/min',
+        'analytics': '600/min',
+    },
+}
+
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'appSElist4.serializers.StaffClaimTokenObtainPairSerializer',
 }
 
+# Per-process caches used by FastJWTAuthentication. Set a size to 0 to
+# disable that cache.
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TTL = 30
+AUTH_TOKEN_CACHE_SIZE = 4096
+
+
+# LocMemCache is per process: cached responses and their versions (and the
+# replica pins and throttle counters below) are not shared, so a write only
+# invalidates the responses cached by the process that handled it. Use a
+# shared backend such as Redis or Memcached when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+# Seconds a cached read-only API response is kept; writes invalidate earlier,
+# once they commit.
+API_CACHE_TIMEOUT = 300
+
+# Throttle counters (appSElist4.throttling) live in this cache, which must be
+# shared between processes for limits to hold across them; None keeps them in
+# process memory. Searches and writes cost more tokens than plain reads.
+THROTTLE_CACHE = 'default'
+THROTTLE_COSTS = {'read': 1, 'search': 5, 'write': 10}
+
+# Delta sync (appSElist4.sync). Sync tokens stay this many seconds behind now
+# so transactions still in flight are not skipped, and tokens older than the
+# tombstones kept for deleted rows are refused with 410 Gone.
+SYNC_SAFETY_SECONDS = 5
+SYNC_TOMBSTONE_DAYS = 30
+
+# Transactional outbox (appSElist4.outbox). relay_outbox delivers events to
+# this sink, ``{'BACKEND': dotted path, 'OPTIONS': constructor kwargs}``, and
+# deletes events relayed more than OUTBOX_RETENTION_DAYS ago. The change feed
+# holds back events younger than SYNC_SAFETY_SECONDS; transactions that take
+# longer than that to commit can still have their events skipped by it.
+OUTBOX_SINK = {
+    'BACKEND': 'appSElist4.outbox.FileSink',
+    'OPTIONS': {'path': BASE_DIR / 'outbox_events.ndjson'},
+}
+OUTBOX_RETENTION_DAYS = 7
+
+# Job queue (appSElist4.jobs). A failed job is retried after about
+# JOB_RETRY_DELAY * 2 ** (attempt - 1) seconds, at most JOB_RETRY_MAX_DELAY; a
+# running job whose worker went silent for JOB_LEASE_SECONDS is run again.
+# Bulk product changes touching more than ORDER_TOTALS_INLINE_LIMIT products
+# refresh order totals in a job instead of in the request.
+JOB_RETRY_DELAY = 2
+JOB_RETRY_MAX_DELAY = 600
+JOB_LEASE_SECONDS = 900
+ORDER_TOTALS_INLINE_LIMIT = 500
+
+# Order analytics (appSElist4.analytics). Days whose orders changed are
+# recomputed by a job queued this many seconds after the first change, or
+# when a report covering them is read, whichever comes first.
+ROLLUP_REFRESH_DELAY = 30
+
+# Request instrumentation (appSElist4.instrumentation). Requests slower than
+# PERF_SLOW_REQUEST_MS are logged as warnings with their slowest queries.
+PERF_SERVER_TIMING = True
+PERF_SLOW_REQUEST_MS = 500
+PERF_SLOW_QUERY_LOG_LIMIT = 20
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Set to INFO for one structured line per request.
+        'appSElist4.perf': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation
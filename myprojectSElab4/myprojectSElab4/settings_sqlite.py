@@ -0,0 +1,30 @@
+"""
+SQLite variant of the project settings, for running the test suite and
+benchmarks without a PostgreSQL server:
+
+    python manage.py test appSElist4/tests --settings=myprojectSElab4.settings_sqlite
+    python manage.py run_benchmarks --settings=myprojectSElab4.settings_sqlite
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    # In-memory stand-ins for read replicas. They are separate databases, so
+    # tests can tell which alias served a read; enable them with
+    # DATABASE_REPLICAS.
+    'replica1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    'replica2': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+DATABASE_REPLICAS = []
+# The same database can also be selected without this module by setting
+# DB_ENGINE=sqlite3 (and optionally DB_NAME) for the default settings.